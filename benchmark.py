@@ -0,0 +1,385 @@
+import argparse
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from functools import partial
+
+import numpy
+
+import sim_for_energy_consumption
+import sim_for_fixed_joining_node
+import sim_for_mobile_joining_node
+from ieee802154.duration import Duration
+from ieee802154.tsch.joining_phase_simulator import (EBSchedulingMethod, NotValidJoiningPhaseSimulatorConfig,
+                                                     SimulationNotCompleted)
+from ieee802154.tsch.batch_simulator import captures_eb
+from ieee802154.node import Node, NodeType
+from ieee802154.node_group import NodeGroup, NodeGroupProperties
+from ieee802154.pan_coordinator import PANCoordinator
+from ieee802154.tsch import timeslot_template
+from sim_for_fixed_joining_node import Scenario
+from sweep_engine import unit_numpy_randgen, unit_randgen, unit_seed
+
+HORIZON = Duration(2, unit="h")
+
+
+def formation_setup(scheduling_method, atp_enabled, num_nodes, seed):
+    """
+    Creates the simulator of a topology sample of the energy consumption command (10% of mobile nodes), in an area
+    where the density of the nodes is the one of the largest sweep point of the command (150 nodes in 100m x 100m).
+    """
+    num_mobile_nodes = int(0.1 * num_nodes)
+    side = 100 * math.sqrt(num_nodes / 150)
+
+    nodes = sim_for_energy_consumption.generate_topology((side, side), num_nodes - num_mobile_nodes, num_mobile_nodes,
+                                                         unit_numpy_randgen(seed, "topology"))
+    return sim_for_energy_consumption.create_unit(scheduling_method, atp_enabled, nodes, num_mobile_nodes, seed,
+                                                  HORIZON, area_dimensions=(side, side))
+
+
+def simulated_subslots(simulator, simulated_time):
+    """
+    :return: the number of the advertisement subslots of the given simulated time
+    :rtype: float
+    """
+    multislotframe_duration = (simulator.schedule_layout.num_slots_in_ms
+                               * timeslot_template.defaultTimeslotTemplateFor2450MHzBand.mac_ts_timeslot_length)
+    return simulated_time / multislotframe_duration * simulator.schedule_layout.total_adv_subslots_in_ms
+
+
+def measure(operation, min_time, rounds=3):
+    """
+    Calls the operation in rounds, until min_time / rounds seconds have elapsed in each round (at least once per
+    round, and in one round if a call takes longer than min_time). The fastest round is reported, since the slower ones
+    are mostly affected by the other load of the machine.
+    :param operation: a function that returns the number of advertisement subslots that it simulated, or None
+    :return: the number of calls, the elapsed seconds and the simulated subslots (None if they are not counted) of the
+    fastest round
+    :rtype: (int, float, float | None)
+    """
+    fastest = None
+    for _ in range(rounds):
+        ops, subslots = 0, 0
+        start = time.perf_counter()
+        while True:
+            s = operation()
+            subslots = None if s is None or subslots is None else subslots + s
+            ops += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time / rounds:
+                break
+
+        if fastest is None or ops / elapsed > fastest[0] / fastest[1]:
+            fastest = ops, elapsed, subslots
+        if elapsed >= min_time:  # one call takes longer than all the rounds (e.g. the formation of 1000 nodes)
+            break
+
+    return fastest
+
+
+def bench_execute(scheduling_method, atp_enabled, num_nodes, min_time):
+    seed = unit_seed("benchmark_execute", num_nodes, 0)
+    simulator = formation_setup(scheduling_method, atp_enabled, num_nodes, seed)
+
+    def operation():
+        formation_time, _ = simulator.execute()
+        return simulated_subslots(simulator, formation_time)
+
+    return measure(operation, min_time)
+
+
+def bench_rejoin_fixed(scheduling_method, scenario, num_advertisers, min_time):
+    seed = unit_seed("benchmark_rejoin_{}".format(scenario.name), num_advertisers, 0)
+    nodes = sim_for_fixed_joining_node.generate_topology(scenario, num_advertisers,
+                                                         unit_numpy_randgen(seed, "topology"))
+    simulator, joining_node = sim_for_fixed_joining_node.create_unit(scheduling_method, scenario, False, nodes, seed,
+                                                                     HORIZON)
+
+    return bench_rejoin(simulator, joining_node, seed, min_time)
+
+
+def bench_rejoin_mobile(scheduling_method, num_advertisers, min_time):
+    seed = unit_seed("benchmark_rejoin_MOBILE", num_advertisers, 0)
+    nodes = sim_for_mobile_joining_node.generate_topology(sim_for_mobile_joining_node.AREA_DIMENSIONS,
+                                                          num_advertisers, unit_numpy_randgen(seed, "topology"))
+    simulator, mobile_node = sim_for_mobile_joining_node.create_unit(scheduling_method, False, nodes, seed, HORIZON)
+
+    return bench_rejoin(simulator, mobile_node, seed, min_time)
+
+
+def bench_rejoin(simulator, joining_node, seed, min_time):
+    simulator.execute()  # the network formation is not measured
+    rejoin_randgen = unit_randgen(seed, "rejoin")
+
+    def operation():
+        res = simulator.rejoining_attempt(joining_node, Duration(rejoin_randgen.random() * 100, unit="s"))
+        # ECV and ECH also return the EB scheduling delay and the number of sensed advertisement slots
+        return simulated_subslots(simulator, res if isinstance(res, Duration) else res[0])
+
+    return measure(operation, min_time)
+
+
+def bench_capture(num_candidate_ebs, min_time, batch=False):
+    """
+    Resolves the capture of an EB among num_candidate_ebs candidate EBs, which start within two EB durations. Half of
+    them are transmitted to the channel to which the joining node listens, so that most of them collide.
+    """
+    seed = unit_seed("benchmark_capture", num_candidate_ebs, 0)
+    simulator = formation_setup(EBSchedulingMethod.CFASV, False, 10, seed)
+    simulator.execute()  # sets the scanning start time of the nodes
+
+    joining_node = next(node for node in simulator.node_group
+                        if not node.is_mobile and node is not node.node_group.pan_coordinator)
+    t_eb = simulator.schedule_layout.t_eb
+    shr_duration = Duration(5 * 8 / joining_node.node_group.properties.data_rate, unit="s")
+    scan_start_time = simulator.scan_start_time(joining_node)
+    asn = simulator.formation_asn
+    scanning_duration = sim_for_energy_consumption.SCANNING_DURATION
+    channel_switching_time = sim_for_energy_consumption.CHANNEL_SWITCHING_TIME
+    num_channels = sim_for_energy_consumption.NUM_CHANNELS
+
+    rng = unit_numpy_randgen(seed, "candidate_ebs")
+    samples = []
+    for _ in range(100):
+        # the EBs arrive in the middle of a scanning period, in which the joining node listens to the channel acn
+        acn = int(rng.integers(1000))
+        start = (scan_start_time + acn * (scanning_duration + channel_switching_time)
+                 + (scanning_duration - 3 * t_eb) * rng.random())
+        offsets = rng.random(num_candidate_ebs) * 2 * t_eb.value
+        powers = rng.uniform(-100, -40, num_candidate_ebs)
+        listened = rng.random(num_candidate_ebs) < 0.5
+        # the channel offset that is mapped to the listened channel at the asn, and another one
+        ch_offsets = numpy.where(listened, (acn - asn) % num_channels, (acn - asn + 1) % num_channels)
+        if batch:
+            samples.append((start.value + offsets, powers, ch_offsets, listened))
+        else:
+            samples.append([{"rx_start_time": start + Duration(int(offset), unit="ns"), "rx_power": float(power),
+                             "tx_channel_offset": int(ch_offset)}
+                            for offset, power, ch_offset in zip(offsets, powers, ch_offsets)])
+
+    sample_indexes = itertools.cycle(range(len(samples)))
+
+    def operation():
+        sample = samples[next(sample_indexes)]
+        if batch:
+            captures_eb(*sample, t_eb.value, shr_duration.value)
+        else:
+            simulator.captured_eb(joining_node, list(sample), asn)
+
+    return measure(operation, min_time)
+
+
+def bench_mobility(min_time):
+    """
+    Computes the position of a mobile node at consecutive timeslots.
+    """
+    seed = unit_seed("benchmark_mobility", 1, 0)
+    ng = NodeGroup(NodeGroupProperties(250000, (100, 100)), unit_randgen(seed, "node_group").getrandbits(63))
+    PANCoordinator(0, (50, 50), sim_for_mobile_joining_node.TX_POWER, sim_for_mobile_joining_node.SENSITIVITY,
+                   Duration(0), sim_for_mobile_joining_node.CHANNEL_SWITCHING_TIME, ng)
+    mobile_node = Node(1, (10, 10), True, NodeType.RFD, sim_for_mobile_joining_node.TX_POWER,
+                       sim_for_mobile_joining_node.SENSITIVITY, Duration(0),
+                       sim_for_mobile_joining_node.CHANNEL_SWITCHING_TIME, ng)
+    timeslot_length = timeslot_template.defaultTimeslotTemplateFor2450MHzBand.mac_ts_timeslot_length
+
+    def operation():
+        ng.time += timeslot_length
+        mobile_node.position
+
+    return measure(operation, min_time)
+
+
+def bench_unit_setup(num_advertisers, reuse, min_time):
+    """
+    Creates the unit (node group and simulator) of a topology sample of the energy consumption sweeps, as the simulation
+    command does, or resets the unit of the previous sample (reuse).
+    """
+    num_mobile_nodes = int(0.1 * num_advertisers)
+    samples = []
+    for sample_idx in range(10):
+        seed = unit_seed("benchmark_unit_setup", num_advertisers, sample_idx)
+        samples.append((sim_for_energy_consumption.generate_topology(
+            sim_for_energy_consumption.AREA_DIMENSIONS, num_advertisers, num_mobile_nodes,
+            unit_numpy_randgen(seed, "topology")), seed))
+    samples = itertools.cycle(samples)
+    simulator = None
+
+    def operation():
+        nonlocal simulator
+        nodes, seed = next(samples)
+        unit = sim_for_energy_consumption.create_unit(EBSchedulingMethod.CFASV, False, nodes, num_mobile_nodes, seed,
+                                                      HORIZON, simulator)
+        if reuse:
+            simulator = unit
+
+    return measure(operation, min_time)
+
+
+def bench_import(module, min_time):
+    """
+    Imports a module in a fresh interpreter, as a worker process of the simulation sweeps does at its start. The
+    measured time includes the startup of the interpreter.
+    """
+    command = [sys.executable, "-c", "import {}".format(module)]
+    cwd = os.path.dirname(os.path.abspath(__file__))  # the simulation commands are imported from the repository root
+
+    def operation():
+        subprocess.run(command, cwd=cwd, check=True)
+
+    return measure(operation, min_time)
+
+
+def benchmark_cases(num_nodes_list, rejoin_advertisers):
+    """
+    :return: the benchmark cases by name
+    :rtype: dict[str, functools.partial]
+    """
+    cases = {}
+    for scheduling_method in EBSchedulingMethod:
+        for atp_enabled in (False, True):
+            for num_nodes in num_nodes_list:
+                cases["execute/{}{}/{}".format(scheduling_method.name, "_with_ATP" if atp_enabled else "",
+                                               num_nodes)] = partial(bench_execute, scheduling_method, atp_enabled,
+                                                                     num_nodes)
+
+    for scheduling_method in EBSchedulingMethod:
+        for scenario in (Scenario.ONE_HOP, Scenario.TWO_HOPS):
+            cases["rejoin/{}/{}".format(scenario.name, scheduling_method.name)] = partial(
+                bench_rejoin_fixed, scheduling_method, scenario, rejoin_advertisers)
+        cases["rejoin/MOBILE/{}".format(scheduling_method.name)] = partial(
+            bench_rejoin_mobile, scheduling_method, 10 * rejoin_advertisers)
+
+    for num_candidate_ebs in (2, 8, 32):
+        cases["micro/captured_eb/{}".format(num_candidate_ebs)] = partial(bench_capture, num_candidate_ebs)
+        cases["micro/captures_eb/{}".format(num_candidate_ebs)] = partial(bench_capture, num_candidate_ebs,
+                                                                          batch=True)
+    cases["micro/mobility"] = bench_mobility
+    for num_nodes in num_nodes_list:
+        cases["micro/unit_setup/{}".format(num_nodes)] = partial(bench_unit_setup, num_nodes, False)
+        cases["micro/unit_reset/{}".format(num_nodes)] = partial(bench_unit_setup, num_nodes, True)
+
+    for name, module in (("simulator", "ieee802154.tsch.joining_phase_simulator"),
+                         ("batch_simulator", "ieee802154.tsch.batch_simulator"),
+                         ("fixed_joining_node", "sim_for_fixed_joining_node")):
+        cases["startup/import/{}".format(name)] = partial(bench_import, module)
+
+    return cases
+
+
+def run_case(case, min_time):
+    """
+    Runs a benchmark case. It is called in a fresh worker process, so that the peak RSS is the one of the case.
+    """
+    try:
+        ops, elapsed, subslots = case(min_time)
+    except (NotValidJoiningPhaseSimulatorConfig, SimulationNotCompleted) as e:
+        return {"skipped": "{}: {}".format(type(e).__name__, e)}
+
+    # the imports are measured in subprocesses, so their peak RSS is the one of the (waited) children of the worker
+    usage = resource.RUSAGE_CHILDREN if getattr(case, "func", None) is bench_import else resource.RUSAGE_SELF
+    return {
+        "ops": ops,
+        "seconds": elapsed,
+        "ops_per_sec": ops / elapsed,
+        "subslots_per_sec": None if subslots is None else subslots / elapsed,
+        "peak_rss_kb": resource.getrusage(usage).ru_maxrss,  # in kilobytes on Linux
+    }
+
+
+def metadata():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    try:
+        import pandas  # the simulator does not require pandas
+        pandas_version = pandas.__version__
+    except ImportError:
+        pandas_version = None
+
+    return {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": numpy.__version__,
+        "pandas": pandas_version,
+        "machine": platform.machine(),
+        "cpus": multiprocessing.cpu_count(),
+    }
+
+
+def compare(results, baseline, tolerance):
+    """
+    Prints the throughput of the cases relative to a baseline.
+    :return: the names of the cases whose throughput (ops/sec) has dropped by more than the tolerance
+    :rtype: list[str]
+    """
+    regressions = []
+    print("\n{:<45} {:>14} {:>14} {:>8}".format("case", "baseline op/s", "op/s", "ratio"))
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None or "ops_per_sec" not in base or "ops_per_sec" not in result:
+            continue
+
+        ratio = result["ops_per_sec"] / base["ops_per_sec"]
+        if ratio < 1 - tolerance:
+            regressions.append(name)
+        print("{:<45} {:>14.2f} {:>14.2f} {:>7.2f}x{}".format(name, base["ops_per_sec"], result["ops_per_sec"], ratio,
+                                                             "  <- regression" if ratio < 1 - tolerance else ""))
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks the network formation, the rejoining attempts, the "
+                                                 "hot functions and the import time of the simulator.")
+    parser.add_argument("--output", default="benchmark_results.json", help="the JSON file of the results")
+    parser.add_argument("--baseline", help="a JSON file of earlier results, to which the results are compared")
+    parser.add_argument("--tolerance", type=float, default=0.1,
+                        help="the relative drop of ops/sec that is reported as a regression (default 0.1)")
+    parser.add_argument("--filter", default="", help="runs only the cases whose name contains the given string")
+    parser.add_argument("--quick", action="store_true", help="small node groups and short measurements")
+    args = parser.parse_args()
+
+    num_nodes_list = (10, 50) if args.quick else (10, 100, 1000)
+    min_time = 0.2 if args.quick else 2.0
+    cases = {name: case for name, case in benchmark_cases(num_nodes_list, 3 if args.quick else 5).items()
+             if args.filter in name}
+
+    results = {}
+    # "spawn": each case starts from a clean process, whose peak RSS is not affected by the previous cases
+    context = multiprocessing.get_context("spawn")
+    for name, case in cases.items():
+        with context.Pool(processes=1) as pool:
+            results[name] = pool.apply(run_case, (case, min_time))
+
+        result = results[name]
+        if "skipped" in result:
+            print("{:<45} skipped: {}".format(name, result["skipped"]))
+        else:
+            print("{:<45} {:>12.2f} op/s {:>14} subslots/s {:>9} KB".format(
+                name, result["ops_per_sec"],
+                "-" if result["subslots_per_sec"] is None else "{:.0f}".format(result["subslots_per_sec"]),
+                result["peak_rss_kb"]))
+
+    with open(args.output, "w") as f:
+        json.dump({"metadata": metadata(), "results": results}, f, indent=2)
+
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f)["results"], args.tolerance)
+        if len(regressions) > 0:
+            print("\n{} regression(s) beyond {:.0%}".format(len(regressions), args.tolerance))
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,176 @@
+import math
+from enum import Enum
+from statistics import NormalDist
+
+import numpy
+
+
+class CIMethod(Enum):
+    PIVOTAL = "Pivotal (basic) bootstrap confidence interval"  # the default one of the package bootstrapped
+    PERCENTILE = "Percentile bootstrap confidence interval"
+    BCA = "Bias-corrected and accelerated bootstrap confidence interval"
+
+
+class BootstrapResult:
+    """
+    The result of the bootstrap for one statistic. The attribute names are the same as the ones of the results of the
+    package bootstrapped, which was used in the past for the export of the results.
+    """
+
+    def __init__(self, value, lower_bound, upper_bound):
+        """
+        :param value: the value of the statistic on the original samples
+        :type value: float
+        :param lower_bound: the lower limit of the confidence interval
+        :type lower_bound: float
+        :param upper_bound: the upper limit of the confidence interval
+        :type upper_bound: float
+        """
+        self.value = value
+        self.lower_bound = lower_bound
+        self.upper_bound = upper_bound
+
+    def __repr__(self):
+        return "{} ({}, {})".format(self.value, self.lower_bound, self.upper_bound)
+
+
+def mean(values, axis=None):
+    return numpy.mean(values, axis=axis)
+
+
+def median(values, axis=None):
+    return numpy.median(values, axis=axis)
+
+
+def percentile(q):
+    """
+    :param q: the percentile to compute, in the range 0-100
+    :type q: int | float
+    :return: a statistic function that computes the given percentile
+    :rtype: (numpy.ndarray, int) -> numpy.ndarray
+    """
+
+    def stat_func(values, axis=None):
+        return numpy.percentile(values, q, axis=axis)
+
+    return stat_func
+
+
+def bootstrap(samples, stat_funcs, num_iterations=1000, alpha=0.05, ci_method=CIMethod.PERCENTILE,
+              max_chunk_elements=2 ** 18, randgen=None):
+    """
+    Calculates the bootstrap confidence intervals of several statistics for one or more metrics at once.
+    A single resampling index matrix is drawn and it is applied to all the metrics, so the metrics that are measured on
+    the same rows (e.g. the joining time, the sensed slots and the EB scheduling delay of ECV/ECH) are resampled
+    together. The index matrix is drawn in chunks of at most max_chunk_elements indexes, in order to bound the memory
+    that is used for large sample sets.
+    :param samples: the samples of the metrics; either a 1-D array for a single metric or a 2-D array with one row per
+    metric
+    :type samples: numpy.ndarray | list
+    :param stat_funcs: the statistics to compute, by name. Each function takes an array and an axis (e.g. mean, median
+    and percentile(95) of this module)
+    :type stat_funcs: dict[str, (numpy.ndarray, int) -> numpy.ndarray]
+    :param num_iterations: the number of bootstrap resamples
+    :type num_iterations: int
+    :param alpha: the significance level; the confidence level of the intervals is 1 - alpha
+    :type alpha: float
+    :param ci_method: the method used for the calculation of the confidence intervals
+    :type ci_method: CIMethod
+    :param max_chunk_elements: the maximum number of resampling indexes that are kept in memory at once
+    :type max_chunk_elements: int
+    :param randgen: the random generator used for the resampling
+    :type randgen: numpy.random.Generator
+    :return: the results per metric (in the order of the rows of samples) and per statistic
+    :rtype: list[dict[str, BootstrapResult]]
+    """
+    data = numpy.atleast_2d(numpy.asarray(samples, dtype=float))
+    num_metrics, num_samples = data.shape
+
+    if num_samples == 0:
+        return [{name: BootstrapResult(math.nan, math.nan, math.nan) for name in stat_funcs}
+                for _ in range(num_metrics)]
+
+    if randgen is None:
+        randgen = numpy.random.default_rng()
+
+    boot_dists = {(m, name): numpy.empty(num_iterations) for m in range(num_metrics) for name in stat_funcs}
+
+    rows_per_chunk = max(1, min(num_iterations, max_chunk_elements // num_samples))
+    for start in range(0, num_iterations, rows_per_chunk):
+        stop = min(start + rows_per_chunk, num_iterations)
+        indexes = randgen.integers(0, num_samples, size=(stop - start, num_samples))
+
+        for m in range(num_metrics):
+            resampled = data[m][indexes]
+            for name, stat_func in stat_funcs.items():
+                boot_dists[m, name][start:stop] = stat_func(resampled, axis=1)
+
+    results = []
+    for m in range(num_metrics):
+        metric_results = {}
+        for name, stat_func in stat_funcs.items():
+            value = float(stat_func(data[m]))
+            boot_dist = boot_dists[m, name]
+
+            if ci_method is CIMethod.BCA:
+                q_low, q_high = _bca_quantiles(data[m], stat_func, value, boot_dist, alpha, max_chunk_elements)
+            else:
+                q_low, q_high = alpha / 2, 1 - alpha / 2
+
+            lower_bound, upper_bound = numpy.quantile(boot_dist, [q_low, q_high])
+            if ci_method is CIMethod.PIVOTAL:
+                # the quantiles of the bootstrap distribution are reflected around the value (2θ - q_high, 2θ - q_low)
+                lower_bound, upper_bound = 2 * value - upper_bound, 2 * value - lower_bound
+            metric_results[name] = BootstrapResult(value, float(lower_bound), float(upper_bound))
+
+        results.append(metric_results)
+
+    return results
+
+
+def _bca_quantiles(values, stat_func, value, boot_dist, alpha, max_chunk_elements):
+    """
+    Returns the quantiles of the bootstrap distribution that limit the BCa confidence interval
+    """
+    std_normal = NormalDist()
+
+    # bias correction
+    proportion = (numpy.count_nonzero(boot_dist < value) + 0.5 * numpy.count_nonzero(boot_dist == value)) / len(
+        boot_dist)
+    if proportion <= 0 or proportion >= 1:  # degenerate distribution, fall back to the percentile interval
+        return alpha / 2, 1 - alpha / 2
+    z0 = std_normal.inv_cdf(proportion)
+
+    # acceleration, estimated via the jackknife
+    jackknife_values = _jackknife(values, stat_func, max_chunk_elements)
+    deviations = jackknife_values.mean() - jackknife_values
+    denominator = 6 * numpy.sum(deviations ** 2) ** 1.5
+    acceleration = numpy.sum(deviations ** 3) / denominator if denominator > 0 else 0
+
+    quantiles = []
+    for q in (alpha / 2, 1 - alpha / 2):
+        z = z0 + std_normal.inv_cdf(q)
+        quantiles.append(std_normal.cdf(z0 + z / (1 - acceleration * z)))
+
+    return quantiles
+
+
+def _jackknife(values, stat_func, max_chunk_elements):
+    """
+    Returns the values of the statistic on the leave-one-out subsets of the given values
+    """
+    num_samples = len(values)
+    if num_samples == 1:
+        return numpy.asarray([stat_func(values)], dtype=float)
+
+    jackknife_values = numpy.empty(num_samples)
+    positions = numpy.arange(num_samples - 1)
+    rows_per_chunk = max(1, max_chunk_elements // (num_samples - 1))
+
+    for start in range(0, num_samples, rows_per_chunk):
+        left_out = numpy.arange(start, min(start + rows_per_chunk, num_samples))
+        # the row k includes all the indexes except left_out[k]
+        indexes = positions + (positions >= left_out[:, None])
+        jackknife_values[start:start + len(left_out)] = stat_func(values[indexes], axis=1)
+
+    return jackknife_values
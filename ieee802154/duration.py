@@ -0,0 +1,225 @@
+"""
+A lightweight duration type with a resolution of 1ns, which is used for all the times of the simulators. It implements
+the subset of pandas.Timedelta that the simulators need, with the same conversion and rounding rules, so that the
+package can be imported without pandas (e.g. by the worker processes of the simulation sweeps).
+The pandas compatibility layer consists of the functions as_duration, which accepts a pandas.Timedelta (or any other
+datetime.timedelta) wherever the simulators accept a Duration, and to_timedelta, which converts a Duration to a
+pandas.Timedelta. pandas is imported only by to_timedelta.
+"""
+import datetime
+import numbers
+
+# The nanoseconds of each unit, and the decimal digits to which the fractional part of a float value is rounded before
+# its conversion to nanoseconds (as in pandas.Timedelta)
+_UNITS = {
+    "ns": (1, 0),
+    "us": (1000, 3),
+    "ms": (1000000, 6),
+    "s": (1000000000, 9),
+    "min": (60000000000, 10),
+    "h": (3600000000000, 12),
+}
+
+
+class Duration:
+    __slots__ = ("__value",)
+
+    def __init__(self, value=0, unit="ns"):
+        """
+        :param value: the duration, in the given unit. A Duration or a datetime.timedelta (e.g. a pandas.Timedelta)
+        is also accepted, in which case the unit is ignored
+        :type value: int | float | Duration | datetime.timedelta
+        :param unit: the unit of the value ("ns", "us", "ms", "s", "min" or "h")
+        :type unit: str
+        """
+        # the built-in types are checked first, since the checks of the abstract base classes are slower
+        if isinstance(value, (int, numbers.Integral)):
+            self.__value = int(value) * _UNITS[unit][0]
+        elif isinstance(value, (float, numbers.Real)):
+            factor, digits = _UNITS[unit]
+            base = int(value)
+            fraction = value - base
+            if digits:
+                fraction = round(fraction, digits)
+            self.__value = base * factor + int(fraction * factor)
+        else:
+            value = _nanoseconds(value)
+            if value is None:
+                raise TypeError("A duration must be a number, a Duration or a datetime.timedelta")
+            self.__value = value
+
+    @classmethod
+    def from_ns(cls, value):
+        """
+        :param value: the duration, in ns
+        :type value: int
+        :return: the duration
+        :rtype: Duration
+        """
+        duration = object.__new__(cls)
+        duration.__value = value
+        return duration
+
+    @property
+    def value(self):
+        """
+        :return: the duration, in ns
+        :rtype: int
+        """
+        return self.__value
+
+    def total_seconds(self):
+        """
+        :return: the duration, in seconds, with a resolution of 1us (as datetime.timedelta and pandas.Timedelta)
+        :rtype: float
+        """
+        # the same float operations as datetime.timedelta, so that the result is identical to the one of pandas
+        days, microseconds = divmod(self.__value // 1000, 86400000000)
+        seconds, microseconds = divmod(microseconds, 1000000)
+        return days * 86400 + seconds + microseconds / 1000000
+
+    def __add__(self, other):
+        other = _nanoseconds(other)
+        return NotImplemented if other is None else Duration.from_ns(self.__value + other)
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        other = _nanoseconds(other)
+        return NotImplemented if other is None else Duration.from_ns(self.__value - other)
+
+    def __rsub__(self, other):
+        other = _nanoseconds(other)
+        return NotImplemented if other is None else Duration.from_ns(other - self.__value)
+
+    def __mul__(self, other):
+        if isinstance(other, numbers.Integral):
+            return Duration.from_ns(self.__value * int(other))
+        elif isinstance(other, numbers.Real):
+            return Duration.from_ns(int(self.__value * other))
+        return NotImplemented
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other):
+        if isinstance(other, numbers.Real):
+            return Duration.from_ns(int(self.__value / other))
+        other = _nanoseconds(other)
+        return NotImplemented if other is None else self.__value / other
+
+    def __rtruediv__(self, other):
+        other = _nanoseconds(other)
+        return NotImplemented if other is None else other / self.__value
+
+    def __floordiv__(self, other):
+        if isinstance(other, numbers.Integral):
+            return Duration.from_ns(self.__value // int(other))
+        other = _nanoseconds(other)
+        return NotImplemented if other is None else self.__value // other
+
+    def __rfloordiv__(self, other):
+        other = _nanoseconds(other)
+        return NotImplemented if other is None else other // self.__value
+
+    def __mod__(self, other):
+        other = _nanoseconds(other)
+        return NotImplemented if other is None else Duration.from_ns(self.__value % other)
+
+    def __rmod__(self, other):
+        other = _nanoseconds(other)
+        return NotImplemented if other is None else Duration.from_ns(other % self.__value)
+
+    def __divmod__(self, other):
+        other = _nanoseconds(other)
+        return NotImplemented if other is None else (self.__value // other, Duration.from_ns(self.__value % other))
+
+    def __neg__(self):
+        return Duration.from_ns(-self.__value)
+
+    def __pos__(self):
+        return self
+
+    def __abs__(self):
+        return Duration.from_ns(abs(self.__value))
+
+    def __bool__(self):
+        return self.__value != 0
+
+    def __eq__(self, other):
+        other = _nanoseconds(other)
+        return NotImplemented if other is None else self.__value == other
+
+    def __ne__(self, other):
+        other = _nanoseconds(other)
+        return NotImplemented if other is None else self.__value != other
+
+    def __lt__(self, other):
+        other = _nanoseconds(other)
+        return NotImplemented if other is None else self.__value < other
+
+    def __le__(self, other):
+        other = _nanoseconds(other)
+        return NotImplemented if other is None else self.__value <= other
+
+    def __gt__(self, other):
+        other = _nanoseconds(other)
+        return NotImplemented if other is None else self.__value > other
+
+    def __ge__(self, other):
+        other = _nanoseconds(other)
+        return NotImplemented if other is None else self.__value >= other
+
+    def __hash__(self):
+        return hash(self.__value)
+
+    def __reduce__(self):
+        return Duration.from_ns, (self.__value,)
+
+    def __repr__(self):
+        return "Duration({}, unit='ns')".format(self.__value)
+
+
+def _nanoseconds(value):
+    """
+    :return: the nanoseconds of a Duration or a datetime.timedelta (e.g. a pandas.Timedelta), or None for any other
+    value
+    :rtype: int | None
+    """
+    if type(value) is Duration:
+        return value._Duration__value
+    elif isinstance(value, Duration):
+        return value.value
+    elif isinstance(value, datetime.timedelta):
+        # pandas.Timedelta is a subclass of datetime.timedelta with a resolution of 1ns (the attribute value)
+        nanoseconds = getattr(value, "value", None)
+        if nanoseconds is not None:
+            return int(nanoseconds)
+        return ((value.days * 86400 + value.seconds) * 1000000 + value.microseconds) * 1000
+    return None
+
+
+def as_duration(value):
+    """
+    Converts a duration of the pandas compatibility layer to a Duration.
+    :param value: a Duration or a datetime.timedelta (e.g. a pandas.Timedelta)
+    :type value: Duration | datetime.timedelta
+    :return: the duration, or the value itself if it is neither a Duration nor a datetime.timedelta
+    :rtype: Duration | object
+    """
+    if isinstance(value, Duration):
+        return value
+    nanoseconds = _nanoseconds(value)
+    return value if nanoseconds is None else Duration.from_ns(nanoseconds)
+
+
+def to_timedelta(value):
+    """
+    Converts a Duration (e.g. a result of a simulator) to a pandas.Timedelta. It requires pandas.
+    :param value: the duration
+    :type value: Duration
+    :return: the duration as a pandas.Timedelta
+    :rtype: pandas.Timedelta
+    """
+    from pandas import Timedelta
+
+    return Timedelta(value.value, unit="ns")
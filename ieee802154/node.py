@@ -1,9 +1,8 @@
-import random
-
 import ieee802154
 import math
+import weakref
 from enum import Enum
-from pandas import Timedelta
+from ieee802154.duration import Duration, as_duration
 
 
 class NodeType(Enum):
@@ -20,8 +19,13 @@ class Node:
     This class represents nodes and is a friend class of the class ieee802154.node_group.NodeGroup.
     When a node is mobile, the node moves according to the Random Waypoint Model, with a speed range of 0.1 - 5 m/s and
     zero pause times at the waypoints. Each node automatically receives a unique mac address within the node group.
+    A node holds only a weak reference to its group, so that the group and its nodes do not form reference cycles. The
+    group must therefore be referenced elsewhere (e.g. by the simulator) for as long as the node is used.
     """
 
+    __slots__ = ("__id", "__initial_position", "__is_mobile", "__type", "__tx_power", "__radio_sensitivity",
+                 "__boot_time", "__channel_switching_time", "__node_group", "__mac_address", "__randgen", "__move")
+
     def __init__(self, id, position, is_mobile, type, tx_power, radio_sensitivity, boot_time, channel_switching_time,
                  node_group):
         """
@@ -38,27 +42,22 @@ class Node:
         :param radio_sensitivity the radio sensitivity of the node, in dBm
         :type int
         :param boot_time: the time it takes for the node to be ready to operate after the power has been turned on
-        :type boot_time: pandas.Timedelta
+        :type boot_time: ieee802154.duration.Duration | datetime.timedelta
         :param channel_switching_time: the time it takes the node to change channel
-        :type channel_switching_time: pandas.Timedelta
+        :type channel_switching_time: ieee802154.duration.Duration | datetime.timedelta
         :param node_group: the group to which the node belongs
         :type node_group: ieee802154.node_group.NodeGroup
         :raise NotValidNodeConfigError: : if at least one of the specified parameters is not valid
         """
 
-        # Check if the parameters are valid
-        if not isinstance(id, int) or id < 0:
-            raise NotValidNodeConfigError("The id of the node must be a non-negative integer")
-
-        elif not isinstance(position, tuple) or not isinstance(position[0], (float, int)) or (
-                not isinstance(position[1], (float, int))):
-            raise NotValidNodeConfigError("The position of the node must be expressed in cartesian dimensions (x,y)")
+        # a pandas.Timedelta (or any other datetime.timedelta) is converted to a Duration
+        boot_time = as_duration(boot_time)
+        channel_switching_time = as_duration(channel_switching_time)
 
-        elif (position[0] < 0 or position[1] < 0 or position[0] > node_group.properties.area_dimensions[0]
-              or position[1] > node_group.properties.area_dimensions[1]):
-            raise NotValidNodeConfigError("The position is not in the specified area")
+        # Check if the parameters are valid
+        Node.__check_placement(id, position, boot_time, node_group)
 
-        elif not isinstance(is_mobile, bool):
+        if not isinstance(is_mobile, bool):
             raise NotValidNodeConfigError("The parameter is_mobile should have a boolean value")
 
         elif not isinstance(type, NodeType):
@@ -75,15 +74,10 @@ class Node:
                 "The radio sensitivity must be an integer"
             )
 
-        elif not isinstance(boot_time, Timedelta) or boot_time < Timedelta(0):
-            raise NotValidNodeConfigError(
-                "The boot_time must be a non-negative timedelta ({}.{})".format(Timedelta.__module__,
-                                                                                Timedelta.__name__))
-
-        elif not isinstance(channel_switching_time, Timedelta) or channel_switching_time < Timedelta(0):
+        elif not isinstance(channel_switching_time, Duration) or channel_switching_time < Duration(0):
             raise NotValidNodeConfigError(
-                "The channel switching time must be a non-negative timedelta ({}.{})".format(
-                    Timedelta.__module__, Timedelta.__name__))
+                "The channel switching time must be a non-negative duration ({}.{} or datetime.timedelta)".format(
+                    Duration.__module__, Duration.__name__))
 
         elif not isinstance(node_group, ieee802154.node_group.NodeGroup):
             raise NotValidNodeConfigError(
@@ -97,11 +91,11 @@ class Node:
         self.__radio_sensitivity = radio_sensitivity
         self.__boot_time = boot_time
         self.__channel_switching_time = channel_switching_time
-        self.__node_group = node_group
+        self.__node_group = weakref.ref(node_group)
 
         if is_mobile:
-            self.__randgen = random.Random()
-            self.__move = {}
+            self.__randgen = node_group._NodeGroup__spawn_randgen()
+            self.__move = None
             self.__new_move()
 
         # Check if a node with the given id already exists in the group
@@ -112,9 +106,6 @@ class Node:
         # Add the node to the group
         node_group._NodeGroup__add_node(self)
 
-        # internal support function
-        self.__distance = lambda point1, point2: math.sqrt((point1[0] - point2[0]) ** 2 + (point1[1] - point2[1]) ** 2)
-
     @property
     def id(self):
         """
@@ -129,29 +120,26 @@ class Node:
         :return: the position of the node at the current time, expressed in cartesian dimensions
         :rtype: (int | float, int | float)
         """
-        if not self.__is_mobile or self.__boot_time > self.__node_group.time:
+        if not self.__is_mobile:
+            return self.__initial_position
+
+        time = self.__node_group().time
+        if self.__boot_time > time:
             return self.__initial_position
         else:
             while True:
                 # check if the last move has been completed
-
-                total_distance = self.__distance(self.__move["start_pos"], self.__move["end_pos"])
-                t_dif = self.__node_group.time - self.__move["start_t"]
-                d = self.__move["speed"] * t_dif.total_seconds()  # d: current distance from the starting point
+                (x0, y0), start_time, (x1, y1), speed, total_distance = self.__move
+                d = speed * (time - start_time).total_seconds()  # d: current distance from the starting point
 
                 if d > total_distance:
                     # The last specified move has already completed. We simulate the movement of the node from
                     # the end of this move to the current node group time, by defining the end time of the last move
                     # as the start time of the new move.
-                    self.__new_move(self.__move["start_t"] + Timedelta(total_distance / self.__move["speed"], unit="s"))
+                    self.__new_move(start_time + Duration(total_distance / speed, unit="s"))
                 else:
                     break
 
-            x0 = self.__move["start_pos"][0]
-            y0 = self.__move["start_pos"][1]
-            x1 = self.__move["end_pos"][0]
-            y1 = self.__move["end_pos"][1]
-
             if x0 == x1:
                 x = x0
                 if y0 < y1:
@@ -205,7 +193,7 @@ class Node:
     def boot_time(self):
         """
         :return: the time it takes for the node to be ready to operate after the power has been turned on
-        :rtype: pandas.Timedelta
+        :rtype: ieee802154.duration.Duration
         """
         return self.__boot_time
 
@@ -213,7 +201,7 @@ class Node:
     def channel_switching_time(self):
         """
         :return: the time it takes for the node to change the channel to which it listens
-        :rtype: pandas.Timedelta
+        :rtype: ieee802154.duration.Duration
         """
         return self.__channel_switching_time
 
@@ -223,7 +211,7 @@ class Node:
         :return: the group to which the node belongs
         :rtype: ieee802154.node_group.NodeGroup
         """
-        return self.__node_group
+        return self.__node_group()
 
     @property
     def mac_address(self):
@@ -234,6 +222,43 @@ class Node:
         """
         return self.__mac_address
 
+    @staticmethod
+    def __check_placement(id, position, boot_time, node_group):
+        """
+        Checks the parameters of a node that can change between the topology samples (see NodeGroup.reset)
+        :raise NotValidNodeConfigError: if at least one of the specified parameters is not valid
+        """
+        if not isinstance(id, int) or id < 0:
+            raise NotValidNodeConfigError("The id of the node must be a non-negative integer")
+
+        elif not isinstance(position, tuple) or not isinstance(position[0], (float, int)) or (
+                not isinstance(position[1], (float, int))):
+            raise NotValidNodeConfigError("The position of the node must be expressed in cartesian dimensions (x,y)")
+
+        elif (position[0] < 0 or position[1] < 0 or position[0] > node_group.properties.area_dimensions[0]
+              or position[1] > node_group.properties.area_dimensions[1]):
+            raise NotValidNodeConfigError("The position is not in the specified area")
+
+        elif not isinstance(boot_time, Duration) or boot_time < Duration(0):
+            raise NotValidNodeConfigError(
+                "The boot_time must be a non-negative duration ({}.{} or datetime.timedelta)".format(
+                    Duration.__module__, Duration.__name__))
+
+    # The following private function is used by the friend class NodeGroup
+    def __reset(self, id, position, boot_time):
+        """
+        Replaces the id, the position and the boot time of the node (which have been checked by the group), and draws a
+        new trajectory from the reseeded generator of the group if the node is mobile
+        """
+        self.__id = id
+        self.__initial_position = position
+        self.__boot_time = boot_time
+
+        if self.__is_mobile:
+            self.__randgen = self.__node_group()._NodeGroup__spawn_randgen()
+            self.__move = None
+            self.__new_move()
+
     def distance_from_node(self, node):
         """
         the distance from the given node
@@ -242,7 +267,7 @@ class Node:
         :return: the distance from the given node
         :rtype: float
         """
-        return self.__distance(self.position, node.position)
+        return _distance(self.position, node.position)
 
     def distance_from_point(self, point):
         """
@@ -252,7 +277,7 @@ class Node:
         :return: the distance from the given point
         :rtype: float
         """
-        return self.__distance(self.position, point)
+        return _distance(self.position, point)
 
     def __new_move(self, start_time=None):
         """
@@ -260,8 +285,9 @@ class Node:
         """
         MIN_SPEED = 0.1  # m/s
         MAX_SPEED = 5  # m/s
-        area_dimensions = self.__node_group.properties.area_dimensions
-        start_pos = self.__move.get("end_pos", self.__initial_position)
+        node_group = self.__node_group()
+        area_dimensions = node_group.properties.area_dimensions
+        start_pos = self.__initial_position if self.__move is None else self.__move[2]
 
         while True:
             end_pos = (self.__randgen.random() * area_dimensions[0], self.__randgen.random() * area_dimensions[1])
@@ -274,11 +300,15 @@ class Node:
             speed = MIN_SPEED
 
         if start_time is None:
-            start_time = self.__node_group.time
-
-        self.__move = {
-            "start_pos": start_pos,
-            "start_t": start_time,
-            "end_pos": end_pos,
-            "speed": speed
-        }
+            start_time = node_group.time
+
+        # the move: start position, start time, end position, speed and length
+        self.__move = (start_pos, start_time, end_pos, speed, _distance(start_pos, end_pos))
+
+
+def _distance(point1, point2):
+    """
+    :return: the euclidean distance between two points
+    :rtype: float
+    """
+    return math.sqrt((point1[0] - point2[0]) ** 2 + (point1[1] - point2[1]) ** 2)
@@ -1,7 +1,7 @@
 import random
 
-from pandas import Timedelta
-from ieee802154.node import Node, NodeType
+from ieee802154.duration import Duration, as_duration
+from ieee802154.node import Node, NodeType, NotValidNodeConfigError
 
 
 class NotValidGroupProperties(Exception):
@@ -9,6 +9,8 @@ class NotValidGroupProperties(Exception):
 
 
 class NodeGroupProperties:
+    __slots__ = ("__data_rate", "__area_dimensions")
+
     def __init__(self, data_rate, area_dimensions):
         """
         :param data_rate: the data rate, in bps
@@ -48,20 +50,24 @@ class NodeGroup:
     """
     This class represents a group of nodes.
     Note that an object of this class must be used by only one JoiningPhaseSimulator (see the JoiningPhaseSimulator
-    class).
+    class). The group holds its nodes, whereas the nodes hold only a weak reference to the group (see the Node class).
     """
 
-    def __init__(self, properties):
+    def __init__(self, properties, seed=None):
         """
         :param properties: the properties of the group
         :type properties: NodeGroupProperties
+        :param seed: the seed of the random generator of the group, which is used for the mac addresses and the
+        mobility of the nodes. If it is None, the generator is seeded from the system randomness source
+        :type seed: int | None
         """
         self.__nodes = []
         self.__pan_coordinator = None
         self.__properties = properties
-        self.__time = Timedelta(0)
+        self.__time = Duration(0)
         self.__num_ffds = 0
-        self.__macs_in_use = []
+        self.__macs_in_use = set()
+        self.__randgen = random.Random(seed)
 
     def __iter__(self):
         """
@@ -70,7 +76,46 @@ class NodeGroup:
         """
         return iter(self.__nodes)
 
-    # The following two private functions are used by the friend class Node
+    def reset(self, positions, boot_times, ids=None, seed=None):
+        """
+        Re-uses the group for a new topology sample, instead of creating a new group with new nodes. The positions, the
+        boot times and optionally the ids of the nodes are replaced in place, the time of the group is set to zero, and
+        the random generator of the group is reseeded. The mac addresses and the trajectories of the mobile nodes are
+        drawn again, in the same order as for new nodes, so the group is identical to a new group with the same seed
+        whose nodes are created (in the order of the group) with the new parameters. The types, the mobility, the radio
+        parameters and the order of the nodes are kept. A simulator of the group must then be reset as well (see
+        JoiningPhaseSimulator.reset).
+        :param positions: the new positions of the nodes, in the order of the group
+        :type positions: collections.abc.Sequence[(int | float, int | float)]
+        :param boot_times: the new boot times of the nodes, in the order of the group
+        :type boot_times: collections.abc.Sequence[ieee802154.duration.Duration | datetime.timedelta]
+        :param ids: the new ids of the nodes, in the order of the group. If it is None, the ids are kept
+        :type ids: collections.abc.Sequence[int] | None
+        :param seed: the new seed of the random generator of the group (see the constructor)
+        :type seed: int | None
+        :raise ValueError: if the number of the positions, the boot times or the ids is not the size of the group
+        :raise ieee802154.node.NotValidNodeConfigError: if at least one of the parameters is not valid, in which case
+        the group is not modified
+        """
+        if ids is None:
+            ids = [node.id for node in self.__nodes]
+        if len(positions) != len(self.__nodes) or len(boot_times) != len(self.__nodes) or len(ids) != len(self.__nodes):
+            raise ValueError("One position, one boot time and one id must be given for each node of the group")
+
+        boot_times = [as_duration(boot_time) for boot_time in boot_times]
+        for node_id, position, boot_time in zip(ids, positions, boot_times):
+            Node._Node__check_placement(node_id, position, boot_time, self)
+        if len(set(ids)) != len(ids):
+            raise NotValidNodeConfigError("There is already a node with the given id in the group")
+
+        self.__time = Duration(0)
+        self.__macs_in_use = set()
+        self.__randgen.seed(seed)
+        for node, node_id, position, boot_time in zip(self.__nodes, ids, positions, boot_times):
+            node._Node__reset(node_id, position, boot_time)
+            self.___assign_mac_addr(node)
+
+    # The following private functions are used by the friend class Node
     def __add_node(self, node):
         self.__nodes.append(node)
         self.___assign_mac_addr(node)
@@ -80,6 +125,10 @@ class NodeGroup:
     def __set_pan_coordinator(self, pan_coordinator):
         self.__pan_coordinator = pan_coordinator
 
+    def __spawn_randgen(self):
+        # an independent generator for a node, derived from the generator of the group
+        return random.Random(self.__randgen.getrandbits(64))
+
     @property
     def pan_coordinator(self):
         """
@@ -120,19 +169,28 @@ class NodeGroup:
         consider that the class JoiningPhaseSimulator is a friend class that has access to set the time of the node
         group).
         :return: The time of the network group
-        :rtype: Timedelta
+        :rtype: ieee802154.duration.Duration
         """
         return self.__time
 
+    @time.setter
+    def time(self, time):
+        """
+        Sets the time of the node group outside a simulation, e.g. to move the mobile nodes in a benchmark. A simulator
+        sets the time of its node group by itself, so the time must not be set while the group is simulated.
+        :param time: the new time of the group
+        :type time: ieee802154.duration.Duration
+        """
+        self.__time = time
+
     def ___assign_mac_addr(self, node):
         while True:
-            random_mac = [0x00, 0x8c, 0xfa, random.randint(0x00, 0xff), random.randint(0x00, 0xff),
-                          random.randint(0x00, 0xff)]
-
-            random_mac = '-'.join(map(lambda x: "%02x" % x, random_mac))
+            random_mac = "00-8c-fa-%02x-%02x-%02x" % (self.__randgen.randint(0x00, 0xff),
+                                                      self.__randgen.randint(0x00, 0xff),
+                                                      self.__randgen.randint(0x00, 0xff))
             if random_mac not in self.__macs_in_use:
                 break
 
         node._Node__mac_address = random_mac
-        self.__macs_in_use.append(random_mac)
+        self.__macs_in_use.add(random_mac)
 
@@ -7,6 +7,8 @@ class PANCoordinatorCreationError(Exception):
 
 
 class PANCoordinator(Node):
+    __slots__ = ()
+
     def __init__(self, id, position, tx_power, radio_sensitivity, boot_time, channel_switching_time, node_group):
         """
         :param id: the identifier of the pan coordinator
@@ -19,9 +21,9 @@ class PANCoordinator(Node):
         :type int
         :param boot_time: the time it takes for the pan coordinator to be ready to operate after the power has been
         turned on
-        :type boot_time: pandas.Timedelta
+        :type boot_time: ieee802154.duration.Duration | datetime.timedelta
         :param channel_switching_time: the time it takes the node to change channel
-        :type channel_switching_time: pandas.Timedelta
+        :type channel_switching_time: ieee802154.duration.Duration | datetime.timedelta
         :param node_group: the group to which the pan coordinator belongs
         :type node_group: ieee802154.node_group.NodeGroup
         :raise NotValidNodeConfigError: : if at least one of the specified parameters is not valid
@@ -0,0 +1,30 @@
+class RadioCurrentProfile:
+    """
+    The current consumption of the radio of a node in each state, which is used for the calculation of the energy
+    consumption of the nodes (see ieee802154.tsch.joining_phase_simulator.JoiningPhaseSimulator.energy_breakdown).
+    """
+
+    def __init__(self, rx_current, tx_current, idle_current, voltage):
+        """
+        :param rx_current: the current in the reception (and listening) state, in A
+        :type rx_current: float
+        :param tx_current: the current in the transmission state, in A
+        :type tx_current: float
+        :param idle_current: the current in the idle state, in A
+        :type idle_current: float
+        :param voltage: the supply voltage, in V
+        :type voltage: float
+        """
+        self.rx_current = rx_current
+        self.tx_current = tx_current
+        self.idle_current = idle_current
+        self.voltage = voltage
+
+    def __repr__(self):
+        return "RadioCurrentProfile(rx_current={}, tx_current={}, idle_current={}, voltage={})".format(
+            self.rx_current, self.tx_current, self.idle_current, self.voltage)
+
+
+# The energy consumption information of Zolertia RE-Mote
+# https://github.com/Zolertia/Resources/blob/master/RE-Mote/Hardware/Revision%20B/Datasheets/ZOL-RM0x-B%20-%20RE-Mote%20revision%20B%20Datasheet%20v.1.0.0.pdf
+ZOLERTIA_RE_MOTE = RadioCurrentProfile(rx_current=0.02, tx_current=0.024, idle_current=1.3 / 10 ** 6, voltage=3.7)
@@ -0,0 +1,216 @@
+"""
+Vectorized generators of the node positions of the simulated topologies. The generators draw their random values from
+a numpy.random.Generator and return the positions as a (num_nodes, 2) float array of cartesian coordinates, in meters.
+"""
+import math
+
+import numpy
+
+
+class SpatialGrid:
+    """
+    A uniform grid of square cells that indexes a set of points. It is used to check if a point is within a given range
+    of at least one point of the set. When the range does not exceed the cell size, only the 3x3 cells around the point
+    have to be checked, so the check takes O(1) time for a bounded point density.
+    """
+
+    def __init__(self, cell_size):
+        """
+        :param cell_size: the side of a cell, in meters
+        :type cell_size: int | float
+        """
+        self.__cell_size = cell_size
+        self.__cells = {}
+
+    def __cell(self, x, y):
+        return int(x // self.__cell_size), int(y // self.__cell_size)
+
+    def add(self, x, y):
+        """
+        Adds a point to the grid.
+        :param x: the x coordinate of the point
+        :type x: float
+        :param y: the y coordinate of the point
+        :type y: float
+        """
+        self.__cells.setdefault(self.__cell(x, y), []).append((x, y))
+
+    def any_within(self, x, y, radius):
+        """
+        :param x: the x coordinate of the point
+        :type x: float
+        :param y: the y coordinate of the point
+        :type y: float
+        :param radius: the range, in meters. It must not exceed the cell size
+        :type radius: int | float
+        :return: True if at least one point of the grid is within the range of the given point
+        :rtype: bool
+        """
+        cell_x, cell_y = self.__cell(x, y)
+        radius_squared = radius ** 2
+
+        for i in (cell_x, cell_x - 1, cell_x + 1):
+            for j in (cell_y, cell_y - 1, cell_y + 1):
+                for point_x, point_y in self.__cells.get((i, j), ()):
+                    if (point_x - x) ** 2 + (point_y - y) ** 2 <= radius_squared:
+                        return True
+
+        return False
+
+
+def positions_in_range(center, radio_range, num_positions, rng):
+    """
+    :param center: the position of the antenna
+    :type center: (int | float, int | float)
+    :param radio_range: the radio range, in meters
+    :type radio_range: int | float
+    :param num_positions: the number of positions
+    :type num_positions: int
+    :param rng: the random generator
+    :type rng: numpy.random.Generator
+    :return: positions that are uniformly distributed in the range (a circle) of the antenna
+    :rtype: numpy.ndarray
+    """
+    r = radio_range * numpy.sqrt(rng.random(num_positions))
+    theta = rng.random(num_positions) * 2 * math.pi
+    return numpy.column_stack((center[0] + r * numpy.cos(theta), center[1] + r * numpy.sin(theta)))
+
+
+def circle_circumference_points(center, r, num_points, rng):
+    """
+    :param center: the center of the circle
+    :type center: (int | float, int | float)
+    :param r: the radius of the circle, in meters
+    :type r: int | float
+    :param num_points: the number of points
+    :type num_points: int
+    :param rng: the random generator
+    :type rng: numpy.random.Generator
+    :return: points that are uniformly distributed on the circumference of the circle
+    :rtype: numpy.ndarray
+    """
+    theta = rng.random(num_points) * 2 * math.pi
+    return numpy.column_stack((center[0] + r * numpy.cos(theta), center[1] + r * numpy.sin(theta)))
+
+
+def one_hop_topology(pan_coordinator_pos, num_advertisers, radio_range, rng):
+    """
+    Generates a topology where the joining node is in the range of the PAN coordinator, and the rest of the advertisers
+    are in the range of the joining node.
+    :param pan_coordinator_pos: the position of the PAN coordinator
+    :type pan_coordinator_pos: (int | float, int | float)
+    :param num_advertisers: the number of advertisers around the joining node, including the PAN coordinator
+    :type num_advertisers: int
+    :param radio_range: the guaranteed radio range, in meters
+    :type radio_range: int | float
+    :param rng: the random generator
+    :type rng: numpy.random.Generator
+    :return: the positions of the PAN coordinator, the joining node and the other advertisers, in this order
+    :rtype: numpy.ndarray
+    """
+    joining_node_pos = positions_in_range(pan_coordinator_pos, radio_range, 1, rng)[0]
+    return numpy.concatenate(([pan_coordinator_pos, joining_node_pos],
+                              positions_in_range(joining_node_pos, radio_range, num_advertisers - 1, rng)))
+
+
+def two_hops_topology(pan_coordinator_pos, num_advertisers, radio_range, one_hop_distance, min_pan_coordinator_distance,
+                      rng, batch_size=64):
+    """
+    Generates a topology where the joining node is not a neighbor of the PAN coordinator. A one-hop neighbor of the PAN
+    coordinator is placed on a circle around the PAN coordinator, the joining node is placed in the range of the one-hop
+    neighbor and farther than a min distance from the PAN coordinator, and the rest of the advertisers are placed in the
+    range of the joining node.
+    :param pan_coordinator_pos: the position of the PAN coordinator
+    :type pan_coordinator_pos: (int | float, int | float)
+    :param num_advertisers: the number of advertisers around the joining node, including the one-hop neighbor
+    :type num_advertisers: int
+    :param radio_range: the guaranteed radio range, in meters
+    :type radio_range: int | float
+    :param one_hop_distance: the distance between the PAN coordinator and its one-hop neighbor, in meters
+    :type one_hop_distance: int | float
+    :param min_pan_coordinator_distance: the min distance between the PAN coordinator and the joining node, in meters
+    :type min_pan_coordinator_distance: int | float
+    :param rng: the random generator
+    :type rng: numpy.random.Generator
+    :param batch_size: the number of candidate positions of the joining node that are checked at once
+    :type batch_size: int
+    :return: the positions of the PAN coordinator, the one-hop neighbor, the joining node and the other advertisers, in
+    this order
+    :rtype: numpy.ndarray
+    """
+    one_hop_node_pos = circle_circumference_points(pan_coordinator_pos, one_hop_distance, 1, rng)[0]
+
+    while True:
+        candidates = positions_in_range(one_hop_node_pos, radio_range, batch_size, rng)
+        valid = numpy.flatnonzero(numpy.hypot(candidates[:, 0] - pan_coordinator_pos[0],
+                                              candidates[:, 1] - pan_coordinator_pos[1]) > min_pan_coordinator_distance)
+        if len(valid) > 0:
+            joining_node_pos = candidates[valid[0]]
+            break
+
+    return numpy.concatenate(([pan_coordinator_pos, one_hop_node_pos, joining_node_pos],
+                              positions_in_range(joining_node_pos, radio_range, num_advertisers - 1, rng)))
+
+
+def connected_random_field(area_dimensions, num_nodes, radio_range, rng, batch_size=1024):
+    """
+    Generates a connected random field. The first node is placed uniformly in the area, and each next node is placed
+    uniformly in the part of the area that is in the range of at least one already placed node (rejection sampling).
+    The candidate positions are drawn in batches. The candidates of a batch are checked against the nodes that were
+    placed before the batch through a spatial grid, and every accepted candidate updates the checks of the next
+    candidates of the batch, so the nodes are placed exactly as if the candidates were checked one by one.
+    :param area_dimensions: the area dimensions, in meters
+    :type area_dimensions: (int | float, int | float)
+    :param num_nodes: the number of nodes
+    :type num_nodes: int
+    :param radio_range: the guaranteed radio range, in meters
+    :type radio_range: int | float
+    :param rng: the random generator
+    :type rng: numpy.random.Generator
+    :param batch_size: the number of candidate positions that are drawn at once
+    :type batch_size: int
+    :return: the positions of the nodes, in the order they were placed
+    :rtype: numpy.ndarray
+    """
+    positions = numpy.empty((num_nodes, 2))
+    if num_nodes == 0:
+        return positions
+
+    grid = SpatialGrid(radio_range)
+    # near_cells[i + 1, j + 1] is True if a placed node is in the cell (i, j) of the grid or in one of its 8 neighbors.
+    # It rejects at once most of the candidates of a sparse field, without checking them against the grid
+    near_cells = numpy.zeros((math.ceil(area_dimensions[0] / radio_range) + 3,
+                              math.ceil(area_dimensions[1] / radio_range) + 3), dtype=bool)
+
+    def place(node_idx, x, y):
+        positions[node_idx] = (x, y)
+        grid.add(x, y)
+        i, j = int(x // radio_range), int(y // radio_range)
+        near_cells[i:i + 3, j:j + 3] = True
+
+    place(0, *(rng.random(2) * area_dimensions))
+    num_placed = 1
+
+    while num_placed < num_nodes:
+        candidates = rng.random((batch_size, 2)) * area_dimensions
+        cells = (candidates // radio_range).astype(int) + 1
+        valid = near_cells[cells[:, 0], cells[:, 1]]
+        for idx in numpy.flatnonzero(valid).tolist():
+            valid[idx] = grid.any_within(candidates[idx, 0], candidates[idx, 1], radio_range)
+
+        idx = 0
+        while num_placed < num_nodes:
+            valid_indexes = numpy.flatnonzero(valid[idx:])
+            if len(valid_indexes) == 0:
+                break
+
+            idx += valid_indexes[0]
+            x, y = candidates[idx]
+            place(num_placed, x, y)
+            num_placed += 1
+
+            # the rejected candidates that follow may be in the range of the new node
+            idx += 1
+            valid[idx:] |= (candidates[idx:, 0] - x) ** 2 + (candidates[idx:, 1] - y) ** 2 <= radio_range ** 2
+
+    return positions
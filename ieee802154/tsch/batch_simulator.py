@@ -0,0 +1,582 @@
+"""
+A batch engine that simulates the network formation of many independent node groups (replicas) in lock-step. All the
+replicas share the same configuration, so they have the same advertisement (sub)slots, and the engine advances the
+advertisement subslots of all the replicas together. The state of the replicas is kept in stacked numpy arrays
+(replica x node), so the Python overhead of a subslot is paid once per batch instead of once per replica.
+
+The simulation follows the model of ieee802154.tsch.joining_phase_simulator.JoiningPhaseSimulator (path loss and
+shadowing, clock drifts, channel hopping of the joining nodes, capture effect), so the results of the two simulators
+are statistically equivalent. They are not identical for the same seed, since the random values are drawn in a
+different order. Each replica draws its random values from its own generator, so the result of a replica depends only
+on its node group and its seed, and not on the other replicas of the batch.
+"""
+import math
+
+import numpy
+
+from ieee802154.duration import Duration
+from ieee802154.node import NodeType
+from ieee802154.radio_profile import ZOLERTIA_RE_MOTE
+from ieee802154.tsch.joining_phase_simulator import (EBSchedulingMethod, EnergyBreakdown, JoiningPhaseSimulator,
+                                                     NotValidJoiningPhaseSimulatorConfig, SimulationHorizonExceeded,
+                                                     SimulationNotCompleted, UnreachableNodes, sax)
+
+# The methods whose EB schedule does not depend on the sensing of the advertisement cells (i.e. all except ECV and ECH)
+SUPPORTED_SCHEDULING_METHODS = frozenset({
+    EBSchedulingMethod.CFASV, EBSchedulingMethod.CFASH, EBSchedulingMethod.ECFASV, EBSchedulingMethod.ECFASH,
+    EBSchedulingMethod.MAC_BASED_AS, EBSchedulingMethod.EMAC_BASED_AS, EBSchedulingMethod.Minimal6TiSCH
+})
+
+# The path loss model of JoiningPhaseSimulator (see the function __rx_power)
+_LD0 = JoiningPhaseSimulator._JoiningPhaseSimulator__LD0
+_N = JoiningPhaseSimulator._JoiningPhaseSimulator__N
+_LF = JoiningPhaseSimulator._JoiningPhaseSimulator__LF
+_MAX_SHADOWING = JoiningPhaseSimulator._JoiningPhaseSimulator__MAX_SHADOWING
+_SHADOWING_STD = 4
+
+_CAPTURE_EFFECT_THRESHOLD = 3  # dB, as in JoiningPhaseSimulator
+_MAX_CLOCK_DRIFT = 30 / 10 ** 6  # ±30ppm, as in JoiningPhaseSimulator
+
+
+def mean_rx_power(tx_power, distance):
+    """
+    :return: the received power (in dBm) with the average path loss of the path loss model of JoiningPhaseSimulator,
+    i.e. without the shadowing. The arguments may be numpy arrays
+    :rtype: float | numpy.ndarray
+    """
+    return tx_power - (_LD0 + _N * numpy.log10(distance) + _LF)
+
+
+def max_range(tx_power, radio_sensitivity):
+    """
+    :return: the max distance at which a transmission can be perceived, i.e. with the max shadowing gain. The arguments
+    may be numpy arrays
+    :rtype: float | numpy.ndarray
+    """
+    return 10 ** ((tx_power + _MAX_SHADOWING - _LF - _LD0 - radio_sensitivity) / _N)
+
+
+def shadowing(rng, size):
+    """
+    Draws the shadowing of the path loss model: a normal variable, where the extreme values are rejected
+    :param rng: the random generator
+    :type rng: numpy.random.Generator
+    :param size: the number of values
+    :type size: int
+    :rtype: numpy.ndarray
+    """
+    values = rng.normal(0, _SHADOWING_STD, size)
+    while True:
+        rejected = numpy.flatnonzero(numpy.abs(values) > _MAX_SHADOWING)
+        if len(rejected) == 0:
+            return values
+        values[rejected] = rng.normal(0, _SHADOWING_STD, len(rejected))
+
+
+def advertisement_cells(scheduling_method, nodes, pan_coordinator, total_adv_subslots_in_ms, num_channels):
+    """
+    Computes the advertisement cell (the index of the advertisement subslot in the multi-slotframe and the channel
+    offset) of each FFD, as allocated by JoiningPhaseSimulator. Except for Minimal6TiSCH, the cell depends only on the
+    id (or the mac address) of the node, and the node transmits in it after its joining. In the cases of Minimal6TiSCH
+    (only the cell of the PAN coordinator is computed; the others are selected randomly at the joining) and of the
+    enhanced versions (the PAN coordinator transmits in every subslot with channel offset 0), the subslot of the PAN
+    coordinator is given separately.
+    :param scheduling_method: one of SUPPORTED_SCHEDULING_METHODS
+    :type scheduling_method: EBSchedulingMethod
+    :param nodes: the nodes
+    :type nodes: list[ieee802154.node.Node]
+    :param pan_coordinator: the PAN coordinator
+    :type pan_coordinator: ieee802154.pan_coordinator.PANCoordinator
+    :param total_adv_subslots_in_ms: the number of advertisement subslots in the multi-slotframe
+    :type total_adv_subslots_in_ms: int
+    :param num_channels: the number of channels
+    :type num_channels: int
+    :return: the subslot (-1 for the RFDs and for the nodes without a static cell) and the channel offset of each node
+    :rtype: (numpy.ndarray, numpy.ndarray)
+    """
+    is_ffd = numpy.array([node.type is NodeType.FFD for node in nodes])
+    is_pc = numpy.array([node is pan_coordinator for node in nodes])
+
+    if scheduling_method is EBSchedulingMethod.Minimal6TiSCH:
+        return numpy.where(is_pc, 0, -1), numpy.zeros(len(nodes), dtype=numpy.int64)
+
+    enhanced = scheduling_method in {EBSchedulingMethod.ECFASV, EBSchedulingMethod.ECFASH,
+                                     EBSchedulingMethod.EMAC_BASED_AS}
+    num_avail_ch_offsets = num_channels - 1 if enhanced else num_channels
+
+    if scheduling_method in {EBSchedulingMethod.MAC_BASED_AS, EBSchedulingMethod.EMAC_BASED_AS}:
+        keys = numpy.array([sax(node.mac_address) for node in nodes], dtype=numpy.int64)
+    else:
+        keys = numpy.array([node.id for node in nodes], dtype=numpy.int64)
+
+    adv_cell_idx = keys % (total_adv_subslots_in_ms * num_avail_ch_offsets)
+    if scheduling_method in {EBSchedulingMethod.CFASH, EBSchedulingMethod.ECFASH}:
+        subslot, ch_offset = adv_cell_idx % total_adv_subslots_in_ms, adv_cell_idx // total_adv_subslots_in_ms
+    else:  # vertical filling
+        subslot, ch_offset = adv_cell_idx // num_avail_ch_offsets, adv_cell_idx % num_avail_ch_offsets
+
+    if enhanced:
+        return numpy.where(is_ffd & ~is_pc, subslot, -1), numpy.where(is_pc, 0, ch_offset + 1)
+
+    return numpy.where(is_ffd, subslot, -1), ch_offset
+
+
+def captures_eb(rx_start_times, rx_powers, ch_offsets, listened, t_eb, shr_duration):
+    """
+    The capture model of the function __captured_eb of JoiningPhaseSimulator, for the candidate EBs of one joining node.
+    The checks that depend only on the candidate itself (the node is active, it has enough time to receive the EB and
+    it listens to the channel of the EB) are precomputed in the array listened.
+    :return: True if the joining node captures an EB
+    :rtype: bool
+    """
+    captured = None  # the index of the captured EB
+    interfering = {}  # per channel offset, the indexes of the interfering EBs
+    interference = {}  # per channel offset, in mW
+    frame_sync_end_time = None
+
+    def add_interfering_eb(idx):
+        interfering.setdefault(ch_offsets[idx], []).append(idx)
+        interference[ch_offsets[idx]] = interference.get(ch_offsets[idx], 0) + 10 ** (rx_powers[idx] / 10)
+
+    def update_interfering_ebs(ch_offset, update_time):
+        still_interfering = []
+        for idx in sorted(interfering.get(ch_offset, ()), key=lambda i: rx_start_times[i]):
+            if still_interfering or rx_start_times[idx] + t_eb >= update_time:
+                still_interfering.append(idx)
+            else:
+                interference[ch_offset] -= 10 ** (rx_powers[idx] / 10)
+
+        interfering[ch_offset] = still_interfering
+        if len(still_interfering) == 0:  # fix floating point errors
+            interference[ch_offset] = 0
+
+    def sir(idx, extra_interference=0):
+        return rx_powers[idx] - 10 * math.log10(interference[ch_offsets[idx]] + extra_interference)
+
+    for idx in sorted(range(len(rx_start_times)), key=lambda i: rx_start_times[i]):
+        if captured is not None and rx_start_times[captured] + t_eb < rx_start_times[idx]:
+            return True  # an EB has already been successfully received
+
+        if not listened[idx]:
+            add_interfering_eb(idx)  # may collide with a later EB
+            continue
+
+        update_interfering_ebs(ch_offsets[idx], rx_start_times[idx])
+
+        if captured is None:
+            if interference[ch_offsets[idx]] == 0:  # new frame synchronization attempt
+                captured = idx
+                frame_sync_end_time = rx_start_times[idx] + shr_duration
+            elif (frame_sync_end_time is not None and frame_sync_end_time < rx_start_times[idx]
+                  or sir(idx) < _CAPTURE_EFFECT_THRESHOLD):
+                add_interfering_eb(idx)
+            else:
+                captured = idx
+                if frame_sync_end_time is None:
+                    frame_sync_end_time = rx_start_times[idx] + shr_duration
+
+        elif sir(captured, 10 ** (rx_powers[idx] / 10)) < _CAPTURE_EFFECT_THRESHOLD:
+            add_interfering_eb(captured)
+            captured = None
+
+            if frame_sync_end_time < rx_start_times[idx] or sir(idx) < _CAPTURE_EFFECT_THRESHOLD:
+                add_interfering_eb(idx)
+            else:
+                captured = idx
+
+    return captured is not None
+
+
+class BatchJoiningPhaseSimulator:
+    """
+    Simulates the network formation of several node groups (replicas) in lock-step. The node groups must have the same
+    number of nodes and of FFDs, so that their advertisement (sub)slots coincide. In the current version of the code:
+    - ECV and ECH are not supported (see SUPPORTED_SCHEDULING_METHODS)
+    - the mobile nodes must be RFDs
+    - only the network formation is simulated; the rejoining attempts are simulated by JoiningPhaseSimulator
+    """
+
+    def __init__(self, node_groups, scheduling_method, timeslot_template, slotframe_length, eb_length, num_channels,
+                 scan_duration, ebi, atp_enabled=False, seeds=None, horizon=None, radio_profile=ZOLERTIA_RE_MOTE):
+        """
+        The parameters are the same as the ones of JoiningPhaseSimulator, except for the following:
+        :param node_groups: the groups of nodes (replicas) on which the simulation will be run
+        :type node_groups: list[ieee802154.node_group.NodeGroup]
+        :param seeds: the seeds of the random generators of the replicas, one per node group (e.g. derived from the
+        seeds of their work units). If it is None, the generators are seeded from the system randomness source
+        :type seeds: list[int] | None
+        :raise NotValidJoiningPhaseSimulatorConfig: if the provided arguments are not valid or they are not supported by
+        the batch engine
+        """
+        if scheduling_method not in SUPPORTED_SCHEDULING_METHODS:
+            raise NotValidJoiningPhaseSimulatorConfig(
+                "The scheduling method {} is not supported by the batch engine".format(scheduling_method))
+        if len(node_groups) == 0:
+            raise NotValidJoiningPhaseSimulatorConfig("At least one node group is required")
+        if seeds is not None and len(seeds) != len(node_groups):
+            raise NotValidJoiningPhaseSimulatorConfig("One seed is required for each node group")
+
+        # The arguments of each replica are checked by a JoiningPhaseSimulator, which also gets the advertisement
+        # (sub)slots of its configuration (see ScheduleLayout)
+        simulators = [JoiningPhaseSimulator(node_group, scheduling_method, timeslot_template, slotframe_length,
+                                            eb_length, num_channels, scan_duration, ebi, atp_enabled, None, horizon,
+                                            radio_profile)
+                      for node_group in node_groups]
+
+        if (len({node_group.size for node_group in node_groups}) > 1
+                or len({simulator.schedule_layout.adv_slots_pos_in_ms for simulator in simulators}) > 1):
+            raise NotValidJoiningPhaseSimulatorConfig(
+                "The node groups must have the same number of nodes and the same advertisement slots")
+
+        if any(node.is_mobile and node.type is NodeType.FFD for node_group in node_groups for node in node_group):
+            raise NotValidJoiningPhaseSimulatorConfig("Mobile FFDs are not supported by the batch engine")
+
+        layout = simulators[0].schedule_layout
+        self.__node_groups = list(node_groups)
+        self.__scheduling_method = scheduling_method
+        self.__timeslot_template = timeslot_template
+        self.__num_channels = num_channels
+        self.__horizon = horizon
+        self.__radio_profile = radio_profile
+        self.__enhanced = scheduling_method in {EBSchedulingMethod.ECFASV, EBSchedulingMethod.ECFASH,
+                                                EBSchedulingMethod.EMAC_BASED_AS}
+
+        self.__adv_slots_pos_in_ms = layout.adv_slots_pos_in_ms
+        self.__num_adv_slots_in_ms = layout.num_adv_slots_in_ms
+        self.__subslots_per_adv_slot = layout.subslots_per_adv_slot
+        self.__total_adv_subslots_in_ms = layout.total_adv_subslots_in_ms
+        self.__num_slots_in_ms = layout.num_slots_in_ms
+        self.__ssn = layout.ssn
+        self.__horizon_slots = simulators[0]._JoiningPhaseSimulator__horizon_slots
+
+        # The times are kept in ns (integers) where they are exact, and in seconds (floats) in the vectorized checks
+        self.__t_eb = layout.t_eb.value * 1e-9
+        self.__shr_duration = 5 * 8 / node_groups[0].properties.data_rate
+        self.__subslot_length_ns = layout.subslot_length.value
+        self.__timeslot_length_ns = timeslot_template.mac_ts_timeslot_length.value
+        self.__tx_offset_ns = timeslot_template.mac_ts_tx_offset.value
+        self.__macd = timeslot_template.mac_ts_rx_wait.total_seconds() / 2  # the max allowed clock drift
+        self.__scan_duration = scan_duration.total_seconds()
+
+        # The per node state is kept in (replica, node) arrays, with the nodes in the order of their group
+        self.__nodes = [list(node_group) for node_group in node_groups]
+        self.__pc_idx = numpy.array([nodes.index(node_group.pan_coordinator)
+                                     for nodes, node_group in zip(self.__nodes, node_groups)])
+        self.__slot_0_start_time_ns = numpy.array([node_group.pan_coordinator.boot_time.value
+                                                   for node_group in node_groups], dtype=numpy.int64)
+
+        def node_array(attribute, dtype=float):
+            return numpy.array([[attribute(node) for node in nodes] for nodes in self.__nodes], dtype=dtype)
+
+        self.__is_ffd = node_array(lambda node: node.type is NodeType.FFD, bool)
+        self.__is_mobile = node_array(lambda node: node.is_mobile, bool)
+        self.__tx_power = node_array(lambda node: node.tx_power)
+        self.__radio_sensitivity = node_array(lambda node: node.radio_sensitivity)
+        self.__boot_time = node_array(lambda node: node.boot_time.total_seconds())
+        self.__channel_switching_time = node_array(lambda node: node.channel_switching_time.total_seconds())
+        self.__positions = node_array(lambda node: node.position)
+
+        # the distances between the nodes at their initial positions. The distances of the mobile nodes are computed
+        # at each subslot
+        self.__distances = numpy.hypot(self.__positions[:, :, None, 0] - self.__positions[:, None, :, 0],
+                                       self.__positions[:, :, None, 1] - self.__positions[:, None, :, 1])
+
+        self.__make_static_schedule()
+        self.__rngs = [numpy.random.default_rng(seed) for seed in (seeds or [None] * len(node_groups))]
+        self.__results = None
+
+    def __make_static_schedule(self):
+        cells = [advertisement_cells(self.__scheduling_method, nodes, node_group.pan_coordinator,
+                                     self.__total_adv_subslots_in_ms, self.__num_channels)
+                 for nodes, node_group in zip(self.__nodes, self.__node_groups)]
+        self.__cell_subslot = numpy.array([subslot for subslot, _ in cells], dtype=numpy.int64)
+        self.__cell_ch_offset = numpy.array([ch_offset for _, ch_offset in cells], dtype=numpy.int64)
+
+    def execute(self):
+        """
+        Simulates the network formation process of all the replicas.
+        The simulation is repeated at each call of the function
+        :return: for each replica, a tuple containing the time at which all the nodes have synchronized to the network
+        and the sum energy consumption (as returned by JoiningPhaseSimulator.execute), or the exception that
+        JoiningPhaseSimulator.execute would raise (an instance of SimulationHorizonExceeded or UnreachableNodes) if the
+        sample is censored or its nodes are unreachable
+        :rtype: list[(ieee802154.duration.Duration, float) | SimulationNotCompleted]
+        """
+        num_replicas, num_nodes = self.__is_ffd.shape
+        replicas = numpy.arange(num_replicas)
+
+        self.__joined = numpy.zeros((num_replicas, num_nodes), dtype=bool)
+        self.__joined[replicas, self.__pc_idx] = True
+        self.__sync_asn = numpy.full((num_replicas, num_nodes), -1, dtype=numpy.int64)
+        self.__sync_asn[replicas, self.__pc_idx] = 0
+        self.__EB_tx_counter = numpy.zeros((num_replicas, num_nodes), dtype=numpy.int64)
+        self.__formation_asn = numpy.full(num_replicas, -1, dtype=numpy.int64)
+        self.__formation_time_ns = numpy.zeros(num_replicas, dtype=numpy.int64)
+
+        if self.__scheduling_method is EBSchedulingMethod.Minimal6TiSCH:
+            self.__make_static_schedule()
+
+        censored = {}
+        unreachable = self.__unreachable_nodes()
+        for replica in numpy.flatnonzero(unreachable.any(axis=1)).tolist():
+            censored[replica] = UnreachableNodes([node for node, is_unreachable in zip(self.__nodes[replica],
+                                                                                       unreachable[replica].tolist())
+                                                  if is_unreachable])
+
+        running = numpy.ones(num_replicas, dtype=bool)
+        running[list(censored)] = False
+        self.__run_simulation(running)
+
+        for replica in numpy.flatnonzero(running).tolist():
+            censored[replica] = SimulationHorizonExceeded(
+                "The simulation did not complete within the horizon ({})".format(self.__horizon))
+
+        energy_consumption = self.__energy_per_node().sum(axis=1)
+        self.__results = [
+            censored[replica] if replica in censored else
+            (Duration(int(self.__formation_time_ns[replica]), unit="ns"), float(energy_consumption[replica]))
+            for replica in range(num_replicas)
+        ]
+        return self.__results
+
+    def __draw(self, replicas, draw):
+        """
+        Draws random values for several replicas, from the generator of each replica, so that the values of a replica do
+        not depend on the other replicas
+        :param replicas: the replica of each value, in non-decreasing order
+        :type replicas: numpy.ndarray
+        :param draw: a function that draws the given number of values from a generator (e.g. the function shadowing)
+        :type draw: (numpy.random.Generator, int) -> numpy.ndarray
+        :return: the values
+        :rtype: numpy.ndarray
+        """
+        values = numpy.empty(len(replicas))
+        unique_replicas, starts, counts = numpy.unique(replicas, return_index=True, return_counts=True)
+        for replica, start, count in zip(unique_replicas.tolist(), starts.tolist(), counts.tolist()):
+            values[start:start + count] = draw(self.__rngs[replica], count)
+        return values
+
+    def __run_simulation(self, running):
+        """
+        Simulates the advertisement (sub)slots until all the nodes of the running replicas join the network, or the
+        horizon is exceeded. The replicas that complete the network formation are cleared in the array running
+        """
+        multislotframe_idx = 0
+        while True:
+            for i in range(self.__num_adv_slots_in_ms):
+                asn = multislotframe_idx * self.__num_slots_in_ms + self.__adv_slots_pos_in_ms[i]
+                if self.__horizon_slots is not None and asn > self.__horizon_slots:
+                    return
+
+                for j in range(self.__subslots_per_adv_slot):
+                    self.__simulate_subslot(i * self.__subslots_per_adv_slot + j, asn, j, running)
+                    if not running.any():
+                        return
+
+            multislotframe_idx += 1
+
+    def __simulate_subslot(self, adv_subslot_idx, asn, j, running):
+        """
+        Simulates an advertisement subslot in all the running replicas
+        """
+        num_replicas, num_nodes = self.__is_ffd.shape
+        ssn = self.__ssn[adv_subslot_idx] if self.__ssn is not None else 0
+
+        # the advertisers that transmit in the subslot
+        tx = self.__joined & (self.__cell_subslot == adv_subslot_idx)
+        if self.__enhanced:
+            tx[numpy.arange(num_replicas), self.__pc_idx] = True
+        tx &= running[:, None]
+        self.__EB_tx_counter += tx
+
+        # the (advertiser, unjoined node) pairs of the running replicas
+        adv_replica, adv_node = numpy.nonzero(tx)
+        if len(adv_replica) == 0:
+            return
+
+        pair_adv, pair_node = numpy.nonzero(~self.__joined[adv_replica])
+        if len(pair_adv) == 0:
+            return
+
+        pair_replica = adv_replica[pair_adv]
+        pair_advertiser = adv_node[pair_adv]
+
+        # the perfect start transmission time of the subslot in each replica
+        tx_time_ns = (self.__slot_0_start_time_ns + asn * self.__timeslot_length_ns + j * self.__subslot_length_ns
+                      + self.__tx_offset_ns)
+
+        distance = self.__distances[pair_replica, pair_advertiser, pair_node]
+        mobile = self.__is_mobile[pair_replica, pair_node]
+        if mobile.any():
+            distance[mobile] = self.__mobile_distances(pair_replica[mobile], pair_advertiser[mobile],
+                                                       pair_node[mobile], tx_time_ns)
+
+        # The pairs (and the advertisers and the listeners below) are ordered by replica, and the random values of each
+        # replica are drawn from its own generator
+        rx_power = (mean_rx_power(self.__tx_power[pair_replica, pair_advertiser], distance)
+                    + self.__draw(pair_replica, shadowing))
+
+        # Keep only the pairs where the transmitted signal can be perceived by the node
+        perceived = numpy.flatnonzero(rx_power >= self.__radio_sensitivity[pair_replica, pair_node])
+        if len(perceived) == 0:
+            return
+
+        # the tx start time of an advertiser is common to all the nodes that receive its EB. It is drawn only in the
+        # replicas where an EB is perceived
+        perceiving = numpy.zeros(num_replicas, dtype=bool)
+        perceiving[pair_replica[perceived]] = True
+        drawn = perceiving[adv_replica]
+        tx_start_time = (tx_time_ns * 1e-9)[adv_replica]
+        tx_start_time[drawn] += self.__draw(adv_replica[drawn],
+                                            lambda rng, size: rng.uniform(-self.__macd, self.__macd, size))
+
+        pair_adv, pair_replica, pair_advertiser, pair_node = (pair_adv[perceived], pair_replica[perceived],
+                                                              pair_advertiser[perceived], pair_node[perceived])
+        distance, rx_power = distance[perceived], rx_power[perceived]
+
+        # We consider the minimum possible propagation delay (see JoiningPhaseSimulator)
+        rx_start_time = tx_start_time[pair_adv] + numpy.floor(distance * 10 / 3) * 1e-9
+        ch_offset = self.__cell_ch_offset[pair_replica, pair_advertiser]
+
+        # the clock drift of each joining node that can receive an EB
+        listener = pair_replica * num_nodes + pair_node
+        listeners, listener_idx = numpy.unique(listener, return_inverse=True)
+        clock_drift = self.__draw(listeners // num_nodes, lambda rng, size: rng.uniform(-_MAX_CLOCK_DRIFT,
+                                                                                        _MAX_CLOCK_DRIFT, size))
+        clock_drift = clock_drift[listener_idx]
+
+        # Check, for each EB, if the node is active when the EB arrives, if the remaining time in its current scanning
+        # period is enough to receive the EB, and if it listens to the channel of the EB
+        eb_local_arrival_time = rx_start_time + rx_start_time * clock_drift
+        scanning_period = self.__scan_duration + self.__channel_switching_time[pair_replica, pair_node]
+        time_since_scan_start = eb_local_arrival_time - self.__boot_time[pair_replica, pair_node]
+        listening_channel = (time_since_scan_start // scanning_period) % self.__num_channels
+        listened = ((self.__boot_time[pair_replica, pair_node] <= rx_start_time)
+                    & (self.__scan_duration > time_since_scan_start % scanning_period + self.__t_eb)
+                    & (listening_channel == (asn + ssn + ch_offset) % self.__num_channels))
+        if not listened.any():
+            return
+
+        # the capture effect is checked only for the nodes that listened to at least one EB
+        order = numpy.argsort(listener_idx, kind="stable")
+        bounds = numpy.searchsorted(listener_idx[order], numpy.arange(len(listeners) + 1))
+        new_joined = []
+        for idx in numpy.unique(listener_idx[listened]).tolist():
+            ebs = order[bounds[idx]:bounds[idx + 1]]
+            if len(ebs) == 1 or captures_eb(rx_start_time[ebs].tolist(), rx_power[ebs].tolist(),
+                                             ch_offset[ebs].tolist(), listened[ebs].tolist(), self.__t_eb,
+                                             self.__shr_duration):
+                new_joined.append(listeners[idx])
+
+        if len(new_joined) == 0:
+            return
+
+        replica, node = numpy.divmod(numpy.array(new_joined), num_nodes)
+        self.__joined[replica, node] = True
+        self.__sync_asn[replica, node] = numpy.where(self.__sync_asn[replica, node] < 0, asn,
+                                                     self.__sync_asn[replica, node])
+        self.__EB_tx_counter[replica, node] = 0
+
+        if self.__scheduling_method is EBSchedulingMethod.Minimal6TiSCH:
+            # the new advertisers start transmitting EBs in a random slotframe (see JoiningPhaseSimulator)
+            ffd = self.__is_ffd[replica, node]
+            self.__cell_subslot[replica[ffd], node[ffd]] = self.__draw(
+                replica[ffd], lambda rng, size: rng.integers(0, self.__num_adv_slots_in_ms, size))
+
+        formed = running & self.__joined.all(axis=1)
+        self.__formation_asn[formed] = asn
+        self.__formation_time_ns[formed] = (self.__slot_0_start_time_ns[formed] + asn * self.__timeslot_length_ns
+                                            + (j + 1) * self.__subslot_length_ns)
+        running &= ~formed
+
+    def __mobile_distances(self, replicas, advertisers, nodes, tx_time_ns):
+        """
+        Computes the distances between the advertisers and the mobile nodes at the transmission time of the subslot
+        """
+        positions = {}
+        for replica, node in set(zip(replicas.tolist(), nodes.tolist())):
+            # The update of the node group time is necessary for the mobility simulation of the nodes
+            self.__node_groups[replica]._NodeGroup__time = Duration(int(tx_time_ns[replica]), unit="ns")
+            positions[replica, node] = self.__nodes[replica][node].position
+
+        node_positions = numpy.array([positions[key] for key in zip(replicas.tolist(), nodes.tolist())])
+        advertiser_positions = self.__positions[replicas, advertisers]
+        return numpy.hypot(node_positions[:, 0] - advertiser_positions[:, 0],
+                           node_positions[:, 1] - advertiser_positions[:, 1])
+
+    def __unreachable_nodes(self):
+        """
+        The reachability check of JoiningPhaseSimulator, for all the replicas: a node is reachable if it is in the max
+        range of the PAN coordinator or of a reachable FFD. The mobile nodes are considered reachable.
+        :return: a (replica, node) mask of the unreachable nodes
+        :rtype: numpy.ndarray
+        """
+        num_replicas = len(self.__nodes)
+        links = ((self.__distances <= max_range(self.__tx_power[:, :, None], self.__radio_sensitivity[:, None, :]))
+                 & self.__is_ffd[:, :, None] & ~self.__is_mobile[:, :, None])
+
+        reached = self.__is_mobile.copy()
+        reached[numpy.arange(num_replicas), self.__pc_idx] = True
+        while True:
+            newly_reached = (reached[:, :, None] & links).any(axis=1) & ~reached
+            if not newly_reached.any():
+                return ~reached
+            reached |= newly_reached
+
+    def __energy_per_node(self):
+        """
+        :return: the (replica, node) array of the energy consumption of the nodes of the formed replicas, as in
+        JoiningPhaseSimulator.energy_breakdown (0 for the nodes that are not accounted)
+        :rtype: numpy.ndarray
+        """
+        profile = self.__radio_profile
+        slot_duration = self.__timeslot_length_ns * 1e-9
+        accounted = self.__accounted()
+
+        sync = numpy.where(accounted, self.__sync_asn * slot_duration * profile.rx_current * profile.voltage, 0)
+        eb_tx = numpy.where(accounted, self.__EB_tx_counter * self.__t_eb * profile.tx_current * profile.voltage, 0)
+        idle_slots = self.__formation_asn[:, None] - self.__sync_asn - self.__EB_tx_counter
+        idle = numpy.where(accounted, idle_slots * slot_duration * profile.idle_current * profile.voltage, 0)
+        return sync + eb_tx + idle
+
+    def __accounted(self):
+        accounted = numpy.ones(self.__is_ffd.shape, dtype=bool)
+        if self.__enhanced:
+            # in this case we assume that the pan coordinator has no energy limitations
+            accounted[numpy.arange(len(self.__nodes)), self.__pc_idx] = False
+        return accounted
+
+    def energy_breakdowns(self):
+        """
+        :return: for each replica, the energy consumption of the nodes as returned by
+        JoiningPhaseSimulator.energy_breakdown, or None if the sample of the replica is censored or its nodes are
+        unreachable
+        :rtype: list[ieee802154.tsch.joining_phase_simulator.EnergyBreakdown | None]
+        :raise RuntimeError: if the execute function has not been called
+        """
+        if self.__results is None:
+            raise RuntimeError("The networks have not been formed. The execute function must be called first")
+
+        profile = self.__radio_profile
+        slot_duration = self.__timeslot_length_ns * 1e-9
+        accounted = self.__accounted()
+
+        breakdowns = []
+        for replica, result in enumerate(self.__results):
+            if isinstance(result, SimulationNotCompleted):
+                breakdowns.append(None)
+                continue
+
+            mask = accounted[replica]
+            sync_asn = self.__sync_asn[replica, mask]
+            eb_tx_counter = self.__EB_tx_counter[replica, mask]
+            idle_slots = self.__formation_asn[replica] - sync_asn - eb_tx_counter
+            breakdowns.append(EnergyBreakdown(
+                [node for node, is_accounted in zip(self.__nodes[replica], mask.tolist()) if is_accounted],
+                sync_asn * slot_duration * profile.rx_current * profile.voltage,
+                eb_tx_counter * self.__t_eb * profile.tx_current * profile.voltage,
+                idle_slots * slot_duration * profile.idle_current * profile.voltage,
+                numpy.zeros(len(sync_asn))
+            ))
+
+        return breakdowns
@@ -1,16 +1,26 @@
+import functools
+import hashlib
 import math
 import random
+import time
 import warnings
 from bisect import bisect_left
 from collections import deque
 from enum import Enum
 
-import netaddr
-from pandas import Timedelta
+import numpy
 
+from ieee802154.duration import Duration, as_duration
 from ieee802154.node import NodeType
 from ieee802154.node_group import NodeGroup
+from ieee802154.radio_profile import ZOLERTIA_RE_MOTE
 from ieee802154.tsch.timeslot_template import TimeslotTemplate
+from ieee802154.tsch.trace_recorder import TraceEventKind
+
+# The version of the format of the states that are saved by JoiningPhaseSimulator.save_state. It must be incremented
+# when a field is added or removed or its meaning changes (e.g. the sentinel values of the EB counters), so that the
+# states of an earlier version are rejected by load_state
+STATE_FORMAT = 2
 
 
 class EBSchedulingMethod(Enum):
@@ -33,49 +43,204 @@ class NotValidJoiningPhaseSimulatorConfig(Exception):
     pass
 
 
-class JoiningPhaseSimulator:
-    def __init__(self, node_group, scheduling_method, timeslot_template, slotframe_length, eb_length, num_channels,
-                 scan_duration, ebi, atp_enabled=False):
+class SimulationNotCompleted(Exception):
+    """
+    The base class of the exceptions that are raised when the network formation or a rejoining attempt cannot be
+    simulated to completion, so the corresponding sample has no value.
+    """
+    pass
+
+
+class SimulationHorizonExceeded(SimulationNotCompleted):
+    """
+    Raised when the network formation or a rejoining attempt does not complete within the horizon of the simulator. The
+    corresponding sample is censored: its value is only known to be greater than the horizon.
+    """
+    pass
+
+
+class UnreachableNodes(SimulationNotCompleted):
+    """
+    Raised when some nodes cannot receive the EBs of any advertiser that may join the network, even with the max
+    shadowing gain of the path loss model. In this case, the simulation would never complete, and the corresponding
+    sample is not censored but undefined: the topology is not connected, whatever the horizon.
+    """
+
+    def __init__(self, nodes):
         """
-        :param node_group: the group of nodes on which the simulation will be run. In the current version of the code,
-        the configuration of the node group must be done before the use of JoiningPhaseSimulator object and must not be
-        changed until the use of the object is completed
-        :type node_group: ieee802154.node_group.NodeGroup
-        :param scheduling_method: the method to be used for the scheduling of EBs
-        :type scheduling_method: EBSchedulingMethod
-        :param timeslot_template: the timeslot template that will be used by the network
-        :type timeslot_template: ieee802154.tsch.timeslot_template.TimeslotTemplate
-        :param slotframe_length: the number of slots in the slotframe
-        :type slotframe_length: int
-        :param eb_length: the EB length (without the physical layer overhead), in bytes
-        :type eb_length: int
-        :param num_channels: the number of channels that will be used for the advertisement of the network
-        :type num_channels: int
-        :param scan_duration: the time that a joining node stays on a channel to find an EB
-        :type scan_duration: pandas.Timedelta
-        :param ebi: the Enhanced Beacon Interval; the interval between two consecutive EB transmissions of an advertiser,
-        expressed in slotframes. It is identical to the multi-slotframe structure length.
-        :type ebi: int
-        :param atp_enabled: a boolean value indicates whether or not ATP(Advertisement Slot Partitioning) will be used
-        :type atp_enabled: bool
-        :raise NotValidJoiningPhaseSimulatorConfig: if the provided arguments are not valid
+        :param nodes: the unreachable nodes
+        :type nodes: list[ieee802154.node.Node]
         """
+        super().__init__("{} node(s) cannot be reached by the advertisers of the network".format(len(nodes)))
+        self.nodes = nodes
 
-        self.__node_group = node_group
-        self.__scheduling_method = scheduling_method
-        self.__timeslot_template = timeslot_template
-        self.__slotframe_length = slotframe_length
-        self.__eb_length = eb_length  # in bytes
-        self.__num_channels = num_channels
-        self.__scan_duration = scan_duration
-        self.__ebi = ebi
-        self.__atp_enabled = atp_enabled
 
-        self.__check_arguments()
+class JoinEvent:
+    """
+    The (re)joining of a node to the network, i.e. the reception of its first EB.
+    """
+
+    def __init__(self, node, asn, time, advertiser, allocated_cell):
+        """
+        :param node: the node that joined the network
+        :type node: ieee802154.node.Node
+        :param asn: the asn of the advertisement (sub)slot in which the node received the EB
+        :type asn: int
+        :param time: the end time of the advertisement (sub)slot in which the node received the EB
+        :type time: ieee802154.duration.Duration
+        :param advertiser: the advertiser whose EB was captured by the node
+        :type advertiser: ieee802154.node.Node
+        :param allocated_cell: the advertisement cell (the index of the advertisement subslot in the multi-slotframe and
+        the channel offset) that the node allocated for its EBs when it joined. It is None for the RFDs and, in the
+        cases of ECV and ECH, where the cell is allocated after sensing
+        :type allocated_cell: (int, int) | None
+        """
+        self.node = node
+        self.asn = asn
+        self.time = time
+        self.advertiser = advertiser
+        self.allocated_cell = allocated_cell
+
+    def __repr__(self):
+        return "JoinEvent(node={}, asn={}, time={}, advertiser={}, allocated_cell={})".format(
+            self.node.id, self.asn, self.time, self.advertiser.id, self.allocated_cell)
+
+
+class EnergyBreakdown:
+    """
+    The energy consumption of the nodes until all the nodes have been synchronized to the network, in joules, broken
+    down per node and per radio activity. Each attribute is an array with one element per accounted node.
+    """
+
+    def __init__(self, nodes, sync, eb_tx, idle, sensing):
+        """
+        :param nodes: the accounted nodes, in the order of the node group. In the cases of ECV, ECH, ECFAS and
+        EMAC-based AS the PAN coordinator is not included, since it is assumed that it has no energy limitations
+        :type nodes: list[ieee802154.node.Node]
+        :param sync: the energy consumed for listening until the synchronization to the network
+        :type sync: numpy.ndarray
+        :param eb_tx: the energy consumed for EB transmissions
+        :type eb_tx: numpy.ndarray
+        :param idle: the energy consumed in the idle slots
+        :type idle: numpy.ndarray
+        :param sensing: the energy consumed for the sensing of advertisement cells (only in the cases of ECV and ECH)
+        :type sensing: numpy.ndarray
+        """
+        self.nodes = nodes
+        self.sync = sync
+        self.eb_tx = eb_tx
+        self.idle = idle
+        self.sensing = sensing
+
+    @property
+    def total(self):
+        """
+        :return: the energy consumption of each node
+        :rtype: numpy.ndarray
+        """
+        return self.sync + self.eb_tx + self.idle + self.sensing
+
+
+class SimulatorStats:
+    """
+    Counters of the hot paths of a simulator and the cumulative wall-clock time of its phases, since the creation of the
+    simulator (see the parameter collect_stats of JoiningPhaseSimulator). The stats of several simulators can be added
+    together with the operator +=.
+    """
+
+    COUNTERS = ("multislotframes", "subslots", "candidate_ebs", "rx_power_calls", "mobile_distances",
+                "capture_resolutions", "joins", "sensing_checks")
+    PHASES = ("formation", "rejoining", "sensing", "reception", "capture")
+
+    def __init__(self):
+        self.multislotframes = 0  # the multi-slotframes that were entered
+        self.subslots = 0  # the advertisement (sub)slots that were simulated
+        self.candidate_ebs = 0  # the EBs that reached an unjoined node and were evaluated for capture
+        self.rx_power_calls = 0  # the calculations of a received signal power (reception and sensing)
+        self.mobile_distances = 0  # the distances between an unjoined node and an advertiser that involve mobile nodes
+        self.capture_resolutions = 0  # the calls of the capture model
+        self.joins = 0  # the nodes that joined the network
+        self.sensing_checks = 0  # the advertisement cells that were sensed by the new advertisers of ECV and ECH
+        self.phase_time = dict.fromkeys(self.PHASES, 0.0)  # in seconds
+
+    def __iadd__(self, other):
+        for counter in self.COUNTERS:
+            setattr(self, counter, getattr(self, counter) + getattr(other, counter))
+        for phase in self.PHASES:
+            self.phase_time[phase] += other.phase_time[phase]
+
+        return self
+
+    def as_dict(self):
+        """
+        :return: the counters and the phase times (with the prefix "time_"), by name
+        :rtype: dict[str, int | float]
+        """
+        stats = {counter: getattr(self, counter) for counter in self.COUNTERS}
+        stats.update(("time_" + phase, seconds) for phase, seconds in self.phase_time.items())
+        return stats
+
+    def __repr__(self):
+        return "SimulatorStats({})".format(", ".join("{}={}".format(k, v) for k, v in self.as_dict().items()))
+
+
+def sax(mac_addr):  # https://bitbucket.org/6tisch/simulator/src/master/SimEngine/Mote/sf.py
+    """
+    :param mac_addr: the mac address of a node
+    :type mac_addr: str
+    :return: the 16-bit SAX hash of the mac address, which is used by the MAC-based advertisement scheduling
+    :rtype: int
+    """
+    LEFT_SHIFT_NUM = 5
+    RIGHT_SHIFT_NUM = 2
+
+    octets = mac_addr.replace(":", "-").split("-")
+    if len(octets) != 6:
+        raise ValueError("{} is not an EUI-48 address".format(mac_addr))
+
+    # assuming v (seed) is 0
+    hash_value = 0
+    for octet in octets:
+        # each word of the address is an octet, so it is hashed as the bytes (0, octet) (i.e. divmod(word, 0x100))
+        for byte in (0, int(octet, 16)):
+            left_shifted = (hash_value << LEFT_SHIFT_NUM)
+            right_shifted = (hash_value >> RIGHT_SHIFT_NUM)
+            hash_value ^= left_shifted + right_shifted + byte
+
+    # assuming T (table size) is 16-bit
+    return hash_value & 0xFFFF
+
+
+class ScheduleLayout:
+    """
+    The advertisement (sub)slots of a configuration of the simulator: the EB transmission time, the subslots, the
+    positions of the advertisement slots in the multi-slotframe and the ssn. They depend only on the configuration, not
+    on the topology, so a layout is immutable and hashable, and it is shared by all the simulators of the same
+    configuration (see the function schedule_layout).
+    """
+
+    __slots__ = ("__key", "__t_eb", "__subslot_length", "__subslots_per_adv_slot", "__num_slots_in_ms",
+                 "__adv_slots_pos_in_ms", "__total_adv_subslots_in_ms", "__ssn", "__id_mapped_adv_cells")
+
+    def __init__(self, scheduling_method, timeslot_template, slotframe_length, eb_length, num_channels, ebi,
+                 atp_enabled, data_rate, num_ffds):
+        """
+        The parameters are the same as the ones of JoiningPhaseSimulator, except for the following:
+        :param data_rate: the data rate of the nodes, in bps
+        :type data_rate: int | float
+        :param num_ffds: the number of FFDs of the node group (including the PAN coordinator). It is ignored by ECV, ECH
+        and Minimal6TiSCH, whose advertisement slots do not depend on it
+        :type num_ffds: int | None
+        :raise NotValidJoiningPhaseSimulatorConfig: if the slotframe is too short for a collision-free EB schedule
+        """
+        if scheduling_method in {EBSchedulingMethod.ECV, EBSchedulingMethod.ECH, EBSchedulingMethod.Minimal6TiSCH}:
+            num_ffds = None
+        self.__key = (scheduling_method, timeslot_template, slotframe_length, eb_length, num_channels, ebi,
+                      atp_enabled, data_rate, num_ffds)
 
         # Calculate the transmission time of an EB
         # Include the six bytes of the physical layer overhead
-        self.__t_eb = Timedelta((self.__eb_length * 8 + 48) / node_group.properties.data_rate, unit="s")
+        self.__t_eb = Duration((eb_length * 8 + 48) / data_rate, unit="s")
 
         # Calculate the number of available advertisement (sub)slots per advertisement slot
         # For convenience, when ATP is not enabled, we consider that each advertisement slot consists of one subslot;
@@ -86,105 +251,292 @@ class JoiningPhaseSimulator:
         )
 
         # number of slots in the multi-slotframe
-        self.__num_slots_in_ms = slotframe_length * self.__ebi
+        self.__num_slots_in_ms = slotframe_length * ebi
 
-        if scheduling_method in {EBSchedulingMethod.ECV, EBSchedulingMethod.ECH, EBSchedulingMethod.Minimal6TiSCH}:
+        # With CFAS and ECFAS, the advertisement cells are mapped to the FFDs by their ids (see the function
+        # __check_id_mapping of JoiningPhaseSimulator)
+        self.__id_mapped_adv_cells = None
+
+        if num_ffds is None:  # ECV, ECH and Minimal6TiSCH
             # The positions of the advertisement slots in the multi-slotframe
-            self.__adv_slots_pos_in_ms = [i for i in range(0, self.__num_slots_in_ms, slotframe_length)]
+            self.__adv_slots_pos_in_ms = tuple(range(0, self.__num_slots_in_ms, slotframe_length))
             # In the case of Minimal6TiSCH only the advertisement cell in the channel offset 0 is used
         else:  # (E)CFAS
             # Our implementation of (E)CFAS determines automatically the number of advertisement slots required to
             # support collision-free EB transmissions
             if scheduling_method in {EBSchedulingMethod.CFASV, EBSchedulingMethod.CFASH,
                                      EBSchedulingMethod.MAC_BASED_AS}:
-                num_required_adv_slots = int(
-                    math.ceil(
-                        self.__node_group.num_ffds / (self.__num_channels * self.__ebi * self.__subslots_per_adv_slot))
-                )  # in the slotframe
+                adv_ch_offsets = num_channels
+                adv_ffds = num_ffds
+            else:  # ECFAS - EMAC based AS; the channel offset 0 is used only by the PAN coordinator
+                adv_ch_offsets = num_channels - 1
+                adv_ffds = num_ffds - 1
 
-                if num_required_adv_slots > self.__slotframe_length:
-                    raise NotValidJoiningPhaseSimulatorConfig(
-                        '''The number of slots is less than required to provide collision-free EB transmissions''')
+            num_required_adv_slots = int(
+                math.ceil(adv_ffds / (adv_ch_offsets * ebi * self.__subslots_per_adv_slot))
+            )  # in the slotframe
 
-                total_adv_cells = (
-                        num_required_adv_slots * self.__subslots_per_adv_slot * self.__ebi * self.__num_channels
-                )
+            if num_required_adv_slots > slotframe_length:
+                raise NotValidJoiningPhaseSimulatorConfig(
+                    "The number of slots is less than required to provide collision-free EB transmissions")
 
-                if scheduling_method is not EBSchedulingMethod.MAC_BASED_AS:
-                    temp = set()
-                    for node in self.__node_group:
-                        if node.type is NodeType.FFD:
-                            adv_cell_idx = node.id % total_adv_cells
-                            if adv_cell_idx in temp:
-                                raise NotValidJoiningPhaseSimulatorConfig(
-                                    '''The specified node IDs do not allow for a one-to-one mapping between the nodes and the 
-                                    available advertisement cells. Therefore, the EB schedule cannot be collision-free''')
-                            else:
-                                temp.add(adv_cell_idx)
-
-            else:  # ECFAS - EMAC based AS
-                num_required_adv_slots = int(
-                    math.ceil((self.__node_group.num_ffds - 1) / ((self.__num_channels - 1) *
-                                                                  self.__ebi *
-                                                                  self.__subslots_per_adv_slot))
-                )  # in the slotframe
-
-                if num_required_adv_slots > self.__slotframe_length:
-                    raise NotValidJoiningPhaseSimulatorConfig('''The number of slots is less than required to provide 
-                    collision-free EB transmissions''')
-
-                # the number of advertisement cells excluding those allocated to the PAN coordinator
-                adv_cells_not_for_pan_c = (
-                        num_required_adv_slots * self.__subslots_per_adv_slot * self.__ebi * (self.__num_channels - 1)
+            if scheduling_method not in {EBSchedulingMethod.MAC_BASED_AS, EBSchedulingMethod.EMAC_BASED_AS}:
+                # in the case of ECFAS, the number of advertisement cells excluding those allocated to the PAN
+                # coordinator
+                self.__id_mapped_adv_cells = (
+                        num_required_adv_slots * self.__subslots_per_adv_slot * ebi * adv_ch_offsets
                 )
 
-                if scheduling_method is not EBSchedulingMethod.EMAC_BASED_AS:
-                    temp = set()
-                    for node in self.__node_group:
-                        if node is not self.__node_group.pan_coordinator and node.type is NodeType.FFD:
-                            adv_cell_idx = node.id % adv_cells_not_for_pan_c
-                            if adv_cell_idx in temp:
-                                raise NotValidJoiningPhaseSimulatorConfig('''The specified node IDs do not allow for a 
-                                one-to-one mapping between the nodes and the available advertisement cells. Therefore, the 
-                                EB schedule cannot be collision-free''')
-
-                            else:
-                                temp.add(adv_cell_idx)
-
-            self.__adv_slots_pos_in_ms = [j for i in range(0, self.__num_slots_in_ms, slotframe_length)
-                                          for j in range(i, i + num_required_adv_slots)]
+            self.__adv_slots_pos_in_ms = tuple(j for i in range(0, self.__num_slots_in_ms, slotframe_length)
+                                               for j in range(i, i + num_required_adv_slots))
 
-        self.__num_adv_slots_in_ms = len(self.__adv_slots_pos_in_ms)  # advertisement slots in the multi-slotframe
-
-        # The start time of the first slot is equal to the boot_time of the pan coordinator
-        self.__slot_0_start_time = self.__node_group.pan_coordinator.boot_time
-        self.__node_group._NodeGroup__time = self.__slot_0_start_time
-        self.__total_adv_subslots_in_ms = self.__num_adv_slots_in_ms * self.__subslots_per_adv_slot
-
-        self.__has_the_execute_func_been_called = False
-        self.__warnings()
+        self.__total_adv_subslots_in_ms = len(self.__adv_slots_pos_in_ms) * self.__subslots_per_adv_slot
 
         # We precalculate the serial subslot number (ssn), which the serial number of an advertisement subslot within
         # the slotframe containing it. The ssn is defined only when ATP is practically enabled (i.e. we have more than
         # one subslots per advertisement slot).
         # The calculation of ssn may need to be changed if we use non-consecutive advertisements in the future
+        self.__ssn = None
         if self.__subslots_per_adv_slot > 1:
-            self.__ssn = [
+            ssn = [
                 i for i in range(self.__subslots_per_adv_slot)  # define the ssn for the subslots of the first adv slot
             ]  # The index is the incremental number of a subslot within the multi-slotframe structure
 
-            for i in range(1, self.__num_adv_slots_in_ms):
+            for i in range(1, len(self.__adv_slots_pos_in_ms)):
                 if self.__adv_slots_pos_in_ms[i - 1] // slotframe_length == (
                         self.__adv_slots_pos_in_ms[i] // slotframe_length):
-                    next_ssn = self.__ssn[-1] + 1
+                    next_ssn = ssn[-1] + 1
                 else:
                     next_ssn = 0
 
                 for j in range(self.__subslots_per_adv_slot):
-                    self.__ssn.append(next_ssn)
+                    ssn.append(next_ssn)
                     next_ssn += 1
+            self.__ssn = tuple(ssn)
+
+    @property
+    def t_eb(self):
+        """
+        :return: the transmission time of an EB, including the physical layer overhead
+        :rtype: ieee802154.duration.Duration
+        """
+        return self.__t_eb
+
+    @property
+    def subslot_length(self):
+        """
+        :return: the length of an advertisement subslot (the length of the timeslot if ATP is not enabled)
+        :rtype: ieee802154.duration.Duration
+        """
+        return self.__subslot_length
+
+    @property
+    def subslots_per_adv_slot(self):
+        """
+        :return: the number of subslots per advertisement slot (1 if ATP is not enabled)
+        :rtype: int
+        """
+        return self.__subslots_per_adv_slot
+
+    @property
+    def num_slots_in_ms(self):
+        """
+        :return: the number of slots in the multi-slotframe
+        :rtype: int
+        """
+        return self.__num_slots_in_ms
+
+    @property
+    def adv_slots_pos_in_ms(self):
+        """
+        :return: the positions of the advertisement slots in the multi-slotframe, in ascending order
+        :rtype: tuple[int]
+        """
+        return self.__adv_slots_pos_in_ms
+
+    @property
+    def num_adv_slots_in_ms(self):
+        """
+        :return: the number of advertisement slots in the multi-slotframe
+        :rtype: int
+        """
+        return len(self.__adv_slots_pos_in_ms)
+
+    @property
+    def total_adv_subslots_in_ms(self):
+        """
+        :return: the number of advertisement subslots in the multi-slotframe
+        :rtype: int
+        """
+        return self.__total_adv_subslots_in_ms
+
+    @property
+    def ssn(self):
+        """
+        :return: the ssn of each advertisement subslot of the multi-slotframe, or None if there is one subslot per
+        advertisement slot
+        :rtype: tuple[int] | None
+        """
+        return self.__ssn
+
+    @property
+    def id_mapped_adv_cells(self):
+        """
+        :return: the number of advertisement cells that are mapped to the FFDs by their ids (excluding the cells of the
+        PAN coordinator in the case of ECFAS), or None if the scheduling method is not CFAS or ECFAS
+        :rtype: int | None
+        """
+        return self.__id_mapped_adv_cells
+
+    def __eq__(self, other):
+        if not isinstance(other, ScheduleLayout):
+            return NotImplemented
+        return self.__key == other.__key
+
+    def __hash__(self):
+        return hash(self.__key)
+
+    def __repr__(self):
+        return "ScheduleLayout(scheduling_method={}, adv_slots_pos_in_ms={}, subslots_per_adv_slot={})".format(
+            self.__key[0].name, self.__adv_slots_pos_in_ms, self.__subslots_per_adv_slot)
+
+
+_cached_schedule_layout = functools.lru_cache(maxsize=128)(ScheduleLayout)
+
+
+def schedule_layout(scheduling_method, timeslot_template, slotframe_length, eb_length, num_channels, ebi, atp_enabled,
+                    data_rate, num_ffds):
+    """
+    Returns the layout of a configuration from a process-wide LRU cache, so that the simulators of the same
+    configuration (e.g. the simulators of the topology samples of a sweep point) compute it once. The timeslot template
+    is compared by identity. The parameters are the ones of ScheduleLayout.
+    :rtype: ScheduleLayout
+    :raise NotValidJoiningPhaseSimulatorConfig: if the slotframe is too short for a collision-free EB schedule
+    """
+    if scheduling_method in {EBSchedulingMethod.ECV, EBSchedulingMethod.ECH, EBSchedulingMethod.Minimal6TiSCH}:
+        num_ffds = None  # one layout for all the sizes of the node group
+    return _cached_schedule_layout(scheduling_method, timeslot_template, slotframe_length, eb_length, num_channels,
+                                   ebi, atp_enabled, data_rate, num_ffds)
+
+
+class JoiningPhaseSimulator:
+    def __init__(self, node_group, scheduling_method, timeslot_template, slotframe_length, eb_length, num_channels,
+                 scan_duration, ebi, atp_enabled=False, seed=None, horizon=None, radio_profile=ZOLERTIA_RE_MOTE,
+                 collect_stats=False, trace_recorder=None):
+        """
+        :param node_group: the group of nodes on which the simulation will be run. In the current version of the code,
+        the configuration of the node group must be done before the use of JoiningPhaseSimulator object and must not be
+        changed until the use of the object is completed, except by NodeGroup.reset followed by the function reset
+        :type node_group: ieee802154.node_group.NodeGroup
+        :param scheduling_method: the method to be used for the scheduling of EBs
+        :type scheduling_method: EBSchedulingMethod
+        :param timeslot_template: the timeslot template that will be used by the network
+        :type timeslot_template: ieee802154.tsch.timeslot_template.TimeslotTemplate
+        :param slotframe_length: the number of slots in the slotframe
+        :type slotframe_length: int
+        :param eb_length: the EB length (without the physical layer overhead), in bytes
+        :type eb_length: int
+        :param num_channels: the number of channels that will be used for the advertisement of the network
+        :type num_channels: int
+        :param scan_duration: the time that a joining node stays on a channel to find an EB
+        :type scan_duration: ieee802154.duration.Duration | datetime.timedelta
+        :param ebi: the Enhanced Beacon Interval; the interval between two consecutive EB transmissions of an advertiser,
+        expressed in slotframes. It is identical to the multi-slotframe structure length.
+        :type ebi: int
+        :param atp_enabled: a boolean value indicates whether or not ATP(Advertisement Slot Partitioning) will be used
+        :type atp_enabled: bool
+        :param seed: the seed of the random generator of the simulator. If it is None, the generator is seeded from the
+        system randomness source
+        :type seed: int | None
+        :param horizon: the max simulated duration of the network formation and of each rejoining attempt. If it is
+        exceeded, a SimulationHorizonExceeded exception is raised. If it is None, the simulation is not bounded
+        :type horizon: ieee802154.duration.Duration | datetime.timedelta | None
+        :param radio_profile: the current consumption of the radios of the nodes, for the energy calculations
+        :type radio_profile: ieee802154.radio_profile.RadioCurrentProfile
+        :param collect_stats: determines if the counters of the hot paths and the time of the simulation phases are
+        collected (see the property stats). When it is False, the instrumentation has a negligible cost
+        :type collect_stats: bool
+        :param trace_recorder: a recorder of the events of the simulation (EB transmissions, candidate EB receptions,
+        capture outcomes, joins and advertisement cell allocations). If it is None, the events are not recorded
+        :type trace_recorder: ieee802154.tsch.trace_recorder.TraceRecorder | None
+        :raise NotValidJoiningPhaseSimulatorConfig: if the provided arguments are not valid
+        """
+
+        self.__node_group = node_group
+        self.__scheduling_method = scheduling_method
+        self.__timeslot_template = timeslot_template
+        self.__slotframe_length = slotframe_length
+        self.__eb_length = eb_length  # in bytes
+        self.__num_channels = num_channels
+        self.__scan_duration = as_duration(scan_duration)
+        self.__ebi = ebi
+        self.__atp_enabled = atp_enabled
+        self.__horizon = as_duration(horizon)
+        self.__radio_profile = radio_profile
+
+        self.__check_arguments()
+
+        # The per node state of the simulation is kept in arrays, indexed by the position of the node in the group
+        self.__nodes = list(node_group)
+        self.__node_idx = {node: idx for idx, node in enumerate(self.__nodes)}
+
+        # The advertisement (sub)slots depend only on the configuration, so they are computed once per configuration and
+        # shared by all its simulators. They are also kept in attributes of the simulator for the hot paths
+        self.__layout = schedule_layout(scheduling_method, timeslot_template, slotframe_length, eb_length, num_channels,
+                                        ebi, atp_enabled, node_group.properties.data_rate, node_group.num_ffds)
+        self.__t_eb = self.__layout.t_eb
+        self.__subslot_length = self.__layout.subslot_length
+        self.__subslots_per_adv_slot = self.__layout.subslots_per_adv_slot
+        self.__num_slots_in_ms = self.__layout.num_slots_in_ms
+        self.__adv_slots_pos_in_ms = self.__layout.adv_slots_pos_in_ms
+        self.__num_adv_slots_in_ms = self.__layout.num_adv_slots_in_ms  # advertisement slots in the multi-slotframe
+        self.__total_adv_subslots_in_ms = self.__layout.total_adv_subslots_in_ms
+        self.__ssn = self.__layout.ssn
+        self.__id_mapped_adv_cells = self.__layout.id_mapped_adv_cells
+
+        self.__num_ffds = self.__node_group.num_ffds
+        self.__check_id_mapping()
+
+        # The start time of the first slot is equal to the boot_time of the pan coordinator
+        self.__slot_0_start_time = self.__node_group.pan_coordinator.boot_time
+        self.__node_group._NodeGroup__time = self.__slot_0_start_time
 
-        self.__randgen = random.Random()
+        self.__has_the_execute_func_been_called = False
+        self.__warnings()
+
+        self.__randgen = random.Random(seed)
+        self.__stats = SimulatorStats() if collect_stats else None
+        self.__trace_recorder = trace_recorder
+        self.__trace_asn = 0  # the asn of the traced cell allocations
+
+        # the horizon expressed in slots
+        self.__horizon_slots = (None if self.__horizon is None else
+                                math.ceil(self.__horizon / self.__timeslot_template.mac_ts_timeslot_length))
+
+    def reset(self, seed=None):
+        """
+        Prepares the simulator for a new topology sample of its node group, after the positions, the boot times or the
+        ids of the nodes have been replaced (see NodeGroup.reset). The configuration and everything that is derived
+        from it (e.g. the advertisement slots of the multi-slotframe and the ssn) are kept, so the simulator is
+        identical to a new simulator of the group with the same arguments and seed. The stats are also reset.
+        :param seed: the new seed of the random generator of the simulator (see the constructor)
+        :type seed: int | None
+        :raise NotValidJoiningPhaseSimulatorConfig: if nodes have been added to the group, or if the new ids do not
+        allow for a collision-free EB schedule
+        """
+        if self.__node_group.size != len(self.__nodes) or self.__node_group.num_ffds != self.__num_ffds:
+            raise NotValidJoiningPhaseSimulatorConfig(
+                "The nodes of the node group have changed. A new simulator must be created for the group")
+        self.__check_id_mapping()
+
+        self.__slot_0_start_time = self.__node_group.pan_coordinator.boot_time
+        self.__node_group._NodeGroup__time = self.__slot_0_start_time
+        self.__has_the_execute_func_been_called = False
+
+        self.__randgen.seed(seed)
+        if self.__stats is not None:
+            self.__stats = SimulatorStats()
+        self.__trace_asn = 0
 
     def execute(self):
         """
@@ -192,13 +544,56 @@ class JoiningPhaseSimulator:
         The simulation is repeated at each call of the function
         :return: a tuple containing the time at which all the nodes have synchronized to the network,
         and the sum energy consumption
-        :rtype: (pandas.Timedelta, float)
+        :rtype: (ieee802154.duration.Duration, float)
+        :raise UnreachableNodes: if some nodes cannot be reached by the advertisers, so the network cannot be formed
+        :raise SimulationHorizonExceeded: if the network formation does not complete within the horizon. The network is
+        not formed in this case, so a rejoining attempt calls the function again
         """
+        self.__start_formation()
+        self.__network_formation_time = self.__run_simulation(horizon_asn=self.__horizon_slots, phase="formation")
+        self.__has_the_execute_func_been_called = True
+        energy_consumption = float(self.energy_breakdown().total.sum())
+        return self.__network_formation_time, energy_consumption
+
+    def iter_join_events(self):
+        """
+        Simulates the network formation process lazily: the join events are generated in the order of their occurrence,
+        and the simulation advances only as far as the events are consumed. When the generator is exhausted, the network
+        has been formed exactly as by the execute function (in the cases of ECV and ECH, the new advertisers have also
+        finished sensing). If the iteration is stopped earlier, the network is not considered formed: a rejoining
+        attempt calls the execute function first, and the energy breakdown and the state of the network are not
+        available.
+        :return: an iterator over the join events
+        :rtype: collections.abc.Iterator[JoinEvent]
+        :raise UnreachableNodes: if some nodes cannot be reached by the advertisers, so the network cannot be formed
+        :raise SimulationHorizonExceeded: if the network formation does not complete within the horizon
+        """
+        self.__start_formation()
+        self.__network_formation_time = yield from self.__simulation(horizon_asn=self.__horizon_slots)
+        self.__has_the_execute_func_been_called = True
+
+    def __start_formation(self):
+        """
+        Initializes the state of the simulator for a new network formation. The network is considered formed only when
+        the formation completes, so that a formation that was stopped early (or that exceeded the horizon) is not used
+        by the rejoining attempts or the energy breakdown
+        """
+        self.__has_the_execute_func_been_called = False
+        unreachable_nodes = self.__unreachable_nodes({self.__node_group.pan_coordinator},
+                                                     [node for node in self.__node_group
+                                                      if node is not self.__node_group.pan_coordinator])
+        if len(unreachable_nodes) > 0:
+            raise UnreachableNodes(unreachable_nodes)
+
         # The variable self.__allocated_ch_offset is a structure of nested dictionaries that allows the finding of the
         # channel offset assigned to a FFD node for a specific advertisement (sub)slot
         self.__allocated_ch_offset = {node: dict() for node in self.__node_group if node.type is NodeType.FFD}
+        # The same schedule as a matrix; the element [adv_subslot_idx, node_idx] is True if the node has allocated an
+        # advertisement cell in the (sub)slot
+        self.__tx_cells = numpy.zeros((self.__total_adv_subslots_in_ms, len(self.__nodes)), dtype=bool)
 
         # Make scheduling for the pan coordinator
+        self.__trace_asn = 0
         self.__make_scheduling_for_the_pan_coordinator()
 
         # Initially, the only joined node is the pan coordinator
@@ -206,12 +601,12 @@ class JoiningPhaseSimulator:
         self.__advertisers = {self.__node_group.pan_coordinator}  # joined nodes transmitting EBs
         self.__unjoined_nodes = {node for node in self.__node_group if node is not self.__node_group.pan_coordinator}
 
-        self.__sync_asn = dict()  # node->sync_asn - the asn at the time of synchronization
-        self.__sync_asn[self.__node_group.pan_coordinator] = 0
+        # the asn at the time of synchronization of each node (-1 if the node has not been synchronized yet)
+        self.__sync_asn = numpy.full(len(self.__nodes), -1, dtype=numpy.int64)
+        self.__sync_asn[self.__node_idx[self.__node_group.pan_coordinator]] = 0
 
-        # a counter for the number of EBs that an advertiser has sent
-        self.__EB_tx_counter = dict()
-        self.__EB_tx_counter[self.__node_group.pan_coordinator] = 0
+        # a counter for the number of EBs that an advertiser has sent (0 for the nodes that are not advertisers)
+        self.__EB_tx_counter = numpy.zeros(len(self.__nodes), dtype=numpy.int64)
 
         self.__formation_asn = None  # the asn when all the nodes have been synchronized to the network
 
@@ -227,15 +622,10 @@ class JoiningPhaseSimulator:
                 for ch_offset in range(1, self.__num_channels)
             }
 
-            # the number of slots that an advertiser senses in order to find a (seemingly) free advertisement cell
-            self.__num_slots_sensed = {node: 0 for node in self.__node_group if node.type is NodeType.FFD}
+        # the number of slots that an advertiser senses in order to find a (seemingly) free advertisement cell
+        self.__num_slots_sensed = numpy.zeros(len(self.__nodes), dtype=numpy.int64)
 
         self.__multislotframe_idx = 0
-        self.__has_the_execute_func_been_called = True
-
-        total_time = self.__run_simulation()
-        energy_consumption = self.__total_energy_consumption()
-        return total_time, energy_consumption
 
     def rejoining_attempt(self, node, start_time_offset):
         """
@@ -245,7 +635,7 @@ class JoiningPhaseSimulator:
         :param node: the node of the group that will disconnect from the network and will attempt to rejoin
         :type node: ieee802154.node.Node
         :param start_time_offset: how much time after the current time the rejoining attempt will start
-        :type start_time_offset: pandas.Timedelta
+        :type start_time_offset: ieee802154.duration.Duration | datetime.timedelta
         :return:
         If the node is RFD (Reduced Functional Device) then it returns only the joining time (the time elapsed between
         the start and the completion of the rejoining attempt).
@@ -254,29 +644,38 @@ class JoiningPhaseSimulator:
         In cases of ECV and ECH, it returns a tuple consisting in order of the following elements: the joining time,
         the time between joining and finding a seemingly free advertisement cell, and the number of advertisement cells
         sensed by the node (after the joining) until it finds a free one
-        :rtype: pandas.Timedelta
+        :rtype: ieee802154.duration.Duration
+        :raise UnreachableNodes: if the node cannot be reached by the advertisers of the network
+        :raise SimulationHorizonExceeded: if the rejoining attempt does not complete within the horizon. The node
+        remains disconnected in this case, but the next rejoining attempts (of any node) can be simulated normally
         """
         if not self.__has_the_execute_func_been_called:
             self.execute()
-            self.__has_the_execute_func_been_called = True
 
         # check if the node belongs to the node group
         if node.node_group is not self.__node_group:
             raise ValueError("The specified node does not belong to the node group")
 
         # Remove the node from the joined_nodes and add it to unjoined_nodes.
-        # If the node is FFD, remove all the advertisement cells it has allocated
-        self.__joined_nodes.remove(node)
+        # If the node is FFD, remove all the advertisement cells it has allocated.
+        # Note that, the node is already disconnected if its previous rejoining attempt exceeded the horizon
+        self.__joined_nodes.discard(node)
         self.__advertisers.discard(node)
 
         if node.type is NodeType.FFD:
             self.__allocated_ch_offset[node].clear()
+            self.__tx_cells[:, self.__node_idx[node]] = False
 
         self.__unjoined_nodes.add(node)
 
+        unreachable_nodes = self.__unreachable_nodes(self.__advertisers, [node])
+        if len(unreachable_nodes) > 0:
+            self.__unjoined_nodes.discard(node)  # the node remains disconnected
+            raise UnreachableNodes(unreachable_nodes)
+
         multislotframe_length = self.__num_slots_in_ms * self.__timeslot_template.mac_ts_timeslot_length
 
-        start_time = self.__node_group.time + start_time_offset
+        start_time = self.__node_group.time + as_duration(start_time_offset)
         self.__multislotframe_idx = start_time // multislotframe_length
         time_offset_in_ms = start_time % multislotframe_length
 
@@ -313,7 +712,17 @@ class JoiningPhaseSimulator:
             adv_subslot_idx = adv_slot_idx * self.__subslots_per_adv_slot
 
         self.__scan_start_time[node] = start_time
-        finish_time = self.__run_simulation(adv_subslot_idx)  # the time when the node joined the network
+
+        # the asn is counted as in the calculation of the multi-slotframe index above
+        horizon_asn = (None if self.__horizon_slots is None else
+                       start_time // self.__timeslot_template.mac_ts_timeslot_length + self.__horizon_slots)
+        try:
+            # the time when the node joined the network
+            finish_time = self.__run_simulation(adv_subslot_idx, horizon_asn, "rejoining")
+        except SimulationHorizonExceeded:
+            # the node remains disconnected, and it does not block the rejoining attempts of other nodes
+            self.__unjoined_nodes.discard(node)
+            raise
 
         # If the node is RFD (Reduced Functional Device) then return only the joining time.
         # Otherwise:
@@ -337,7 +746,7 @@ class JoiningPhaseSimulator:
                 )
 
             else:
-                # convert self.__slotframe_length to Timedelta
+                # convert self.__slotframe_length to Duration
                 slotframe_length = self.__slotframe_length * self.__timeslot_template.mac_ts_timeslot_length
                 num_adv_slots_sensed = math.ceil(
                     sensing_period_duration.total_seconds() / slotframe_length.total_seconds()
@@ -345,45 +754,207 @@ class JoiningPhaseSimulator:
 
             return joining_time, eb_scheduling_delay, num_adv_slots_sensed
 
-    def __run_simulation(self, starting_adv_subslot=0):
+    def save_state(self, file):
+        """
+        Saves the state of the network that was formed by the last call of the execute function (EB schedule table,
+        synchronization ASNs, EB counters, formation ASN, sensing results of ECV/ECH, node group time and the state of
+        the random generator) in a compressed NumPy archive. The nodes are referred to by their position in the node
+        group, so the state can be loaded by a simulator of an identically configured node group (see load_state).
+        :param file: the file (or the path of the file) where the state is saved
+        :type file: str | typing.BinaryIO
+        :raise RuntimeError: if the execute function has not been called
+        """
+        if not self.__has_the_execute_func_been_called:
+            raise RuntimeError("The network has not been formed. The execute function must be called first")
+
+        nodes = self.__nodes
+        node_idx = self.__node_idx
+
+        schedule = [(node_idx[node], adv_subslot_idx, ch_offset)
+                    for node, allocations in self.__allocated_ch_offset.items()
+                    for adv_subslot_idx, ch_offset in allocations.items()]
+
+        if self.__scheduling_method in {EBSchedulingMethod.ECV, EBSchedulingMethod.ECH}:
+            sensing_nodes = [(adv_subslot_idx, ch_offset, node_idx[node])
+                             for (adv_subslot_idx, ch_offset), sensing in self.__sensing_nodes.items()
+                             for node in sensing]
+        else:
+            sensing_nodes = []
+
+        version, randgen_state, gauss_next = self.__randgen.getstate()
+
+        numpy.savez_compressed(
+            file,
+            format_version=numpy.int64(STATE_FORMAT),
+            scheduling_method=numpy.array(self.__scheduling_method.name),
+            config_digest=numpy.array(self.config_digest()),
+            node_ids=numpy.array([node.id for node in nodes], dtype=numpy.int64),
+            total_adv_subslots_in_ms=numpy.int64(self.__total_adv_subslots_in_ms),
+            node_group_time=numpy.int64(self.__node_group.time.value),  # in ns
+            network_formation_time=numpy.int64(self.__network_formation_time.value),
+            formation_asn=numpy.int64(self.__formation_asn),
+            multislotframe_idx=numpy.int64(self.__multislotframe_idx),
+            sync_asn=self.__sync_asn,
+            eb_tx_counter=self.__EB_tx_counter,
+            joined=numpy.array([node in self.__joined_nodes for node in nodes]),
+            advertiser=numpy.array([node in self.__advertisers for node in nodes]),
+            scan_start_time=numpy.array([self.__scan_start_time[node].value if node in self.__scan_start_time else -1
+                                         for node in nodes], dtype=numpy.int64),
+            schedule=numpy.array(schedule, dtype=numpy.int64).reshape(-1, 3),
+            num_slots_sensed=self.__num_slots_sensed,
+            sensing_nodes=numpy.array(sensing_nodes, dtype=numpy.int64).reshape(-1, 3),
+            randgen_state=numpy.array((version,) + randgen_state, dtype=numpy.int64),
+            randgen_gauss_next=numpy.float64(numpy.nan if gauss_next is None else gauss_next)
+        )
+
+    def load_state(self, file):
+        """
+        Loads the state of a formed network that was saved by the function save_state, instead of calling the execute
+        function. The node group of the simulator must consist of the same nodes (in the same order and with the same
+        ids, positions, boot times and mac addresses) as the one of the simulator that saved the state, and the
+        configuration of the simulator must be the same (see config_digest). The trajectories of the mobile nodes are
+        not part of the state.
+        :param file: the file (or the path of the file) of the saved state
+        :type file: str | typing.BinaryIO
+        :return: the same tuple as the execute function: the time at which all the nodes have synchronized to the
+        network, and the sum energy consumption
+        :rtype: (ieee802154.duration.Duration, float)
+        :raise NotValidJoiningPhaseSimulatorConfig: if the state was saved by a simulator with a different configuration
+        or in a different format version (see STATE_FORMAT)
+        """
+        nodes = self.__nodes
+
+        with numpy.load(file) as state:
+            format_version = int(state["format_version"]) if "format_version" in state.files else None
+            if format_version != STATE_FORMAT:
+                raise NotValidJoiningPhaseSimulatorConfig(
+                    "The saved state has the format version {}, but the simulator loads the version {}".format(
+                        format_version, STATE_FORMAT))
+            if (str(state["scheduling_method"]) != self.__scheduling_method.name
+                    or int(state["total_adv_subslots_in_ms"]) != self.__total_adv_subslots_in_ms
+                    or state["node_ids"].tolist() != [node.id for node in nodes]
+                    or str(state["config_digest"]) != self.config_digest()):
+                raise NotValidJoiningPhaseSimulatorConfig(
+                    "The saved state does not match the node group or the configuration of the simulator (see the "
+                    "function config_digest)")
+
+            self.__has_the_execute_func_been_called = False  # until the whole state has been loaded
+
+            self.__allocated_ch_offset = {node: dict() for node in nodes if node.type is NodeType.FFD}
+            self.__tx_cells = numpy.zeros((self.__total_adv_subslots_in_ms, len(nodes)), dtype=bool)
+            for idx, adv_subslot_idx, ch_offset in state["schedule"].tolist():
+                self.__set_adv_cell(nodes[idx], adv_subslot_idx, ch_offset)
+
+            self.__joined_nodes = {node for node, joined in zip(nodes, state["joined"].tolist()) if joined}
+            self.__advertisers = {node for node, advertiser in zip(nodes, state["advertiser"].tolist()) if advertiser}
+            self.__unjoined_nodes = {node for node in nodes if node not in self.__joined_nodes}
+
+            self.__sync_asn = state["sync_asn"]
+            self.__EB_tx_counter = state["eb_tx_counter"]
+            self.__num_slots_sensed = state["num_slots_sensed"]
+            self.__formation_asn = int(state["formation_asn"])
+            self.__network_formation_time = Duration(int(state["network_formation_time"]), unit="ns")
+            self.__multislotframe_idx = int(state["multislotframe_idx"])
+            self.__scan_start_time = {node: Duration(start_time, unit="ns")
+                                      for node, start_time in zip(nodes, state["scan_start_time"].tolist())
+                                      if node is not self.__node_group.pan_coordinator}
+
+            if self.__scheduling_method in {EBSchedulingMethod.ECV, EBSchedulingMethod.ECH}:
+                self.__sensing_nodes = {
+                    (adv_subslot_idx, ch_offset): set()
+                    for adv_subslot_idx in range(self.__total_adv_subslots_in_ms)
+                    for ch_offset in range(1, self.__num_channels)
+                }
+                for adv_subslot_idx, ch_offset, idx in state["sensing_nodes"].tolist():
+                    self.__sensing_nodes[adv_subslot_idx, ch_offset].add(nodes[idx])
+
+            randgen_state = state["randgen_state"].tolist()
+            gauss_next = float(state["randgen_gauss_next"])
+            self.__randgen.setstate((randgen_state[0], tuple(randgen_state[1:]),
+                                     None if math.isnan(gauss_next) else gauss_next))
+
+            self.__node_group._NodeGroup__time = Duration(int(state["node_group_time"]), unit="ns")
+
+        self.__has_the_execute_func_been_called = True
+        return self.__network_formation_time, float(self.energy_breakdown().total.sum())
+
+    def __run_simulation(self, starting_adv_subslot=0, horizon_asn=None, phase=None):
+        """
+        Runs the simulation until all the nodes join the network (see the function __simulation), without keeping the
+        join events. If the stats are collected, its duration is added to the time of the given phase
+        :return: the time when the last node joined the network
+        :rtype: ieee802154.duration.Duration
+        """
+        start = time.perf_counter() if self.__stats is not None else None
+        simulation = self.__simulation(starting_adv_subslot, horizon_asn)
+        try:
+            while True:
+                try:
+                    next(simulation)
+                except StopIteration as stop:
+                    return stop.value
+        finally:
+            if start is not None:
+                self.__stats.phase_time[phase] += time.perf_counter() - start
+
+    def __simulation(self, starting_adv_subslot=0, horizon_asn=None):
+        """
+        A generator that simulates the advertisement (sub)slots, starting from the given one of the current
+        multi-slotframe, until all the nodes join the network. It yields a JoinEvent for each node that joins, and it
+        returns the time when the last node joined the network
+        """
         starting_i = starting_adv_subslot // self.__subslots_per_adv_slot  # starting advertisement slot
         starting_j = starting_adv_subslot % self.__subslots_per_adv_slot  # starting subslot in the advertisement slot
         network_formation_time = None
+        stats = self.__stats  # None if the stats are not collected
+        trace = self.__trace_recorder  # None if the events are not recorded
 
         while True:
+            if stats is not None:
+                stats.multislotframes += 1
+
             for i in range(starting_i, self.__num_adv_slots_in_ms):
                 # Calculate the asn of the current advertisement slot.
                 # The asn of a subslot is the asn of the advertisement slot to which belongs.
                 asn = self.__multislotframe_idx * self.__num_slots_in_ms + self.__adv_slots_pos_in_ms[i]
+                if horizon_asn is not None and asn > horizon_asn:
+                    raise SimulationHorizonExceeded(
+                        "The simulation did not complete within the horizon ({})".format(self.__horizon))
+                self.__trace_asn = asn
 
                 for j in range(starting_j, self.__subslots_per_adv_slot):
                     adv_subslot_idx = i * self.__subslots_per_adv_slot + j
                     ssn = self.__ssn[adv_subslot_idx] if self.__subslots_per_adv_slot > 1 else None
+                    if stats is not None:
+                        stats.subslots += 1
 
-                    # update the EB_tx_counter of advertisers
-                    for advertiser in self.__advertisers:
-                        # Check if the advertiser transmits in the current advertisement (sub)slot
-                        if adv_subslot_idx in self.__allocated_ch_offset[advertiser]:
-                            self.__EB_tx_counter[advertiser] += 1
+                    # update the EB_tx_counter of the advertisers that transmit in the current advertisement (sub)slot.
+                    # Note that, only the advertisers have allocated advertisement cells
+                    self.__EB_tx_counter += self.__tx_cells[adv_subslot_idx]
 
                     # execute sensing
                     if self.__scheduling_method in {EBSchedulingMethod.ECV, EBSchedulingMethod.ECH}:
+                        sensing_start = time.perf_counter() if stats is not None else None
                         sensing_nodes_new = dict()
+                        advertisers = self.__in_group_order(self.__advertisers)
 
                         for ch_offset in range(1, self.__num_channels):
                             nodes_sense_ch = self.__sensing_nodes[(adv_subslot_idx, ch_offset)]
                             nodes_sense_ch_busy = set()
 
-                            for node in nodes_sense_ch:
-                                self.__num_slots_sensed[node] += 1
+                            if stats is not None:
+                                stats.sensing_checks += len(nodes_sense_ch)
+
+                            for node in self.__in_group_order(nodes_sense_ch):
+                                self.__num_slots_sensed[self.__node_idx[node]] += 1
 
-                                if self.__is_a_neighbor_transmitting(node, adv_subslot_idx, ch_offset):
+                                if self.__is_a_neighbor_transmitting(node, advertisers, adv_subslot_idx, ch_offset):
                                     nodes_sense_ch_busy.add(node)
 
                             nodes_sense_ch_free = nodes_sense_ch - nodes_sense_ch_busy
 
                             for node in nodes_sense_ch_free:
-                                self.__allocated_ch_offset[node][adv_subslot_idx] = ch_offset
+                                self.__set_adv_cell(node, adv_subslot_idx, ch_offset)
 
                             self.__sensing_nodes[adv_subslot_idx, ch_offset] = set()  # clean
 
@@ -402,18 +973,39 @@ class JoiningPhaseSimulator:
                             else:
                                 # ECV and ECH do not describe what happens if a free advertisement cell is not found
                                 # We assign a random advertisement cell in this case
-                                for node in nodes_sense_ch_busy:
-                                    self.__allocated_ch_offset[node][
-                                        random.randint(0, self.__total_adv_subslots_in_ms - 1)
-                                    ] = random.randint(1, self.__num_channels - 1)
+                                for node in self.__in_group_order(nodes_sense_ch_busy):
+                                    self.__set_adv_cell(node,
+                                                        self.__randgen.randint(0, self.__total_adv_subslots_in_ms - 1),
+                                                        self.__randgen.randint(1, self.__num_channels - 1))
 
                         for key, value in sensing_nodes_new.items():
                             self.__sensing_nodes[key] = value
 
+                        if stats is not None:
+                            stats.phase_time["sensing"] += time.perf_counter() - sensing_start
+
                     new_joined_nodes = set()
                     new_advertisers = set()
+                    join_events = []
                     tx_start_time = {}  # gives the EB transmission start time of a specified advertiser in this subslot
-                    for node in self.__unjoined_nodes:
+
+                    # the advertisers that transmit in the current advertisement (sub)slot
+                    advertisers = [advertiser for advertiser in self.__in_group_order(self.__advertisers)
+                                   if adv_subslot_idx in self.__allocated_ch_offset[advertiser]]
+
+                    if trace is not None:
+                        # the EBs are traced at the nominal transmission start time
+                        nominal_tx_start_time = (self.__slot_0_start_time
+                                                 + asn * self.__timeslot_template.mac_ts_timeslot_length
+                                                 + j * self.__subslot_length
+                                                 + self.__timeslot_template.mac_ts_tx_offset)
+                        for advertiser in advertisers:
+                            trace.record(TraceEventKind.EB_TX, asn, adv_subslot_idx, nominal_tx_start_time.value,
+                                         advertiser.id,
+                                         ch_offset=self.__allocated_ch_offset[advertiser][adv_subslot_idx],
+                                         duration=self.__t_eb.value)
+
+                    for node in self.__in_group_order(self.__unjoined_nodes):
                         current_adv_subslot_start_time = (self.__slot_0_start_time
                                                           + asn * self.__timeslot_template.mac_ts_timeslot_length
                                                           + j * self.__subslot_length)
@@ -428,12 +1020,12 @@ class JoiningPhaseSimulator:
                         )
 
                         candidate_ebs = []  # EBs that can reach the node
+                        if stats is not None:
+                            reception_start = time.perf_counter()
+                            stats.mobile_distances += (len(advertisers) if node.is_mobile else
+                                                       sum(advertiser.is_mobile for advertiser in advertisers))
 
-                        for advertiser in self.__advertisers:
-                            # Check if the advertiser transmits in the current advertisement (sub)slot
-                            if adv_subslot_idx not in self.__allocated_ch_offset[advertiser]:
-                                continue
-
+                        for advertiser in advertisers:
                             rx_signal_power = self.__rx_power(
                                 advertiser.tx_power,
                                 advertiser.distance_from_node(node),
@@ -455,25 +1047,54 @@ class JoiningPhaseSimulator:
 
                             # We consider the minimum possible propagation delay. In fact, in a Wireless Sensor Network
                             # the nodes are quite close and the propagation delay is negligible. We could ignore it.
-                            prop_delay = Timedelta(int(advertiser.distance_from_node(node) * 10 / 3), unit="ns")
+                            prop_delay = Duration(int(advertiser.distance_from_node(node) * 10 / 3), unit="ns")
                             rx_start_time = tx_start_time[advertiser] + prop_delay
                             tx_channel_offset = self.__allocated_ch_offset[advertiser][adv_subslot_idx]
                             candidate_ebs.append({
+                                "advertiser": advertiser,
                                 "rx_start_time": rx_start_time,
                                 "rx_power": rx_signal_power,
                                 "tx_channel_offset": tx_channel_offset
                             })
+                            if trace is not None:
+                                trace.record(TraceEventKind.CANDIDATE_RX, asn, adv_subslot_idx, rx_start_time.value,
+                                             node.id, advertiser.id, tx_channel_offset, rx_signal_power,
+                                             self.__t_eb.value)
+
+                        if stats is not None:
+                            capture_start = time.perf_counter()
+                            stats.phase_time["reception"] += capture_start - reception_start
+                            stats.candidate_ebs += len(candidate_ebs)
 
-                        if len(candidate_ebs) == 0 or self.__captured_eb(node, candidate_ebs, asn, ssn) is None:
+                        if len(candidate_ebs) == 0:
                             continue
 
+                        captured_eb = self.__captured_eb(node, candidate_ebs, asn, ssn)
+                        if stats is not None:
+                            stats.capture_resolutions += 1
+                            stats.phase_time["capture"] += time.perf_counter() - capture_start
+
+                        if trace is not None:
+                            if captured_eb is None:
+                                trace.record(TraceEventKind.CAPTURE_FAILURE, asn, adv_subslot_idx,
+                                             self.__node_group.time.value, node.id)
+                            else:
+                                trace.record(TraceEventKind.CAPTURE, asn, adv_subslot_idx,
+                                             captured_eb["rx_start_time"].value, node.id, captured_eb["advertiser"].id,
+                                             captured_eb["tx_channel_offset"], captured_eb["rx_power"])
+
+                        if captured_eb is None:
+                            continue
+
+                        if stats is not None:
+                            stats.joins += 1
                         new_joined_nodes.add(node)
-                        if self.__sync_asn.get(node) is None:
-                            self.__sync_asn[node] = asn
+                        if self.__sync_asn[self.__node_idx[node]] < 0:
+                            self.__sync_asn[self.__node_idx[node]] = asn
 
                         if node.type is NodeType.FFD:
                             new_advertisers.add(node)
-                            self.__EB_tx_counter[node] = 0
+                            self.__EB_tx_counter[self.__node_idx[node]] = 0
                             if self.__scheduling_method is EBSchedulingMethod.CFASV:
                                 self.__cfasv_allocate_adv_cell(node)
                             elif self.__scheduling_method is EBSchedulingMethod.MAC_BASED_AS:
@@ -491,15 +1112,32 @@ class JoiningPhaseSimulator:
                                 # process, which can be done in any of the slotframes after the EB reception.
                                 # For this reason, herein, we select randomly the slotframe where a new advertiser
                                 # starts transmitting EBs
-                                self.__allocated_ch_offset[node][
-                                    self.__randgen.randint(0, self.__num_adv_slots_in_ms - 1)] = 0
+                                self.__set_adv_cell(node, self.__randgen.randint(0, self.__num_adv_slots_in_ms - 1), 0)
                             else:  # EBSchedulingMethod.ECV or EBSchedulingMethod.ECH
                                 self.__sensing_nodes[(0, 1)].add(node)
 
+                        if trace is not None:
+                            join_time = (self.__slot_0_start_time
+                                         + asn * self.__timeslot_template.mac_ts_timeslot_length
+                                         + (j + 1) * self.__subslot_length)
+                            trace.record(TraceEventKind.JOIN, asn, adv_subslot_idx, join_time.value, node.id,
+                                         captured_eb["advertiser"].id)
+
+                        join_events.append(JoinEvent(
+                            node, asn,
+                            self.__slot_0_start_time + asn * self.__timeslot_template.mac_ts_timeslot_length
+                            + (j + 1) * self.__subslot_length,
+                            captured_eb["advertiser"],
+                            next(iter(self.__allocated_ch_offset[node].items()))
+                            if node.type is NodeType.FFD and len(self.__allocated_ch_offset[node]) > 0 else None
+                        ))
+
                     self.__joined_nodes.update(new_joined_nodes)
                     self.__advertisers.update(new_advertisers)
                     self.__unjoined_nodes.difference_update(new_joined_nodes)
 
+                    yield from join_events
+
                     if len(self.__unjoined_nodes) == 0:
                         if network_formation_time is None:
                             # network_formation_time: the time when the last node joins the network
@@ -529,50 +1167,131 @@ class JoiningPhaseSimulator:
             starting_i = 0
             self.__multislotframe_idx += 1
 
-    def __total_energy_consumption(self):
+    @property
+    def node_group(self):
         """
-        Returns the sum energy consumption of nodes until all the nodes have been synchronized to the network.
-        If no simulation was performed previously, it returns None.
-        :return: the average energy consumption if a simulation has run, otherwise None
-        :rtype: float
+        :return: the group of nodes on which the simulation is run
+        :rtype: ieee802154.node_group.NodeGroup
         """
+        return self.__node_group
 
-        if not self.__has_the_execute_func_been_called:
-            return None
+    @property
+    def schedule_layout(self):
+        """
+        :return: the advertisement (sub)slots of the configuration of the simulator, which are shared by all the
+        simulators of the same configuration
+        :rtype: ScheduleLayout
+        """
+        return self.__layout
 
-        # We use the energy consumption information of Zolertia RE-Mote
-        # https://github.com/Zolertia/Resources/blob/master/RE-Mote/Hardware/Revision%20B/Datasheets/ZOL-RM0x-B%20-%20RE-Mote%20revision%20B%20Datasheet%20v.1.0.0.pdf
-        rx_A = 0.02
-        tx_A = 0.024
-        idle_A = 1.3 / 10 ** 6
-        volts = 3.7
+    @property
+    def stats(self):
+        """
+        :return: the counters of the hot paths and the time of the simulation phases, or None if they are not collected
+        (see the parameter collect_stats)
+        :rtype: SimulatorStats | None
+        """
+        return self.__stats
 
-        sum_ec = 0
-        for node in self.__node_group:
+    @property
+    def formation_asn(self):
+        """
+        :return: the asn at which all the nodes have synchronized to the network, or None if the network has not been
+        formed
+        :rtype: int | None
+        """
+        return self.__formation_asn if self.__has_the_execute_func_been_called else None
 
-            if self.__scheduling_method in {EBSchedulingMethod.ECV, EBSchedulingMethod.ECH, EBSchedulingMethod.ECFASV,
-                                            EBSchedulingMethod.ECFASH,
-                                            EBSchedulingMethod.EMAC_BASED_AS} and node is self.__node_group.pan_coordinator:
-                continue  # in this case we assume that the node has no energy limitations
+    def scan_start_time(self, node):
+        """
+        :param node: a node of the node group, except for the PAN coordinator
+        :type node: ieee802154.node.Node
+        :return: the time at which the node started its last scan for EBs (its boot time, until it scans again)
+        :rtype: ieee802154.duration.Duration
+        """
+        return self.__scan_start_time[node]
 
-            sync_time = self.__sync_asn[node] * self.__timeslot_template.mac_ts_timeslot_length.total_seconds()
-            ec_for_sync = sync_time * rx_A * volts  # joules
+    def captured_eb(self, joining_node, candidate_ebs, asn):
+        """
+        Resolves the capture of an EB by a scanning node among the EBs that it receives in an advertisement (sub)slot,
+        as in the simulation (e.g. for a benchmark of the capture resolution).
+        :param joining_node: the scanning node
+        :type joining_node: ieee802154.node.Node
+        :param candidate_ebs: the received EBs, as dicts with the reception start time (rx_start_time, a Duration), the
+        received power in dBm (rx_power) and the channel offset of the transmission (tx_channel_offset). The list is
+        sorted in place
+        :type candidate_ebs: list[dict]
+        :param asn: the asn of the advertisement (sub)slot
+        :type asn: int
+        :return: the captured EB, or None if no EB is captured
+        :rtype: dict | None
+        """
+        return self.__captured_eb(joining_node, candidate_ebs, asn)
 
-            EB_tx_counter = self.__EB_tx_counter.get(node, 0)  # return 0 if the node is not an advertiser
-            ec_for_EBs = EB_tx_counter * self.__t_eb.total_seconds() * tx_A * volts  # joules
+    def config_digest(self):
+        """
+        Returns a digest of the configuration of the simulator and of its node group, which identifies the networks that
+        it forms: the scheduling configuration, the scan duration, the horizon, the radio profile, the properties of the
+        node group and, for each node, its id, type, mobility, (initial) position, transmission power, radio
+        sensitivity, boot time, channel switching time and mac address. The seed of the simulator is not a component.
+        :return: the hexadecimal SHA-256 digest of the configuration
+        :rtype: str
+        """
+        template = self.__timeslot_template
+        properties = self.__node_group.properties
+        config = (
+            self.__scheduling_method.name,
+            tuple(getattr(template, attr).value for attr in
+                  ("mac_ts_cca_offset", "mac_ts_cca", "mac_ts_rx_tx", "mac_ts_tx_offset", "mac_ts_max_tx",
+                   "mac_ts_rx_offset", "mac_ts_rx_wait", "mac_ts_rx_ack_delay", "mac_ts_tx_ack_delay",
+                   "mac_ts_ack_wait", "mac_ts_max_ack", "mac_ts_timeslot_length")),
+            self.__slotframe_length, self.__eb_length, self.__num_channels, self.__scan_duration.value, self.__ebi,
+            self.__atp_enabled, None if self.__horizon is None else self.__horizon.value, repr(self.__radio_profile),
+            properties.data_rate, tuple(properties.area_dimensions),
+            tuple((node.id, node.type.name, node.is_mobile,
+                   tuple(float(coord) for coord in node._Node__initial_position), node.tx_power,
+                   node.radio_sensitivity, node.boot_time.value, node.channel_switching_time.value, node.mac_address)
+                  for node in self.__nodes)
+        )
+        return hashlib.sha256(repr(config).encode()).hexdigest()
 
-            idle_slots = self.__formation_asn - self.__sync_asn[node] - EB_tx_counter
-            ec_idle = idle_slots * self.__timeslot_template.mac_ts_timeslot_length.total_seconds() * idle_A * volts
+    def energy_breakdown(self):
+        """
+        Returns the energy consumption of the nodes until all the nodes have been synchronized to the network, broken
+        down per node and per radio activity, according to the radio profile of the simulator.
+        :return: the energy consumption of the nodes
+        :rtype: EnergyBreakdown
+        :raise RuntimeError: if the network has not been formed
+        """
+        if not self.__has_the_execute_func_been_called:
+            raise RuntimeError("The network has not been formed. The execute function must be called first")
+
+        if self.__scheduling_method in {EBSchedulingMethod.ECV, EBSchedulingMethod.ECH, EBSchedulingMethod.ECFASV,
+                                        EBSchedulingMethod.ECFASH, EBSchedulingMethod.EMAC_BASED_AS}:
+            # in this case we assume that the pan coordinator has no energy limitations
+            accounted = numpy.array([node is not self.__node_group.pan_coordinator for node in self.__nodes])
+        else:
+            accounted = numpy.ones(len(self.__nodes), dtype=bool)
 
-            sum_ec += ec_for_sync + ec_for_EBs + ec_idle
+        profile = self.__radio_profile
+        slot_duration = self.__timeslot_template.mac_ts_timeslot_length.total_seconds()
+        sync_asn = self.__sync_asn[accounted]
+        eb_tx_counter = self.__EB_tx_counter[accounted]
 
-            if self.__scheduling_method in {EBSchedulingMethod.ECV, EBSchedulingMethod.ECH}:
-                num_slots_sensed = self.__num_slots_sensed.get(node, 0)
-                sensing_time_per_slot = self.__timeslot_template.mac_ts_rx_wait.total_seconds()
-                ec_sensing = num_slots_sensed * sensing_time_per_slot * rx_A * volts
-                sum_ec += ec_sensing
+        sync = sync_asn * slot_duration * profile.rx_current * profile.voltage
+        eb_tx = eb_tx_counter * self.__t_eb.total_seconds() * profile.tx_current * profile.voltage
+        idle_slots = self.__formation_asn - sync_asn - eb_tx_counter
+        idle = idle_slots * slot_duration * profile.idle_current * profile.voltage
 
-        return sum_ec
+        if self.__scheduling_method in {EBSchedulingMethod.ECV, EBSchedulingMethod.ECH}:
+            sensing_time_per_slot = self.__timeslot_template.mac_ts_rx_wait.total_seconds()
+            sensing = (self.__num_slots_sensed[accounted] * sensing_time_per_slot * profile.rx_current *
+                       profile.voltage)
+        else:
+            sensing = numpy.zeros(len(sync_asn))
+
+        return EnergyBreakdown([node for node, is_accounted in zip(self.__nodes, accounted) if is_accounted], sync,
+                               eb_tx, idle, sensing)
 
     def __cfasv_allocate_adv_cell(self, node, enhanced_version=False):
         """
@@ -588,26 +1307,11 @@ class JoiningPhaseSimulator:
         if enhanced_version:
             ch_offset += 1
 
-        self.__allocated_ch_offset[node][adv_subslot_idx] = ch_offset
+        self.__set_adv_cell(node, adv_subslot_idx, ch_offset)
 
     def __mbas_allocate_adv_cell(self, node, enhanced_version=False):
         num_avail_ch_offsets = self.__num_channels if not enhanced_version else self.__num_channels - 1
 
-        def sax(mac_addr):  # https://bitbucket.org/6tisch/simulator/src/master/SimEngine/Mote/sf.py
-            LEFT_SHIFT_NUM = 5
-            RIGHT_SHIFT_NUM = 2
-
-            # assuming v (seed) is 0
-            hash_value = 0
-            for word in netaddr.EUI(mac_addr).words:
-                for byte in divmod(word, 0x100):
-                    left_shifted = (hash_value << LEFT_SHIFT_NUM)
-                    right_shifted = (hash_value >> RIGHT_SHIFT_NUM)
-                    hash_value ^= left_shifted + right_shifted + byte
-
-            # assuming T (table size) is 16-bit
-            return hash_value & 0xFFFF
-
         sax_int = sax(node.mac_address)
 
         adv_cell_idx = sax_int % (num_avail_ch_offsets * self.__total_adv_subslots_in_ms)
@@ -616,7 +1320,7 @@ class JoiningPhaseSimulator:
         if enhanced_version:
             ch_offset += 1
 
-        self.__allocated_ch_offset[node][adv_subslot_idx] = ch_offset
+        self.__set_adv_cell(node, adv_subslot_idx, ch_offset)
 
     def __cfash_allocate_adv_cell(self, node, enhanced_version=False):
         """
@@ -632,11 +1336,21 @@ class JoiningPhaseSimulator:
         if enhanced_version:
             ch_offset += 1
 
+        self.__set_adv_cell(node, adv_subslot_idx, ch_offset)
+
+    def __set_adv_cell(self, node, adv_subslot_idx, ch_offset):
+        """
+        Allocates an advertisement cell to a node
+        """
         self.__allocated_ch_offset[node][adv_subslot_idx] = ch_offset
+        self.__tx_cells[adv_subslot_idx, self.__node_idx[node]] = True
+        if self.__trace_recorder is not None:
+            self.__trace_recorder.record(TraceEventKind.CELL_ALLOCATION, self.__trace_asn, adv_subslot_idx,
+                                         self.__node_group.time.value, node.id, ch_offset=ch_offset)
 
     def __make_scheduling_for_the_pan_coordinator(self):
         if self.__scheduling_method is EBSchedulingMethod.Minimal6TiSCH:
-            self.__allocated_ch_offset[self.__node_group.pan_coordinator][0] = 0
+            self.__set_adv_cell(self.__node_group.pan_coordinator, 0, 0)
 
         elif self.__scheduling_method is EBSchedulingMethod.CFASV:
             self.__cfasv_allocate_adv_cell(self.__node_group.pan_coordinator)
@@ -651,7 +1365,7 @@ class JoiningPhaseSimulator:
             # In this case, it is assumed that the coordinator has no energy limitations and transmits EBs
             # in every advertisement (sub)slot using channel offset 0.
             for adv_subslot_idx in range(self.__total_adv_subslots_in_ms):
-                self.__allocated_ch_offset[self.__node_group.pan_coordinator][adv_subslot_idx] = 0
+                self.__set_adv_cell(self.__node_group.pan_coordinator, adv_subslot_idx, 0)
 
     def __channel_calculation(self, ch_offset, asn, ssn=None):
         if ssn is not None:
@@ -659,8 +1373,15 @@ class JoiningPhaseSimulator:
 
         return (asn + ch_offset) % self.__num_channels
 
-    def __is_a_neighbor_transmitting(self, observer, adv_subslot_idx, target_ch_offset):
-        for advertiser in self.__advertisers:
+    def __in_group_order(self, nodes):
+        """
+        Returns the given nodes in the order of the node group. The sets of nodes are iterated in this order, so that
+        the random values are drawn in the same order (and the results are reproducible) for the same seed
+        """
+        return sorted(nodes, key=self.__node_idx.__getitem__)
+
+    def __is_a_neighbor_transmitting(self, observer, advertisers, adv_subslot_idx, target_ch_offset):
+        for advertiser in advertisers:
             if advertiser is observer:
                 continue
 
@@ -674,20 +1395,62 @@ class JoiningPhaseSimulator:
 
         return False
 
+    # Path loss is calculated according to site-general model of ITU-R P.1238-9 recommendation
+    __FREQUENCY = 2400  # frequency in Mhz
+    __LD0 = 20 * math.log10(__FREQUENCY) - 28  # path loss at 1m (reference distance) with Line-Of-Sight (LOS)
+    __N = 40  # distance power loss coefficient
+    __LF = 0  # floor penetration loss factor - We consider that the nodes are on the same floor
+    __MAX_SHADOWING = 11  # extreme values of the shadowing (negligible probability to occur) are rejected
+
     def __rx_power(self, tx_power, distance):
-        # Path loss is calculated according to site-general model of ITU-R P.1238-9 recommendation
-        f = 2400  # frequency in Mhz
-        Ld0 = 20 * math.log10(f) - 28  # path loss at 1m (reference distance) with Line-Of-Sight (LOS)
-        N = 40  # distance power loss coefficient
-        Lf = 0  # floor penetration loss factor - We consider that the nodes are on the same floor
-        PL = Ld0 + N * math.log10(distance) + Lf  # average path loss
+        if self.__stats is not None:
+            self.__stats.rx_power_calls += 1
+
+        PL = self.__LD0 + self.__N * math.log10(distance) + self.__LF  # average path loss
         while True:
             variance = self.__randgen.normalvariate(0, 4)  # shadowing
-            if 11 >= variance >= -11:  # extreme values (negligible probability to occur) are rejected
+            if self.__MAX_SHADOWING >= variance >= -self.__MAX_SHADOWING:
                 break
 
         return tx_power - PL + variance
 
+    def __max_range(self, tx_power, radio_sensitivity):
+        """
+        Returns the max distance at which a transmission can be perceived, i.e. with the max shadowing gain
+        """
+        return 10 ** ((tx_power + self.__MAX_SHADOWING - self.__LF - self.__LD0 - radio_sensitivity) / self.__N)
+
+    def __unreachable_nodes(self, advertisers, nodes):
+        """
+        Checks the reachability of the given nodes on the max range connectivity graph: a node is reachable if it is in
+        the max range of an advertiser or of a reachable FFD. The check is done at the current node group time and only
+        for the fixed nodes, since the mobile nodes may move in the range of an advertiser at any time. For the same
+        reason, all the nodes are considered reachable if a mobile FFD may become an advertiser.
+        :return: the unreachable nodes
+        :rtype: list[ieee802154.node.Node]
+        """
+        unreached = [node for node in nodes if not node.is_mobile]
+        if any(node.is_mobile and node.type is NodeType.FFD for node in nodes):
+            return []
+
+        frontier = list(advertisers)
+        while len(frontier) > 0 and len(unreached) > 0:
+            advertiser = frontier.pop()
+            if advertiser.is_mobile:  # a mobile advertiser may reach any node
+                return []
+
+            still_unreached = []
+            for node in unreached:
+                if advertiser.distance_from_node(node) <= self.__max_range(advertiser.tx_power, node.radio_sensitivity):
+                    if node.type is NodeType.FFD:
+                        frontier.append(node)
+                else:
+                    still_unreached.append(node)
+
+            unreached = still_unreached
+
+        return unreached
+
     def __captured_eb(self, joining_node, candidate_ebs, asn, ssn=None):
         """
         This function checks if the joining node can receive an EB, and if it is possible then the captured EB is
@@ -695,7 +1458,7 @@ class JoiningPhaseSimulator:
         """
 
         # Synchronization header duration
-        SHR_DURATION = Timedelta(5 * 8 / self.__node_group.properties.data_rate, unit="s")
+        SHR_DURATION = Duration(5 * 8 / self.__node_group.properties.data_rate, unit="s")
         CAPTURE_EFFECT_THRESHOLD = 3  # dB according to the literature
         captured_eb = None
         interfering_ebs = {c: deque() for c in range(self.__num_channels)}  # per channel offset
@@ -858,10 +1621,10 @@ class JoiningPhaseSimulator:
                 raise NotValidJoiningPhaseSimulatorConfig(
                     "{} requires more than one channels".format(self.__scheduling_method.name))
 
-        if not isinstance(self.__scan_duration, Timedelta) or self.__scan_duration <= Timedelta(0):
+        if not isinstance(self.__scan_duration, Duration) or self.__scan_duration <= Duration(0):
             raise NotValidJoiningPhaseSimulatorConfig(
-                "The parameter scan_period must be a positive timedelta ({}.{})".format(
-                    Timedelta.__module__, Timedelta.__name__))
+                "The parameter scan_period must be a positive duration ({}.{} or datetime.timedelta)".format(
+                    Duration.__module__, Duration.__name__))
 
         if not isinstance(self.__ebi, int) or self.__ebi <= 0:
             raise NotValidJoiningPhaseSimulatorConfig("The parameter ebi must be a positive integer")
@@ -870,11 +1633,37 @@ class JoiningPhaseSimulator:
             raise NotValidJoiningPhaseSimulatorConfig(
                 "The parameter atp_enabled must be of type bool")
 
+        if self.__horizon is not None and (not isinstance(self.__horizon, Duration) or self.__horizon <= Duration(0)):
+            raise NotValidJoiningPhaseSimulatorConfig(
+                "The parameter horizon must be a positive duration ({}.{} or datetime.timedelta)".format(
+                    Duration.__module__, Duration.__name__))
+
         if self.__scheduling_method is EBSchedulingMethod.Minimal6TiSCH:
             if self.__atp_enabled:
                 raise NotValidJoiningPhaseSimulatorConfig(
                     "ATP is not supported by the the Minimal 6TiSCH configuration yet")
 
+    def __check_id_mapping(self):
+        """
+        Checks that the ids of the FFDs (except the PAN coordinator in the case of ECFAS) are mapped one-to-one to the
+        advertisement cells, as required by CFAS and ECFAS
+        :raise NotValidJoiningPhaseSimulatorConfig: if two FFDs are mapped to the same advertisement cell
+        """
+        if self.__id_mapped_adv_cells is None:
+            return
+
+        enhanced = self.__scheduling_method in {EBSchedulingMethod.ECFASV, EBSchedulingMethod.ECFASH}
+        temp = set()
+        for node in self.__node_group:
+            if node.type is NodeType.FFD and not (enhanced and node is self.__node_group.pan_coordinator):
+                adv_cell_idx = node.id % self.__id_mapped_adv_cells
+                if adv_cell_idx in temp:
+                    raise NotValidJoiningPhaseSimulatorConfig(
+                        '''The specified node IDs do not allow for a one-to-one mapping between the nodes and the 
+                        available advertisement cells. Therefore, the EB schedule cannot be collision-free''')
+                else:
+                    temp.add(adv_cell_idx)
+
     def __warnings(self):
         if math.gcd(self.__num_slots_in_ms, self.__num_channels) != 1:
             warnings.warn('''The length of the {} and the number of channels are not relatively prime. It
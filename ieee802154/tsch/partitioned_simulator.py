@@ -0,0 +1,476 @@
+"""
+A partitioned simulation of the network formation of large deployments, which scales across cores. The deployment area
+is split into square tiles. Each tile simulates the joining of the nodes that it owns (the nodes in the tile), and it
+also knows the advertisers of a halo around the tile, since an advertiser can only reach the nodes within its max range.
+The tiles are simulated in worker processes one multi-slotframe at a time, and the nodes that joined in a tile are
+exchanged with the tiles in whose halo they are. A tile whose halo advertisers joined in the multi-slotframe simulates
+it again from its start, with each of them transmitting from the subslot after its join, until the joins of all the
+tiles agree. A join only affects the later subslots, so the exchange converges within the subslots of a multi-slotframe.
+
+The model is the one of ieee802154.tsch.batch_simulator, with one approximation: the transmission start offset of a halo
+advertiser is drawn independently by each tile.
+"""
+import copy
+import os
+from multiprocessing.pool import Pool
+
+import numpy
+
+from ieee802154.duration import Duration
+from ieee802154.node import NodeType
+from ieee802154.radio_profile import ZOLERTIA_RE_MOTE
+from ieee802154.tsch.batch_simulator import (SUPPORTED_SCHEDULING_METHODS, advertisement_cells, captures_eb, max_range,
+                                             mean_rx_power, shadowing)
+from ieee802154.tsch.joining_phase_simulator import (EBSchedulingMethod, EnergyBreakdown, JoiningPhaseSimulator,
+                                                     NotValidJoiningPhaseSimulatorConfig, SimulationHorizonExceeded,
+                                                     UnreachableNodes)
+
+
+class _Layout:
+    """
+    The advertisement (sub)slots and the timing constants of a configuration, which are shared by all the tiles
+    """
+
+    def __init__(self, simulator, scheduling_method, timeslot_template, num_channels, scan_duration, data_rate):
+        """
+        :param simulator: a simulator of the configuration, which has computed the advertisement (sub)slots
+        :type simulator: JoiningPhaseSimulator
+        """
+        self.scheduling_method = scheduling_method
+        self.enhanced = scheduling_method in {EBSchedulingMethod.ECFASV, EBSchedulingMethod.ECFASH,
+                                              EBSchedulingMethod.EMAC_BASED_AS}
+        self.num_channels = num_channels
+        schedule_layout = simulator.schedule_layout
+        self.adv_slots_pos_in_ms = schedule_layout.adv_slots_pos_in_ms
+        self.num_adv_slots_in_ms = schedule_layout.num_adv_slots_in_ms
+        self.subslots_per_adv_slot = schedule_layout.subslots_per_adv_slot
+        self.total_adv_subslots_in_ms = schedule_layout.total_adv_subslots_in_ms
+        self.num_slots_in_ms = schedule_layout.num_slots_in_ms
+        self.ssn = schedule_layout.ssn
+        self.horizon_slots = simulator._JoiningPhaseSimulator__horizon_slots
+        self.slot_0_start_time_ns = simulator._JoiningPhaseSimulator__slot_0_start_time.value
+
+        self.t_eb = schedule_layout.t_eb.value * 1e-9
+        self.shr_duration = 5 * 8 / data_rate
+        self.subslot_length_ns = schedule_layout.subslot_length.value
+        self.timeslot_length_ns = timeslot_template.mac_ts_timeslot_length.value
+        self.tx_offset_ns = timeslot_template.mac_ts_tx_offset.value
+        self.macd = timeslot_template.mac_ts_rx_wait.total_seconds() / 2  # the max allowed clock drift
+        self.scan_duration = scan_duration.total_seconds()
+
+
+class _Tile:
+    """
+    The state of a tile: the nodes that it owns, followed by the nodes of its halo
+    """
+
+    def __init__(self, global_idx, num_owned, positions, tx_power, radio_sensitivity, boot_time,
+                 channel_switching_time, is_ffd, cell_subslot, cell_ch_offset, pc_idx, rng):
+        self.global_idx = global_idx
+        self.num_owned = num_owned
+        self.positions = positions
+        self.tx_power = tx_power
+        self.radio_sensitivity = radio_sensitivity
+        self.boot_time = boot_time
+        self.channel_switching_time = channel_switching_time
+        self.is_ffd = is_ffd
+        self.cell_subslot = cell_subslot
+        self.cell_ch_offset = cell_ch_offset
+        self.pc_idx = pc_idx  # -1 if the PAN coordinator is not in the tile or its halo
+        self.rng = rng
+
+        self.joined = numpy.zeros(len(global_idx), dtype=bool)
+        self.sync_asn = numpy.full(len(global_idx), -1, dtype=numpy.int64)
+        self.eb_tx_counter = numpy.zeros(len(global_idx), dtype=numpy.int64)
+        if pc_idx >= 0:
+            self.joined[pc_idx] = True
+            self.sync_asn[pc_idx] = 0
+
+    def simulate_multislotframe(self, layout, multislotframe_idx, activations):
+        """
+        Simulates the advertisement (sub)slots of a multi-slotframe, up to the horizon
+        :param activations: the halo advertisers that joined in the multi-slotframe, as (local index, advertisement
+        subslot of the join, advertisement cell) tuples sorted by subslot. Each one transmits from the next subslot
+        :type activations: list[(int, int, int)]
+        :return: the owned nodes that joined, and the index of the advertisement subslot in which they joined
+        :rtype: list[(int, int)]
+        """
+        pending = list(activations)
+        joins = []
+        for i, adv_slot_pos in enumerate(layout.adv_slots_pos_in_ms):
+            asn = multislotframe_idx * layout.num_slots_in_ms + adv_slot_pos
+            if layout.horizon_slots is not None and asn > layout.horizon_slots:
+                break
+
+            for j in range(layout.subslots_per_adv_slot):
+                adv_subslot_idx = i * layout.subslots_per_adv_slot + j
+                while len(pending) > 0 and pending[0][1] < adv_subslot_idx:
+                    self.__activate(*pending.pop(0))
+                joins.extend((node, adv_subslot_idx)
+                             for node in self.__simulate_subslot(layout, adv_subslot_idx, asn, j))
+
+        for activation in pending:
+            self.__activate(*activation)
+        return joins
+
+    def __activate(self, local_idx, adv_subslot_idx, cell_subslot):
+        """
+        Marks a halo advertiser as joined, with the advertisement cell drawn by the tile that owns it
+        """
+        self.joined[local_idx] = True
+        self.cell_subslot[local_idx] = cell_subslot
+
+    def __simulate_subslot(self, layout, adv_subslot_idx, asn, j):
+        """
+        Simulates an advertisement subslot (see BatchJoiningPhaseSimulator)
+        :return: the owned nodes that joined
+        :rtype: list[int]
+        """
+        ssn = layout.ssn[adv_subslot_idx] if layout.ssn is not None else 0
+
+        tx = self.joined & (self.cell_subslot == adv_subslot_idx)
+        if layout.enhanced and self.pc_idx >= 0:
+            tx[self.pc_idx] = True
+        self.eb_tx_counter += tx
+
+        advertisers = numpy.flatnonzero(tx)
+        listeners = numpy.flatnonzero(~self.joined[:self.num_owned])
+        if len(advertisers) == 0 or len(listeners) == 0:
+            return []
+
+        pair_adv = numpy.repeat(numpy.arange(len(advertisers)), len(listeners))
+        pair_node = numpy.tile(listeners, len(advertisers))
+        pair_advertiser = advertisers[pair_adv]
+        distance = numpy.hypot(self.positions[pair_advertiser, 0] - self.positions[pair_node, 0],
+                               self.positions[pair_advertiser, 1] - self.positions[pair_node, 1])
+
+        # the pairs beyond the max range are dropped before the shadowing is drawn
+        in_range = numpy.flatnonzero(distance <= max_range(self.tx_power[pair_advertiser],
+                                                           self.radio_sensitivity[pair_node]))
+        pair_adv, pair_advertiser, pair_node, distance = (pair_adv[in_range], pair_advertiser[in_range],
+                                                          pair_node[in_range], distance[in_range])
+
+        rx_power = mean_rx_power(self.tx_power[pair_advertiser], distance) + shadowing(self.rng, len(distance))
+        perceived = numpy.flatnonzero(rx_power >= self.radio_sensitivity[pair_node])
+        if len(perceived) == 0:
+            return []
+
+        tx_time = (layout.slot_0_start_time_ns + asn * layout.timeslot_length_ns + j * layout.subslot_length_ns
+                   + layout.tx_offset_ns) * 1e-9
+        tx_start_time = tx_time + self.rng.uniform(-layout.macd, layout.macd, len(advertisers))
+
+        pair_adv, pair_advertiser, pair_node = pair_adv[perceived], pair_advertiser[perceived], pair_node[perceived]
+        distance, rx_power = distance[perceived], rx_power[perceived]
+
+        rx_start_time = tx_start_time[pair_adv] + numpy.floor(distance * 10 / 3) * 1e-9
+        ch_offset = self.cell_ch_offset[pair_advertiser]
+
+        nodes, listener_idx = numpy.unique(pair_node, return_inverse=True)
+        clock_drift = self.rng.uniform(-30 / 10 ** 6, 30 / 10 ** 6, len(nodes))[listener_idx]
+
+        eb_local_arrival_time = rx_start_time + rx_start_time * clock_drift
+        scanning_period = layout.scan_duration + self.channel_switching_time[pair_node]
+        time_since_scan_start = eb_local_arrival_time - self.boot_time[pair_node]
+        listening_channel = (time_since_scan_start // scanning_period) % layout.num_channels
+        listened = ((self.boot_time[pair_node] <= rx_start_time)
+                    & (layout.scan_duration > time_since_scan_start % scanning_period + layout.t_eb)
+                    & (listening_channel == (asn + ssn + ch_offset) % layout.num_channels))
+        if not listened.any():
+            return []
+
+        order = numpy.argsort(listener_idx, kind="stable")
+        bounds = numpy.searchsorted(listener_idx[order], numpy.arange(len(nodes) + 1))
+        new_joined = []
+        for idx in numpy.unique(listener_idx[listened]).tolist():
+            ebs = order[bounds[idx]:bounds[idx + 1]]
+            if len(ebs) == 1 or captures_eb(rx_start_time[ebs].tolist(), rx_power[ebs].tolist(),
+                                            ch_offset[ebs].tolist(), listened[ebs].tolist(), layout.t_eb,
+                                            layout.shr_duration):
+                new_joined.append(int(nodes[idx]))
+
+        for node in new_joined:
+            self.joined[node] = True
+            if self.sync_asn[node] < 0:
+                self.sync_asn[node] = asn
+            self.eb_tx_counter[node] = 0
+
+            if layout.scheduling_method is EBSchedulingMethod.Minimal6TiSCH and self.is_ffd[node]:
+                # the new advertisers start transmitting EBs in a random slotframe (see JoiningPhaseSimulator)
+                self.cell_subslot[node] = self.rng.integers(0, layout.num_adv_slots_in_ms)
+
+        return new_joined
+
+
+def _simulate_tile(tile, layout, multislotframe_idx, activations):
+    """
+    Simulates a multi-slotframe of a copy of a tile in a worker process, so that the multi-slotframe can be simulated
+    again from the same state (random generator included)
+    :return: the updated tile and its joins (see _Tile.simulate_multislotframe)
+    :rtype: (_Tile, list[(int, int)])
+    """
+    tile = copy.deepcopy(tile)
+    joins = tile.simulate_multislotframe(layout, multislotframe_idx, activations)
+    return tile, joins
+
+
+class PartitionedFormationSimulator:
+    """
+    Simulates the network formation of a large node group, partitioned in spatial tiles that are simulated in parallel
+    worker processes. In the current version of the code, the scheduling method must be one of
+    ieee802154.tsch.batch_simulator.SUPPORTED_SCHEDULING_METHODS and all the nodes must be fixed.
+    """
+
+    def __init__(self, node_group, scheduling_method, timeslot_template, slotframe_length, eb_length, num_channels,
+                 scan_duration, ebi, atp_enabled=False, seed=None, horizon=None, radio_profile=ZOLERTIA_RE_MOTE,
+                 tile_size=200, processes=None):
+        """
+        The parameters are the same as the ones of JoiningPhaseSimulator, except for the following:
+        :param tile_size: the side of a tile, in meters
+        :type tile_size: int | float
+        :param processes: the number of worker processes. If it is None, the number of CPUs is used. If it is 1, the
+        tiles are simulated in the current process
+        :type processes: int | None
+        :raise NotValidJoiningPhaseSimulatorConfig: if the provided arguments are not valid or they are not supported by
+        the partitioned simulation
+        """
+        if scheduling_method not in SUPPORTED_SCHEDULING_METHODS:
+            raise NotValidJoiningPhaseSimulatorConfig(
+                "The scheduling method {} is not supported by the partitioned simulation".format(scheduling_method))
+        if any(node.is_mobile for node in node_group):
+            raise NotValidJoiningPhaseSimulatorConfig("Mobile nodes are not supported by the partitioned simulation")
+        if tile_size <= 0:
+            raise NotValidJoiningPhaseSimulatorConfig("The parameter tile_size must be positive")
+
+        # The arguments are checked by a JoiningPhaseSimulator, which also computes the advertisement (sub)slots
+        simulator = JoiningPhaseSimulator(node_group, scheduling_method, timeslot_template, slotframe_length,
+                                          eb_length, num_channels, scan_duration, ebi, atp_enabled, None, horizon,
+                                          radio_profile)
+        self.__layout = _Layout(simulator, scheduling_method, timeslot_template, num_channels, scan_duration,
+                                node_group.properties.data_rate)
+
+        self.__node_group = node_group
+        self.__horizon = horizon
+        self.__radio_profile = radio_profile
+        self.__tile_size = tile_size
+        self.__processes = processes if processes is not None else os.cpu_count()
+        self.__seed_sequence = numpy.random.SeedSequence(seed)
+
+        self.__nodes = list(node_group)
+        self.__pc_idx = self.__nodes.index(node_group.pan_coordinator)
+        self.__positions = numpy.array([node.position for node in self.__nodes], dtype=float)
+        self.__tx_power = numpy.array([node.tx_power for node in self.__nodes], dtype=float)
+        self.__radio_sensitivity = numpy.array([node.radio_sensitivity for node in self.__nodes], dtype=float)
+        self.__boot_time = numpy.array([node.boot_time.total_seconds() for node in self.__nodes])
+        self.__channel_switching_time = numpy.array([node.channel_switching_time.total_seconds()
+                                                     for node in self.__nodes])
+        self.__is_ffd = numpy.array([node.type is NodeType.FFD for node in self.__nodes])
+
+        # an advertiser can only reach the nodes within its max range, which is the width of the halos
+        self.__halo_width = float(max_range(self.__tx_power.max(), self.__radio_sensitivity.min()))
+        self.__formation_asn = None
+
+    def __make_tiles(self):
+        """
+        Assigns each node to the tile in which it is placed, and to the halos of the tiles whose area is within the
+        halo width from the node
+        :return: the tiles, and for each node the (tile, local index) pairs of its halo copies
+        :rtype: (list[_Tile], dict[int, list[(int, int)]])
+        """
+        layout = self.__layout
+        cell_subslot, cell_ch_offset = advertisement_cells(layout.scheduling_method, self.__nodes,
+                                                           self.__node_group.pan_coordinator,
+                                                           layout.total_adv_subslots_in_ms, layout.num_channels)
+
+        origin = self.__positions.min(axis=0)
+        tile_coords = ((self.__positions - origin) // self.__tile_size).astype(numpy.int64)
+        keys, owner = numpy.unique(tile_coords, axis=0, return_inverse=True)
+        owner = owner.reshape(-1)
+
+        rngs = [numpy.random.default_rng(child) for child in self.__seed_sequence.spawn(len(keys))]
+        tiles = []
+        halo_copies = {}
+        for tile_idx, (tile_x, tile_y) in enumerate(keys.tolist()):
+            low = origin + numpy.array([tile_x, tile_y]) * self.__tile_size
+            high = low + self.__tile_size
+            dx = numpy.maximum(numpy.maximum(low[0] - self.__positions[:, 0], 0), self.__positions[:, 0] - high[0])
+            dy = numpy.maximum(numpy.maximum(low[1] - self.__positions[:, 1], 0), self.__positions[:, 1] - high[1])
+
+            owned = numpy.flatnonzero(owner == tile_idx)
+            halo = numpy.flatnonzero((owner != tile_idx) & (dx ** 2 + dy ** 2 <= self.__halo_width ** 2))
+            global_idx = numpy.concatenate((owned, halo))
+
+            for local_idx, node_idx in enumerate(halo.tolist(), start=len(owned)):
+                halo_copies.setdefault(node_idx, []).append((tile_idx, local_idx))
+
+            pc_idx = numpy.flatnonzero(global_idx == self.__pc_idx)
+            tiles.append(_Tile(global_idx, len(owned), self.__positions[global_idx], self.__tx_power[global_idx],
+                               self.__radio_sensitivity[global_idx], self.__boot_time[global_idx],
+                               self.__channel_switching_time[global_idx], self.__is_ffd[global_idx],
+                               cell_subslot[global_idx], cell_ch_offset[global_idx],
+                               int(pc_idx[0]) if len(pc_idx) > 0 else -1, rngs[tile_idx]))
+
+        return tiles, halo_copies
+
+    def execute(self):
+        """
+        Simulates the network formation process.
+        The simulation is repeated at each call of the function
+        :return: a tuple containing the time at which all the nodes have synchronized to the network,
+        and the sum energy consumption
+        :rtype: (ieee802154.duration.Duration, float)
+        :raise UnreachableNodes: if some nodes cannot be reached by the advertisers, so the network cannot be formed
+        :raise SimulationHorizonExceeded: if the network formation does not complete within the horizon
+        """
+        unreachable_nodes = self.__unreachable_nodes()
+        if len(unreachable_nodes) > 0:
+            raise UnreachableNodes(unreachable_nodes)
+
+        layout = self.__layout
+        tiles, halo_copies = self.__make_tiles()
+        num_nodes = len(self.__nodes)
+        joined = numpy.zeros(num_nodes, dtype=bool)
+        joined[self.__pc_idx] = True
+
+        pool = Pool(processes=min(self.__processes, len(tiles))) if self.__processes > 1 and len(tiles) > 1 else None
+        try:
+            multislotframe_idx = 0
+            last_adv_subslot_idx = 0  # the subslot of the last join in the current multi-slotframe
+            while not joined.all():
+                # The tiles whose halo advertisers joined at other subslots than the ones they were simulated with
+                # simulate the multi-slotframe again. The joins of the subslots before the first one where the
+                # activations changed are replayed unchanged, so that subslot moves forward at each iteration
+                results = [None] * len(tiles)
+                activations = [[] for _ in tiles]
+                stale = list(range(len(tiles)))
+                while len(stale) > 0:
+                    tasks = [(tiles[tile_idx], layout, multislotframe_idx, activations[tile_idx]) for tile_idx in stale]
+                    for tile_idx, result in zip(stale, pool.starmap(_simulate_tile, tasks) if pool is not None else [
+                            _simulate_tile(*task) for task in tasks]):
+                        results[tile_idx] = result
+
+                    new_activations = self.__halo_activations(results, halo_copies)
+                    stale = [tile_idx for tile_idx in range(len(tiles))
+                             if new_activations[tile_idx] != activations[tile_idx]]
+                    activations = new_activations
+                tiles = [tile for tile, _ in results]
+
+                last_adv_subslot_idx = 0
+                for tile, joins in results:
+                    for local_idx, adv_subslot_idx in joins:
+                        joined[tile.global_idx[local_idx]] = True
+                        last_adv_subslot_idx = max(last_adv_subslot_idx, adv_subslot_idx)
+
+                if not joined.all():
+                    last_asn = multislotframe_idx * layout.num_slots_in_ms + layout.adv_slots_pos_in_ms[-1]
+                    if layout.horizon_slots is not None and last_asn >= layout.horizon_slots:
+                        raise SimulationHorizonExceeded(
+                            "The simulation did not complete within the horizon ({})".format(self.__horizon))
+                    multislotframe_idx += 1
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+        self.__collect_state(tiles, multislotframe_idx, last_adv_subslot_idx)
+        return self.__network_formation_time, float(self.energy_breakdown().total.sum())
+
+    @staticmethod
+    def __halo_activations(results, halo_copies):
+        """
+        Maps the joins of a multi-slotframe to the halo copies of the new advertisers in the other tiles
+        :param results: the updated tiles and their joins
+        :type results: list[(_Tile, list[(int, int)])]
+        :return: for each tile, the activations of its halo advertisers (see _Tile.simulate_multislotframe)
+        :rtype: list[list[(int, int, int)]]
+        """
+        activations = [[] for _ in results]
+        for tile, joins in results:
+            for local_idx, adv_subslot_idx in joins:
+                for halo_tile_idx, halo_local_idx in halo_copies.get(int(tile.global_idx[local_idx]), ()):
+                    activations[halo_tile_idx].append((halo_local_idx, adv_subslot_idx,
+                                                       int(tile.cell_subslot[local_idx])))
+
+        for tile_activations in activations:
+            tile_activations.sort(key=lambda activation: (activation[1], activation[0]))
+        return activations
+
+    def __collect_state(self, tiles, multislotframe_idx, formation_adv_subslot_idx):
+        """
+        Gathers the state of the owned nodes of the tiles, at the end of the advertisement subslot where the last node
+        joined
+        """
+        layout = self.__layout
+        num_nodes = len(self.__nodes)
+        self.__sync_asn = numpy.zeros(num_nodes, dtype=numpy.int64)
+        self.__EB_tx_counter = numpy.zeros(num_nodes, dtype=numpy.int64)
+        cell_subslot = numpy.full(num_nodes, -1, dtype=numpy.int64)
+        for tile in tiles:
+            owned = tile.global_idx[:tile.num_owned]
+            self.__sync_asn[owned] = tile.sync_asn[:tile.num_owned]
+            self.__EB_tx_counter[owned] = tile.eb_tx_counter[:tile.num_owned]
+            cell_subslot[owned] = tile.cell_subslot[:tile.num_owned]
+
+        # the tiles simulated the whole multi-slotframe, so the EBs after the formation are not counted
+        self.__EB_tx_counter -= cell_subslot > formation_adv_subslot_idx
+        if layout.enhanced:
+            self.__EB_tx_counter[self.__pc_idx] -= layout.total_adv_subslots_in_ms - 1 - formation_adv_subslot_idx
+
+        i, j = divmod(formation_adv_subslot_idx, layout.subslots_per_adv_slot)
+        self.__formation_asn = multislotframe_idx * layout.num_slots_in_ms + layout.adv_slots_pos_in_ms[i]
+        self.__network_formation_time = Duration(
+            layout.slot_0_start_time_ns + self.__formation_asn * layout.timeslot_length_ns
+            + (j + 1) * layout.subslot_length_ns, unit="ns")
+
+    def __unreachable_nodes(self):
+        """
+        The reachability check of JoiningPhaseSimulator: a node is reachable if it is in the max range of the PAN
+        coordinator or of a reachable FFD. The links are found through a k-d tree, so the check scales to large
+        deployments.
+        :return: the unreachable nodes
+        :rtype: list[ieee802154.node.Node]
+        """
+        # scipy is imported only when it is needed, since it takes longer to import than the rest of the package
+        from scipy.sparse import csr_matrix
+        from scipy.sparse.csgraph import breadth_first_order
+        from scipy.spatial import cKDTree
+
+        pairs = cKDTree(self.__positions).query_pairs(self.__halo_width, output_type="ndarray")
+        src = numpy.concatenate((pairs[:, 0], pairs[:, 1]))
+        dst = numpy.concatenate((pairs[:, 1], pairs[:, 0]))
+
+        distance = numpy.hypot(*(self.__positions[src] - self.__positions[dst]).T)
+        link = self.__is_ffd[src] & (distance <= max_range(self.__tx_power[src], self.__radio_sensitivity[dst]))
+
+        num_nodes = len(self.__nodes)
+        graph = csr_matrix((numpy.ones(int(link.sum()), dtype=bool), (src[link], dst[link])),
+                           shape=(num_nodes, num_nodes))
+        reached = numpy.zeros(num_nodes, dtype=bool)
+        reached[breadth_first_order(graph, self.__pc_idx, directed=True, return_predecessors=False)] = True
+        return [node for node, is_reached in zip(self.__nodes, reached.tolist()) if not is_reached]
+
+    def energy_breakdown(self):
+        """
+        Returns the energy consumption of the nodes, as JoiningPhaseSimulator.energy_breakdown
+        :return: the energy consumption of the nodes
+        :rtype: ieee802154.tsch.joining_phase_simulator.EnergyBreakdown
+        :raise RuntimeError: if the network has not been formed
+        """
+        if self.__formation_asn is None:
+            raise RuntimeError("The network has not been formed. The execute function must be called first")
+
+        accounted = numpy.ones(len(self.__nodes), dtype=bool)
+        if self.__layout.enhanced:
+            # in this case we assume that the pan coordinator has no energy limitations
+            accounted[self.__pc_idx] = False
+
+        profile = self.__radio_profile
+        slot_duration = self.__layout.timeslot_length_ns * 1e-9
+        sync_asn = self.__sync_asn[accounted]
+        eb_tx_counter = self.__EB_tx_counter[accounted]
+        idle_slots = self.__formation_asn - sync_asn - eb_tx_counter
+
+        return EnergyBreakdown([node for node, is_accounted in zip(self.__nodes, accounted.tolist()) if is_accounted],
+                               sync_asn * slot_duration * profile.rx_current * profile.voltage,
+                               eb_tx_counter * self.__layout.t_eb * profile.tx_current * profile.voltage,
+                               idle_slots * slot_duration * profile.idle_current * profile.voltage,
+                               numpy.zeros(len(sync_asn)))
@@ -1,4 +1,4 @@
-from pandas import Timedelta
+from ieee802154.duration import Duration
 
 
 class NotValidTimeslotTemplateError(Exception):
@@ -6,6 +6,10 @@ class NotValidTimeslotTemplateError(Exception):
 
 
 class TimeslotTemplate:
+    __slots__ = ("__mac_ts_cca_offset", "__mac_ts_cca", "__mac_ts_rx_tx", "__mac_ts_tx_offset", "__mac_ts_max_tx",
+                 "__mac_ts_rx_offset", "__mac_ts_rx_wait", "__mac_ts_rx_ack_delay", "__mac_ts_tx_ack_delay",
+                 "__mac_ts_ack_wait", "__mac_ts_max_ack", "__mac_ts_timeslot_length")
+
     def __init__(self, attributes):
         """
         Creates a TimeslotTemplate object.
@@ -32,18 +36,18 @@ class TimeslotTemplate:
         if len(attributes) > 12:
             raise NotValidTimeslotTemplateError("Unknown attributes were given")
 
-        self.__mac_ts_cca_offset = Timedelta(attributes["macTsCcaOffset"], unit="us")
-        self.__mac_ts_cca = Timedelta(attributes["macTsCca"], unit="us")
-        self.__mac_ts_rx_tx = Timedelta(attributes["macTsRxTx"], unit="us")
-        self.__mac_ts_tx_offset = Timedelta(attributes["macTsTxOffset"], unit="us")
-        self.__mac_ts_max_tx = Timedelta(attributes["macTsMaxTx"], unit="us")
-        self.__mac_ts_rx_offset = Timedelta(attributes["macTsRxOffset"], unit="us")
-        self.__mac_ts_rx_wait = Timedelta(attributes["macTsRxWait"], unit="us")
-        self.__mac_ts_rx_ack_delay = Timedelta(attributes["macTsRxAckDelay"], unit="us")
-        self.__mac_ts_tx_ack_delay = Timedelta(attributes["macTsTxAckDelay"], unit="us")
-        self.__mac_ts_ack_wait = Timedelta(attributes["macTsAckWait"], unit="us")
-        self.__mac_ts_max_ack = Timedelta(attributes["macTsMaxAck"], unit="us")
-        self.__mac_ts_timeslot_length = Timedelta(attributes["macTsTimeslotLength"], unit="us")
+        self.__mac_ts_cca_offset = Duration(attributes["macTsCcaOffset"], unit="us")
+        self.__mac_ts_cca = Duration(attributes["macTsCca"], unit="us")
+        self.__mac_ts_rx_tx = Duration(attributes["macTsRxTx"], unit="us")
+        self.__mac_ts_tx_offset = Duration(attributes["macTsTxOffset"], unit="us")
+        self.__mac_ts_max_tx = Duration(attributes["macTsMaxTx"], unit="us")
+        self.__mac_ts_rx_offset = Duration(attributes["macTsRxOffset"], unit="us")
+        self.__mac_ts_rx_wait = Duration(attributes["macTsRxWait"], unit="us")
+        self.__mac_ts_rx_ack_delay = Duration(attributes["macTsRxAckDelay"], unit="us")
+        self.__mac_ts_tx_ack_delay = Duration(attributes["macTsTxAckDelay"], unit="us")
+        self.__mac_ts_ack_wait = Duration(attributes["macTsAckWait"], unit="us")
+        self.__mac_ts_max_ack = Duration(attributes["macTsMaxAck"], unit="us")
+        self.__mac_ts_timeslot_length = Duration(attributes["macTsTimeslotLength"], unit="us")
 
         for name, value in attributes.items():
             if not isinstance(value, int) or value < 0 or value > 65535:
@@ -70,7 +74,7 @@ class TimeslotTemplate:
         """
         The time between the beginning of timeslot and start of CCA operation.
         :return: the value of the attribute macTsCcaOffset
-        :rtype: pandas.Timedelta
+        :rtype: ieee802154.duration.Duration
         """
         return self.__mac_ts_cca_offset
 
@@ -79,7 +83,7 @@ class TimeslotTemplate:
         """
         Duration of CCA.
         :return: the value of the attribute macTsCca
-        :rtype: pandas.Timedelta
+        :rtype: ieee802154.duration.Duration
         """
         return self.__mac_ts_cca
 
@@ -88,7 +92,7 @@ class TimeslotTemplate:
         """
         Transmit to Receive turnaround.
         :return: the value of the attribute macTsRxTx
-        :rtype: pandas.Timedelta
+        :rtype: ieee802154.duration.Duration
         """
         return self.__mac_ts_rx_tx
 
@@ -97,7 +101,7 @@ class TimeslotTemplate:
         """
         The time between the beginning of the timeslot and the start of frame transmission.
         :return: the value of the attribute macTsTxOffset
-        :rtype: pandas.Timedelta
+        :rtype: ieee802154.duration.Duration
         """
         return self.__mac_ts_tx_offset
 
@@ -106,7 +110,7 @@ class TimeslotTemplate:
         """
         Transmission time to send the maximum length frame.
         :return: the value of the attribute macTsMaxTx
-        :rtype: pandas.Timedelta
+        :rtype: ieee802154.duration.Duration
         """
         return self.__mac_ts_max_tx
 
@@ -115,7 +119,7 @@ class TimeslotTemplate:
         """
         Beginning of the timeslot to when the receiver shall be listening.
         :return: the value of the attribute macTsRxOffset
-        :rtype: pandas.Timedelta
+        :rtype: ieee802154.duration.Duration
         """
         return self.__mac_ts_rx_offset
 
@@ -124,7 +128,7 @@ class TimeslotTemplate:
         """
         The time to wait for start of frame.
         :return: the value of the attribute macTsRxWait
-        :rtype: pandas.Timedelta
+        :rtype: ieee802154.duration.Duration
         """
         return self.__mac_ts_rx_wait
 
@@ -133,7 +137,7 @@ class TimeslotTemplate:
         """
         End of frame to when the transmitter shall listen for acknowledgment.
         :return: the value of the attribute macTsRxAckDelay
-        :rtype: pandas.Timedelta
+        :rtype: ieee802154.duration.Duration
         """
         return self.__mac_ts_rx_ack_delay
 
@@ -142,7 +146,7 @@ class TimeslotTemplate:
         """
         End of frame to start of acknowledgment.
         :return: the value of the attribute macTsTxAckDelay
-        :rtype: pandas.Timedelta
+        :rtype: ieee802154.duration.Duration
         """
         return self.__mac_ts_tx_ack_delay
 
@@ -151,7 +155,7 @@ class TimeslotTemplate:
         """
         The minimum time to wait for the start of an acknowledgment.
         :return: the value of the attribute macTsAckWait
-        :rtype: pandas.Timedelta
+        :rtype: ieee802154.duration.Duration
         """
         return self.__mac_ts_ack_wait
 
@@ -160,7 +164,7 @@ class TimeslotTemplate:
         """
         Transmission time to send an acknowledgment.
         :return: the value of the attribute macTsMaxAck
-        :rtype: pandas.Timedelta
+        :rtype: ieee802154.duration.Duration
         """
         return self.__mac_ts_max_ack
 
@@ -169,7 +173,7 @@ class TimeslotTemplate:
         """
         The sum length of the timeslot including any unused time after frame transmission and acknowledgment.
         :return: the value of the attribute macTsTimeslotLength
-        :rtype: pandas.Timedelta
+        :rtype: ieee802154.duration.Duration
         """
         return self.__mac_ts_timeslot_length
 
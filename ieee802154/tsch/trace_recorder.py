@@ -0,0 +1,160 @@
+"""
+An event trace recorder for the simulations of ieee802154.tsch.joining_phase_simulator.JoiningPhaseSimulator. The events
+(EB transmissions, candidate EB receptions, capture outcomes, joins and advertisement cell allocations) are written to a
+preallocated ring buffer (a numpy structured array), so the recording does not allocate memory and, when the buffer is
+full, the oldest events are overwritten. The recorded events can be exported to CSV, to Parquet and to the Chrome trace
+JSON format, which can be opened with Perfetto (https://ui.perfetto.dev) or chrome://tracing.
+"""
+import json
+import math
+from enum import IntEnum
+
+import numpy
+
+
+class TraceEventKind(IntEnum):
+    EB_TX = 0  # an advertiser transmits an EB
+    CANDIDATE_RX = 1  # an EB reaches an unjoined node
+    CAPTURE = 2  # an unjoined node captures an EB
+    CAPTURE_FAILURE = 3  # an unjoined node is reached by EBs but it does not capture any of them
+    JOIN = 4  # a node joins the network
+    CELL_ALLOCATION = 5  # a node allocates an advertisement cell
+
+
+# The fields of an event. The times are expressed in ns, and the nodes by their ids. The fields that do not apply to an
+# event are -1 (NaN for the rx power)
+TRACE_EVENT_DTYPE = numpy.dtype([
+    ("kind", numpy.uint8),
+    ("asn", numpy.int64),
+    ("adv_subslot", numpy.int32),  # the index of the advertisement (sub)slot in the multi-slotframe
+    ("time", numpy.int64),  # the start time of the event
+    ("duration", numpy.int64),  # the duration of the EB transmissions and receptions, 0 for the other events
+    ("node", numpy.int64),  # the transmitter of an EB, the receiver of a candidate EB, the joining or allocating node
+    ("peer", numpy.int64),  # the transmitter of a candidate or captured EB, the advertiser of a join
+    ("ch_offset", numpy.int16),
+    ("rx_power", numpy.float32),  # in dBm
+])
+
+
+class TraceRecorder:
+    """
+    A fixed-size ring buffer of trace events. A recorder is passed to a simulator with the parameter trace_recorder of
+    JoiningPhaseSimulator; it can also be shared by several simulators, e.g. to trace a rejoining attempt together with
+    the formation of its network.
+    """
+
+    def __init__(self, capacity=1000000):
+        """
+        :param capacity: the max number of events that are kept. Each event takes 51 bytes
+        :type capacity: int
+        """
+        if capacity <= 0:
+            raise ValueError("The capacity must be a positive integer")
+
+        self.__buffer = numpy.zeros(capacity, dtype=TRACE_EVENT_DTYPE)
+        self.__num_recorded = 0  # including the overwritten events
+
+    def record(self, kind, asn, adv_subslot, time, node, peer=-1, ch_offset=-1, rx_power=math.nan, duration=0):
+        """
+        Records an event. If the buffer is full, the oldest event is overwritten.
+        :param kind: the kind of the event
+        :type kind: TraceEventKind
+        :param time: the start time of the event, in ns
+        :type time: int
+        """
+        self.__buffer[self.__num_recorded % len(self.__buffer)] = (kind, asn, adv_subslot, time, duration, node, peer,
+                                                                   ch_offset, rx_power)
+        self.__num_recorded += 1
+
+    @property
+    def capacity(self):
+        """
+        :return: the max number of events that are kept
+        :rtype: int
+        """
+        return len(self.__buffer)
+
+    @property
+    def dropped(self):
+        """
+        :return: the number of the events that were overwritten since the buffer was full
+        :rtype: int
+        """
+        return max(0, self.__num_recorded - len(self.__buffer))
+
+    def __len__(self):
+        return min(self.__num_recorded, len(self.__buffer))
+
+    def clear(self):
+        self.__num_recorded = 0
+
+    def events(self):
+        """
+        :return: a copy of the kept events, in the order in which they were recorded
+        :rtype: numpy.ndarray
+        """
+        if self.__num_recorded <= len(self.__buffer):
+            return self.__buffer[:self.__num_recorded].copy()
+
+        start = self.__num_recorded % len(self.__buffer)
+        return numpy.concatenate((self.__buffer[start:], self.__buffer[:start]))
+
+    def to_dataframe(self):
+        """
+        :return: the kept events, with the names of their kinds
+        :rtype: pandas.DataFrame
+        """
+        import pandas  # only the exporters require pandas
+
+        df = pandas.DataFrame(self.events())
+        df["kind"] = pandas.Categorical.from_codes(df["kind"], [kind.name for kind in TraceEventKind])
+        return df
+
+    def to_csv(self, path):
+        """
+        Exports the kept events to a CSV file.
+        :param path: the path of the file
+        :type path: str
+        """
+        self.to_dataframe().to_csv(path, index=False)
+
+    def to_parquet(self, path):
+        """
+        Exports the kept events to a Parquet file. It requires one of the Parquet engines of pandas (pyarrow or
+        fastparquet).
+        :param path: the path of the file
+        :type path: str
+        """
+        self.to_dataframe().to_parquet(path, index=False)
+
+    def to_chrome_trace(self, path):
+        """
+        Exports the kept events to a JSON file in the Chrome trace event format, with one track per node. The EB
+        transmissions and receptions are shown as slices and the other events as instant events.
+        :param path: the path of the file
+        :type path: str
+        """
+        trace_events = []
+        events = self.events()
+        for node in numpy.unique(events["node"]).tolist():
+            trace_events.append({"name": "thread_name", "ph": "M", "pid": 0, "tid": node,
+                                 "args": {"name": "node {}".format(node)}})
+
+        for kind, asn, adv_subslot, time, duration, node, peer, ch_offset, rx_power in events.tolist():
+            trace_event = {"name": TraceEventKind(kind).name, "pid": 0, "tid": node, "ts": time / 1000,
+                           "args": {"asn": asn, "adv_subslot": adv_subslot}}
+            if duration > 0:
+                trace_event.update(ph="X", dur=duration / 1000)
+            else:
+                trace_event.update(ph="i", s="t")
+            if peer >= 0:
+                trace_event["args"]["peer"] = peer
+            if ch_offset >= 0:
+                trace_event["args"]["ch_offset"] = ch_offset
+            if not math.isnan(rx_power):
+                trace_event["args"]["rx_power"] = rx_power
+
+            trace_events.append(trace_event)
+
+        with open(path, "w") as f:
+            json.dump({"traceEvents": trace_events, "displayTimeUnit": "ms"}, f)
@@ -0,0 +1,254 @@
+import argparse
+import cProfile
+import importlib
+import json
+import pstats
+import sqlite3
+import sys
+import time
+
+from ieee802154.duration import Duration
+from ieee802154.tsch.joining_phase_simulator import (EBSchedulingMethod, SimulationHorizonExceeded,
+                                                     SimulationNotCompleted)
+from ieee802154.tsch.batch_simulator import SUPPORTED_SCHEDULING_METHODS
+from ieee802154.tsch.trace_recorder import TraceRecorder
+from sweep_engine import SlowSamples, SweepCheckpoint, unit_numpy_randgen, unit_randgen
+
+
+def generate_unit_topology(config, sweep_point, seed):
+    """
+    Regenerates the topology of a work unit from its seed, as the simulation command of the sweep does.
+    :param config: the configuration of the sweep (see SweepCheckpoint.config)
+    :type config: dict
+    :param sweep_point: the sweep point of the unit
+    :type sweep_point: int
+    :param seed: the seed of the unit
+    :type seed: int
+    :return: the node table of the topology
+    :rtype: numpy.ndarray
+    """
+    command = importlib.import_module(config["command"])
+    rng = unit_numpy_randgen(seed, "topology")
+    if config["command"] == "sim_for_fixed_joining_node":
+        return command.generate_topology(command.Scenario[config["scenario"]], sweep_point, rng)
+    elif config["command"] == "sim_for_mobile_joining_node":
+        return command.generate_topology(command.AREA_DIMENSIONS, sweep_point, rng)
+    else:
+        num_mobile_nodes = int(0.1 * sweep_point)
+        return command.generate_topology(command.AREA_DIMENSIONS, sweep_point - num_mobile_nodes, num_mobile_nodes,
+                                         rng)
+
+
+def create_unit(config, sweep_point, seed, nodes, **simulator_options):
+    """
+    Re-creates the simulator of a work unit (see the function create_unit of the simulation commands).
+    :param config: the configuration of the sweep (see SweepCheckpoint.config)
+    :type config: dict
+    :param sweep_point: the sweep point of the unit
+    :type sweep_point: int
+    :param seed: the seed of the unit
+    :type seed: int
+    :param nodes: the node table of the topology of the unit
+    :type nodes: numpy.ndarray
+    :param simulator_options: further keyword arguments of JoiningPhaseSimulator
+    :return: the simulator and the (re)joining node, which is None for the sweeps of the energy consumption
+    :rtype: (JoiningPhaseSimulator, ieee802154.node.Node | None)
+    """
+    command = importlib.import_module(config["command"])
+    scheduling_method = EBSchedulingMethod[config["scheduling_method"]]
+    horizon = None if config["horizon"] is None else Duration(config["horizon"], unit="s")
+
+    if config["command"] == "sim_for_fixed_joining_node":
+        return command.create_unit(scheduling_method, command.Scenario[config["scenario"]], config["atp_enabled"],
+                                   nodes, seed, horizon, **simulator_options)
+    elif config["command"] == "sim_for_mobile_joining_node":
+        return command.create_unit(scheduling_method, config["atp_enabled"], nodes, seed, horizon,
+                                   **simulator_options)
+    else:
+        return command.create_unit(scheduling_method, config["atp_enabled"], nodes, int(0.1 * sweep_point), seed,
+                                   horizon, **simulator_options), None
+
+
+def replay_batch_replica(config, sweep_point, seed, nodes, profiler):
+    """
+    Re-runs the network formation of a unit of the energy consumption that was simulated by the batch engine, as a
+    batch of one replica with the seed of the unit (see the function create_batch of the command), which gives the
+    same sample as in the sweep. The batch engine does not collect stats or traces, so only the profile is recorded.
+    :type profiler: cProfile.Profile
+    :return: the simulated time of the sample (or the exception of the simulator, if the sample was censored or some
+    nodes were unreachable) and its wall time in seconds
+    :rtype: (ieee802154.duration.Duration | SimulationNotCompleted, float)
+    """
+    command = importlib.import_module(config["command"])
+    scheduling_method = EBSchedulingMethod[config["scheduling_method"]]
+    horizon = None if config["horizon"] is None else Duration(config["horizon"], unit="s")
+    node_group = command.create_node_group(scheduling_method, config["atp_enabled"], nodes, int(0.1 * sweep_point),
+                                           seed)
+    simulator = command.create_batch(scheduling_method, config["atp_enabled"], [node_group], [seed], horizon)
+
+    start_time = time.perf_counter()
+    profiler.enable()
+    try:
+        res = simulator.execute()[0]
+    finally:
+        profiler.disable()
+    wall_time = time.perf_counter() - start_time
+
+    return (res if isinstance(res, SimulationNotCompleted) else res[0]), wall_time
+
+
+def replay(simulator, joining_node, seed, attempt_idx, trace_recorder, profiler):
+    """
+    Re-runs the network formation of a unit and, if an attempt is given, its rejoining attempts up to that one, with the
+    same start offsets as in the sweep. Only the replayed sample (the formation or the given attempt) is traced and
+    profiled.
+    :param attempt_idx: the index of the rejoining attempt, or None for the network formation
+    :type attempt_idx: int | None
+    :type trace_recorder: TraceRecorder
+    :type profiler: cProfile.Profile
+    :return: the simulated time of the sample (or the exception of the simulator, if the sample was censored or some
+    nodes were unreachable), its wall time in seconds and the stats of the simulator during the sample
+    :rtype: (ieee802154.duration.Duration | SimulationNotCompleted, float, dict[str, float])
+    """
+    if attempt_idx is not None:
+        simulator.execute()
+        rejoin_randgen = unit_randgen(seed, "rejoin")
+        for _ in range(attempt_idx):
+            try:
+                simulator.rejoining_attempt(joining_node, Duration(rejoin_randgen.random() * 100, unit="s"))
+            except SimulationNotCompleted:
+                pass
+        operation = (simulator.rejoining_attempt, joining_node, Duration(rejoin_randgen.random() * 100, unit="s"))
+    else:
+        operation = (simulator.execute,)
+
+    trace_recorder.clear()
+    stats_before = simulator.stats.as_dict()
+    start_time = time.perf_counter()
+    profiler.enable()
+    try:
+        res = operation[0](*operation[1:])
+    except SimulationNotCompleted as e:
+        res = e
+    finally:
+        profiler.disable()
+    wall_time = time.perf_counter() - start_time
+
+    stats = {name: value - stats_before[name] for name, value in simulator.stats.as_dict().items()}
+    # the formation time, or the joining time (which ECV and ECH return together with the delay of the EB scheduling)
+    simulated_time = res[0] if isinstance(res, tuple) else res
+
+    return simulated_time, wall_time, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-runs a sample of a simulation sweep (a network formation or a "
+                                                 "rejoining attempt) with tracing and profiling.")
+    parser.add_argument("database", help="the database of the sweep (e.g. statistics/fixed_joining_node/CFASV.db)")
+    parser.add_argument("--list", action="store_true", help="list the captured outliers of the sweep (slow_samples)")
+    parser.add_argument("--sample", type=int, help="the id of a captured outlier (see --list)")
+    parser.add_argument("--unit", type=int, nargs=2, metavar=("SWEEP_POINT", "SAMPLE_IDX"),
+                        help="a completed unit of the sweep, whose topology is regenerated from its seed")
+    parser.add_argument("--attempt", type=int, help="the rejoining attempt of --unit (by default, the formation)")
+    parser.add_argument("--trace", help="export the trace of the sample to a Chrome trace JSON file (.json), or to a "
+                                        "CSV (.csv) or Parquet (.parquet) file")
+    parser.add_argument("--trace-capacity", type=int, default=1000000, help="the max number of traced events")
+    parser.add_argument("--profile", help="write the profile of the sample to a pstats file")
+    parser.add_argument("--top", type=int, default=25, help="the number of the printed functions of the profile")
+    args = parser.parse_args()
+
+    db_conn = sqlite3.connect(args.database)
+    checkpoint = SweepCheckpoint(db_conn)
+    slow_samples = SlowSamples(db_conn)
+    config = checkpoint.config
+    if "command" not in config:
+        sys.exit("The database does not contain the configuration of a sweep")
+    # the units are re-created with the configuration of the network and the topology generator of the command (the
+    # sweeps of an earlier version did not record them)
+    command = importlib.import_module(config["command"])
+    for key, current_config in (("network", command.network_config), ("topology", command.topology_parameters)):
+        if key in config and config[key] != json.loads(json.dumps(current_config())):
+            sys.exit("The configuration of the {} of {} has changed since the sweep, so its units cannot be "
+                     "re-created".format(key, config["command"]))
+
+    if args.list or (args.sample is None and args.unit is None):
+        print("{:>6} {:>12} {:>10} {:>8} {:>14} {:>10}".format("id", "sweep_point", "sample_idx", "attempt",
+                                                              "wall_time (s)", "time (s)"))
+        for sample_id, sweep_point, sample_idx, attempt_idx, _, wall_time, simulated_time in slow_samples.samples():
+            print("{:>6} {:>12} {:>10} {:>8} {:>14} {:>10}".format(
+                sample_id, sweep_point, sample_idx, "-" if attempt_idx is None else attempt_idx,
+                "-" if wall_time is None else "{:.3f}".format(wall_time),
+                "censored" if simulated_time is None else "{:.3f}".format(simulated_time)))
+        return
+
+    if args.sample is not None:
+        sweep_point, sample_idx, attempt_idx, seed, recorded_time, nodes = slow_samples.get(args.sample)
+        recorded_time = "censored" if recorded_time is None else "{:.6f} s".format(recorded_time)
+    else:
+        (sweep_point, sample_idx), attempt_idx = args.unit, args.attempt
+        seed = checkpoint.seed(sweep_point, sample_idx)
+        if seed is None:
+            sys.exit("The unit {} of the sweep point {} is not completed".format(sample_idx, sweep_point))
+        nodes = generate_unit_topology(config, sweep_point, seed)
+        recorded_time = None
+    db_conn.close()
+
+    if attempt_idx is not None and config["command"] == "sim_for_energy_consumption":
+        sys.exit("The sweeps of the energy consumption have no rejoining attempts")
+
+    print("{} {}, sweep point {}, sample {}, {}, seed {}".format(
+        config["command"], config["scheduling_method"] + ("_with_ATP" if config["atp_enabled"] else ""), sweep_point,
+        sample_idx, "network formation" if attempt_idx is None else "rejoining attempt {}".format(attempt_idx), seed))
+    # the sweeps of an earlier version did not record the engine, and their batches shared one random generator
+    if ("batch_engine" not in config and config.get("batch_size", 1) > 1
+            and EBSchedulingMethod[config["scheduling_method"]] in SUPPORTED_SCHEDULING_METHODS):
+        print("Note: the sample may have been simulated by the batch engine of an earlier version, whose random values "
+              "depended on the batch, so it is replayed on the same topology but not with the same random values")
+
+    profiler = cProfile.Profile()
+    if config.get("batch_engine", False):
+        print("The sample was simulated by the batch engine, so it is replayed as a batch of one replica, without "
+              "stats and trace")
+        trace_recorder = None
+        simulated_time, wall_time = replay_batch_replica(config, sweep_point, seed, nodes, profiler)
+        stats = {}
+    else:
+        trace_recorder = TraceRecorder(args.trace_capacity)
+        simulator, joining_node = create_unit(config, sweep_point, seed, nodes, collect_stats=True,
+                                              trace_recorder=trace_recorder)
+        simulated_time, wall_time, stats = replay(simulator, joining_node, seed, attempt_idx, trace_recorder,
+                                                  profiler)
+
+    if isinstance(simulated_time, SimulationHorizonExceeded):
+        outcome = "censored"
+    elif isinstance(simulated_time, SimulationNotCompleted):
+        outcome = "not completed ({})".format(simulated_time)
+    else:
+        outcome = "{:.6f} s".format(simulated_time.total_seconds())
+    print("simulated time: {}{}".format(outcome, "" if recorded_time is None else " (recorded: {})".format(
+        recorded_time)))
+    print("wall time: {:.3f} s (with {}profiling)".format(wall_time, "" if trace_recorder is None else "tracing and "))
+    for name, value in stats.items():
+        print("    {}: {:g}".format(name, value))
+
+    if trace_recorder is None:
+        if args.trace is not None:
+            print("The trace is not written, since the batch engine does not record the events")
+    else:
+        print("traced events: {}{}".format(len(trace_recorder), (" ({} dropped, see --trace-capacity)".format(
+            trace_recorder.dropped) if trace_recorder.dropped > 0 else "")))
+    if args.trace is not None and trace_recorder is not None:
+        if args.trace.endswith(".csv"):
+            trace_recorder.to_csv(args.trace)
+        elif args.trace.endswith(".parquet"):
+            trace_recorder.to_parquet(args.trace)
+        else:
+            trace_recorder.to_chrome_trace(args.trace)
+
+    if args.profile is not None:
+        profiler.dump_stats(args.profile)
+    pstats.Stats(profiler).sort_stats(pstats.SortKey.CUMULATIVE).print_stats(args.top)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,13 +1,20 @@
 import csv
+import json
+import multiprocessing
 import os
 import sqlite3
-import bootstrapped.bootstrap as bs
-import bootstrapped.stats_functions as bs_stats
+from multiprocessing.pool import Pool
+
 import numpy
 
+import bootstrap_stats
 from sim_for_fixed_joining_node import Scenario
 from ieee802154.tsch.joining_phase_simulator import EBSchedulingMethod
 
+# The method of the exported confidence intervals. The pivotal (basic) interval is the default one of the package
+# bootstrapped, which was used by the earlier exports, so the exported intervals stay comparable with them
+CI_METHOD = bootstrap_stats.CIMethod.PIVOTAL
+
 simulations_with_fixed_nodes = [
     (EBSchedulingMethod.CFASV, Scenario.ANY, False), (EBSchedulingMethod.CFASV, Scenario.ANY, True),
     (EBSchedulingMethod.CFASH, Scenario.ANY, False), (EBSchedulingMethod.CFASH, Scenario.ANY, True),
@@ -19,7 +26,6 @@ simulations_with_fixed_nodes = [
     (EBSchedulingMethod.ECH, Scenario.ONE_HOP),
     (EBSchedulingMethod.ECH, Scenario.TWO_HOPS),
     (EBSchedulingMethod.Minimal6TiSCH, Scenario.ANY),
-    (EBSchedulingMethod.Minimal6TiSCH, Scenario.ANY),
     (EBSchedulingMethod.MAC_BASED_AS, Scenario.ANY),
     (EBSchedulingMethod.EMAC_BASED_AS, Scenario.ONE_HOP),
     (EBSchedulingMethod.EMAC_BASED_AS, Scenario.TWO_HOPS)
@@ -45,113 +51,368 @@ simulations_for_energy = [
     (EBSchedulingMethod.EMAC_BASED_AS,)
 ]
 
-os.makedirs(os.path.join("filtered_statistics", "fixed_joining_node"), exist_ok=True)
-os.makedirs(os.path.join("filtered_statistics", "mobile_joining_node"), exist_ok=True)
-os.makedirs(os.path.join("filtered_statistics", "energy_consumption"), exist_ok=True)
+# The pairs of databases (A, B) whose paired differences (A - B) are exported. The differences are exported only for the
+# work units that were simulated with the same seed in both databases (see the paired experiments of the simulations)
+paired_comparisons_with_fixed_nodes = [
+    ("ECFASV_ONE_HOP", "ECV_ONE_HOP"), ("ECFASV_TWO_HOPS", "ECV_TWO_HOPS"),
+    ("ECV_ONE_HOP", "ECH_ONE_HOP"), ("ECV_TWO_HOPS", "ECH_TWO_HOPS"),
+    ("ECFASV_with_ATP_ONE_HOP", "ECFASV_ONE_HOP"), ("CFASV", "Minimal6TiSCH")
+]
 
-for sim in simulations_with_fixed_nodes:
-    scheduling_method = sim[0]
-    selected_scenario = sim[1]
-    atp_enabled = sim[2] if len(sim) == 3 else False
+paired_comparisons_with_mobile_node = [
+    ("ECFASV", "ECV"), ("ECV", "ECH"), ("ECFASV_with_ATP", "ECFASV"), ("CFASV", "Minimal6TiSCH")
+]
 
-    db_name = "{}{}{}".format(scheduling_method.name, ("_with_ATP" if atp_enabled else ""),
-                              ("_{}".format(selected_scenario.name) if selected_scenario is not Scenario.ANY else ""))
+paired_comparisons_for_energy = [
+    ("ECFASV", "ECV"), ("ECV", "ECH"), ("ECFASV_with_ATP", "ECFASV"), ("CFASV", "Minimal6TiSCH")
+]
 
-    db_conn = sqlite3.connect(os.path.join("statistics", "fixed_joining_node", "{}.db".format(db_name)))
-    db_conn.row_factory = sqlite3.Row
-    c = db_conn.cursor()
-    export_file = os.path.join("filtered_statistics", "fixed_joining_node", "{}.csv".format(db_name))
 
-    with open(export_file, 'w', newline='') as csv_file:
-        csv_writer = csv.writer(csv_file, delimiter=';', quotechar='"', quoting=csv.QUOTE_MINIMAL)
+def group_by_sweep_point(rows):
+    """
+    :param rows: rows whose first column is the sweep point and the rest are the metrics
+    :type rows: numpy.ndarray
+    :return: the samples of each sweep point, as an array with one row per metric
+    :rtype: dict[int, numpy.ndarray]
+    """
+    if len(rows) == 0:
+        return {}
 
-        if scheduling_method not in {EBSchedulingMethod.ECV, EBSchedulingMethod.ECH}:
-            csv_writer.writerow(["Neighboring Advertisers", "Joining Time (s)"])
-            csv_writer.writerow([""] + ["AVG", "CI_LL", "CI_UL"])
-        else:
-            csv_writer.writerow(["Neighboring Advertisers", "Joining Time (s)", "", "", "Sensed Slots", "", "",
-                                 "EB Scheduling Delay"])
-            csv_writer.writerow([""] + ["AVG", "CI_LL", "CI_UL"] * 3)
-
-        for advertisers in range(1, 11):
-            record = [advertisers]
-
-            if scheduling_method not in {EBSchedulingMethod.ECV, EBSchedulingMethod.ECH}:
-                joining_time_samples = [row[0] for row in c.execute(
-                    '''SELECT time FROM joining_time_samples WHERE neighboring_advertisers=?''',
-                    (advertisers,))]
-
-                res = bs.bootstrap(numpy.asarray(joining_time_samples), stat_func=bs_stats.mean, num_iterations=1000)
-                record += [res.value, res.lower_bound, res.upper_bound]
-
-            else:
-                joining_time_samples = []
-                sensed_slots_samples = []
-                eb_scheduling_delay_samples = []
-                for row in c.execute('''SELECT * FROM joining_time_samples WHERE neighboring_advertisers=?''',
-                                     (advertisers,)):
-                    joining_time_samples.append(row["time"])
-                    sensed_slots_samples.append(row["num_adv_slots_sensed"])
-                    eb_scheduling_delay_samples.append(row["eb_scheduling_delay"])
-
-                res = bs.bootstrap(numpy.asarray(joining_time_samples), stat_func=bs_stats.mean, num_iterations=1000)
-                record += [res.value, res.lower_bound, res.upper_bound]
-                res = bs.bootstrap(numpy.asarray(sensed_slots_samples), stat_func=bs_stats.mean, num_iterations=1000)
-                record += [res.value, res.lower_bound, res.upper_bound]
-                res = bs.bootstrap(numpy.asarray(eb_scheduling_delay_samples), stat_func=bs_stats.mean,
-                                   num_iterations=1000)
-                record += [res.value, res.lower_bound, res.upper_bound]
+    rows = rows[numpy.argsort(rows[:, 0], kind="stable")]
+    sweep_points, first_rows = numpy.unique(rows[:, 0], return_index=True)
+    return {int(sweep_point): samples for sweep_point, samples in
+            zip(sweep_points, numpy.split(rows[:, 1:].T, first_rows[1:], axis=1))}
 
-            csv_writer.writerow(record)
 
-for sim in simulations_with_mobile_node:
-    scheduling_method = sim[0]
-    atp_enabled = sim[1] if len(sim) == 2 else False
-    db_name = "{}{}".format(scheduling_method.name, ("_with_ATP" if atp_enabled else ""))
-    db_conn = sqlite3.connect(os.path.join("statistics", "mobile_joining_node", "{}.db".format(db_name)))
-    db_conn.row_factory = sqlite3.Row
-    c = db_conn.cursor()
-    export_file = os.path.join("filtered_statistics", "mobile_joining_node", "{}.csv".format(db_name))
+def read_samples(db_path, table, sweep_column, metric_columns):
+    """
+    Reads the samples of a database with a single scan of the samples table and groups them in memory per sweep point.
+    :param db_path: the path of the database
+    :type db_path: str
+    :param table: the table of the samples
+    :type table: str
+    :param sweep_column: the column that holds the sweep point (e.g. the number of advertisers) of a sample
+    :type sweep_column: str
+    :param metric_columns: the columns of the metrics
+    :type metric_columns: (str, ...)
+    :return: the samples of each sweep point, as an array with one row per metric
+    :rtype: dict[int, numpy.ndarray]
+    """
+    db_conn = sqlite3.connect(db_path)
+    try:
+        rows = numpy.asarray(db_conn.execute(
+            "SELECT {} FROM {}".format(", ".join((sweep_column,) + metric_columns), table)).fetchall(), dtype=float)
+    finally:
+        db_conn.close()
+
+    return group_by_sweep_point(rows)
+
+
+class ExportCache:
+    """
+    Stores the exported statistics per (database, sweep point), together with a fingerprint of the samples of the sweep
+    point. The fingerprint consists of the number of samples, the max rowid and the sum of the first metric, so it
+    changes when samples are added, removed or the database is recreated by a new run of the sweep.
+    The cache is an Sqlite database that can be shared by the processes that export the databases.
+    """
+
+    def __init__(self, path):
+        """
+        :param path: the path of the cache database
+        :type path: str
+        """
+        self.__db_conn = sqlite3.connect(path, timeout=60)
+        self.__db_conn.execute('''CREATE TABLE IF NOT EXISTS export_cache (db_path TEXT, metrics TEXT,
+        sweep_point INTEGER, num_rows INTEGER, max_rowid INTEGER, metric_sum REAL, statistics TEXT,
+        PRIMARY KEY (db_path, metrics, sweep_point))''')
+        self.__db_conn.commit()
+
+    def get(self, db_path, metrics, sweep_point, fingerprint):
+        """
+        :return: the cached statistics (value, lower bound and upper bound per metric) if the fingerprint has not been
+        changed, otherwise None
+        :rtype: list[list[float]] | None
+        """
+        row = self.__db_conn.execute(
+            '''SELECT num_rows, max_rowid, metric_sum, statistics FROM export_cache
+            WHERE db_path=? AND metrics=? AND sweep_point=?''', (db_path, metrics, sweep_point)).fetchone()
+
+        if row is None or tuple(row[:3]) != fingerprint:
+            return None
+
+        return json.loads(row[3])
+
+    def put(self, db_path, metrics, sweep_point, fingerprint, statistics):
+        self.__db_conn.execute(
+            '''INSERT OR REPLACE INTO export_cache (db_path, metrics, sweep_point, num_rows, max_rowid, metric_sum,
+            statistics) VALUES (?, ?, ?, ?, ?, ?, ?)''',
+            (db_path, metrics, sweep_point) + fingerprint + (json.dumps(statistics),))
+        self.__db_conn.commit()
+
+    def close(self):
+        self.__db_conn.close()
+
+
+def read_fingerprints(db_path, table, sweep_column, metric_columns):
+    """
+    :return: the fingerprint (number of rows, max rowid, sum of the first metric) of the samples of each sweep point
+    :rtype: dict[int, (int, int, float)]
+    """
+    db_conn = sqlite3.connect(db_path)
+    try:
+        return {row[0]: tuple(row[1:]) for row in db_conn.execute(
+            "SELECT {0}, COUNT(*), MAX(rowid), TOTAL({1}) FROM {2} GROUP BY {0}".format(
+                sweep_column, metric_columns[0], table))}
+    finally:
+        db_conn.close()
+
+
+def read_excluded_counts(db_path):
+    """
+    Reads the number of the samples of each sweep point that are excluded from the statistics: the censored ones (see
+    sweep_engine.CensoredSamples) and the ones with unreachable nodes (see sweep_engine.UnreachableSamples). Both the
+    network formations and the rejoining attempts are counted. The databases of an earlier version may not have these
+    tables, in which case no sample is counted.
+    :param db_path: the path of the database
+    :type db_path: str
+    :return: the number of the censored and of the unreachable samples of each sweep point that has at least one
+    :rtype: dict[int, (int, int)]
+    """
+    counts = {}
+
+    db_conn = sqlite3.connect(db_path)
+    try:
+        tables = {row[0] for row in db_conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+        for column, table in enumerate(("censored_samples", "unreachable_samples")):
+            if table not in tables:
+                continue
+            for sweep_point, count in db_conn.execute(
+                    "SELECT sweep_point, COUNT(*) FROM {} GROUP BY sweep_point".format(table)):
+                sweep_point_counts = counts.setdefault(sweep_point, [0, 0])
+                sweep_point_counts[column] = count
+    finally:
+        db_conn.close()
+
+    return {sweep_point: tuple(sweep_point_counts) for sweep_point, sweep_point_counts in counts.items()}
+
+
+def export_database(db_path, export_file, table, sweep_column, metric_columns, sweep_points, header_rows,
+                    cache_path=None):
+    """
+    Exports the average value and the 95% confidence interval of each metric per sweep point, to a CSV file. The last
+    two columns are the numbers of the censored and of the unreachable samples of the sweep point (see
+    read_excluded_counts), which are not included in the statistics.
+    :param db_path: the path of the database with the samples
+    :type db_path: str
+    :param export_file: the path of the CSV file
+    :type export_file: str
+    :param table: the table of the samples
+    :type table: str
+    :param sweep_column: the column that holds the sweep point of a sample
+    :type sweep_column: str
+    :param metric_columns: the columns of the metrics, in the order they are exported
+    :type metric_columns: (str, ...)
+    :param sweep_points: the sweep points to export
+    :type sweep_points: collections.abc.Iterable[int]
+    :param header_rows: the header rows of the CSV file, without the columns of the excluded samples
+    :type header_rows: list[list[str]]
+    :param cache_path: the path of the export cache. If it is given, the statistics are recomputed only for the sweep
+    points whose samples have changed since the last export
+    :type cache_path: str | None
+    """
+    excluded_counts = read_excluded_counts(db_path)
+    # the counts of the excluded samples follow the statistics of the metrics
+    num_columns = 1 + 3 * len(metric_columns)
+    header_rows = [row + [""] * (num_columns - len(row)) + (["Censored", "Unreachable"] if row_idx == 0 else ["", ""])
+                   for row_idx, row in enumerate(header_rows)]
+
+    metrics = "{}/{}".format(",".join(metric_columns), CI_METHOD.name)  # the cached intervals depend on the method
+    cache = ExportCache(cache_path) if cache_path is not None else None
+    fingerprints = read_fingerprints(db_path, table, sweep_column, metric_columns) if cache is not None else {}
+    samples = None
 
     with open(export_file, 'w', newline='') as csv_file:
         csv_writer = csv.writer(csv_file, delimiter=';', quotechar='"', quoting=csv.QUOTE_MINIMAL)
-        csv_writer.writerow(["Advertisers", "Joining Time (s)", "", ""])
-        csv_writer.writerow([""] + ["AVG", "CI_LL", "CI_UL"])
+        csv_writer.writerows(header_rows)
 
-        for num_advertisers in range(10, 151, 10):  # excluding PAN coordinator
-            record = [num_advertisers]
+        for sweep_point in sweep_points:
+            fingerprint = fingerprints.get(sweep_point, (0, None, 0.0))
+            statistics = cache.get(db_path, metrics, sweep_point, fingerprint) if cache is not None else None
 
-            mobile_node_joining_time_samples = []
-            for row in c.execute('''SELECT * FROM mobile_node_joining_time_samples WHERE advertisers=?''',
-                                 (num_advertisers,)):
-                mobile_node_joining_time_samples.append(row["time"])
+            if statistics is None:
+                if samples is None:  # the samples are read only if at least one sweep point has to be recomputed
+                    samples = read_samples(db_path, table, sweep_column, metric_columns)
+
+                # The metrics are measured on the same rows, so they are resampled in one pass
+                statistics = []
+                for metric_res in bootstrap_stats.bootstrap(
+                        samples.get(sweep_point, numpy.empty((len(metric_columns), 0))),
+                        {"mean": bootstrap_stats.mean}, ci_method=CI_METHOD):
+                    res = metric_res["mean"]
+                    statistics.append([res.value, res.lower_bound, res.upper_bound])
+
+                if cache is not None:
+                    cache.put(db_path, metrics, sweep_point, fingerprint, statistics)
+
+            record = [sweep_point]
+            for metric_statistics in statistics:
+                record += metric_statistics
+            record += excluded_counts.get(sweep_point, (0, 0))
 
-            res = bs.bootstrap(numpy.asarray(mobile_node_joining_time_samples), stat_func=bs_stats.mean,
-                               num_iterations=1000)
-            record += [res.value, res.lower_bound, res.upper_bound]
             csv_writer.writerow(record)
 
-for sim in simulations_for_energy:
-    scheduling_method = sim[0]
-    atp_enabled = sim[1] if len(sim) == 2 else False
-    db_name = "{}{}".format(scheduling_method.name, ("_with_ATP" if atp_enabled else ""))
-    db_conn = sqlite3.connect(os.path.join("statistics", "energy_consumption", "{}.db".format(db_name)))
-    db_conn.row_factory = sqlite3.Row
-    c = db_conn.cursor()
-    export_file = os.path.join("filtered_statistics", "energy_consumption", "{}.csv".format(db_name))
+    if cache is not None:
+        cache.close()
+
+
+def export_paired_differences(db_path_a, db_path_b, export_file, table, sweep_column, metric_column, key_columns,
+                              sweep_points, header_rows):
+    """
+    Exports the average value and the 95% confidence interval of the paired differences (A - B) of a metric between two
+    databases, per sweep point. The samples are paired on the sweep point and the key columns, and only the work units
+    that were simulated with the same seed in both databases are taken into account.
+    If one of the databases does not exist, nothing is exported.
+    :param db_path_a: the path of the database A
+    :type db_path_a: str
+    :param db_path_b: the path of the database B
+    :type db_path_b: str
+    :param export_file: the path of the CSV file
+    :type export_file: str
+    :param table: the table of the samples
+    :type table: str
+    :param sweep_column: the column that holds the sweep point of a sample
+    :type sweep_column: str
+    :param metric_column: the column of the metric
+    :type metric_column: str
+    :param key_columns: the columns that identify a sample within a sweep point (e.g. sample_idx and attempt_idx)
+    :type key_columns: (str, ...)
+    :param sweep_points: the sweep points to export
+    :type sweep_points: collections.abc.Iterable[int]
+    :param header_rows: the header rows of the CSV file
+    :type header_rows: list[list[str]]
+    """
+    if not os.path.exists(db_path_a) or not os.path.exists(db_path_b):
+        return
+
+    db_conn = sqlite3.connect(db_path_a)
+    try:
+        db_conn.execute("ATTACH DATABASE ? AS b", (db_path_b,))
+        rows = numpy.asarray(db_conn.execute(
+            '''SELECT a.{sweep}, a.{metric} - b_samples.{metric} FROM main.{table} a
+            JOIN b.{table} b_samples ON a.{sweep} = b_samples.{sweep} AND {keys}
+            JOIN main.completed_units a_units ON a_units.sweep_point = a.{sweep} AND a_units.sample_idx = a.sample_idx
+            JOIN b.completed_units b_units ON b_units.sweep_point = a.{sweep} AND b_units.sample_idx = a.sample_idx
+            WHERE a_units.seed = b_units.seed'''.format(
+                sweep=sweep_column, metric=metric_column, table=table,
+                keys=" AND ".join("a.{0} = b_samples.{0}".format(key) for key in key_columns))).fetchall(),
+            dtype=float).reshape(-1, 2)
+    finally:
+        db_conn.close()
+
+    differences = group_by_sweep_point(rows)
 
     with open(export_file, 'w', newline='') as csv_file:
         csv_writer = csv.writer(csv_file, delimiter=';', quotechar='"', quoting=csv.QUOTE_MINIMAL)
-        csv_writer.writerow(["Nodes", "Energy Consumption (J)", "", ""])
-        csv_writer.writerow([""] + ["AVG", "CI_LL", "CI_UL"])
+        csv_writer.writerows(header_rows)
 
-        for num_nodes in range(10, 151, 10):  # excluding PAN coordinator
-            record = [num_nodes]
+        for sweep_point in sweep_points:
+            res = bootstrap_stats.bootstrap(differences.get(sweep_point, numpy.empty((1, 0))),
+                                            {"mean": bootstrap_stats.mean}, ci_method=CI_METHOD)[0]["mean"]
+            csv_writer.writerow([sweep_point, res.value, res.lower_bound, res.upper_bound])
 
-            energy_consumption_samples = []
-            for row in c.execute('''SELECT * FROM energy_consumption_samples WHERE num_nodes=?''', (num_nodes,)):
-                energy_consumption_samples.append(row["energy_consumption"])
 
-            res = bs.bootstrap(numpy.asarray(energy_consumption_samples), stat_func=bs_stats.mean, num_iterations=1000)
-            record += [res.value, res.lower_bound, res.upper_bound]
-            csv_writer.writerow(record)
+def paired_export_jobs():
+    """
+    :return: the arguments of export_paired_differences for each pair of databases
+    :rtype: list[tuple]
+    """
+    jobs = []
+
+    for folder, comparisons, table, sweep_column, metric_column, key_columns, sweep_points, header in [
+        ("fixed_joining_node", paired_comparisons_with_fixed_nodes, "joining_time_samples", "neighboring_advertisers",
+         "time", ("sample_idx", "attempt_idx"), range(1, 11), ["Neighboring Advertisers", "Joining Time Diff. (s)"]),
+        ("mobile_joining_node", paired_comparisons_with_mobile_node, "mobile_node_joining_time_samples", "advertisers",
+         "time", ("sample_idx", "attempt_idx"), range(10, 151, 10), ["Advertisers", "Joining Time Diff. (s)", "", ""]),
+        ("energy_consumption", paired_comparisons_for_energy, "energy_consumption_samples", "num_nodes",
+         "energy_consumption", ("sample_idx",), range(10, 151, 10), ["Nodes", "Energy Consumption Diff. (J)", "", ""])
+    ]:
+        for db_name_a, db_name_b in comparisons:
+            jobs.append((os.path.join("statistics", folder, "{}.db".format(db_name_a)),
+                         os.path.join("statistics", folder, "{}.db".format(db_name_b)),
+                         os.path.join("filtered_statistics", folder, "paired",
+                                      "{}_vs_{}.csv".format(db_name_a, db_name_b)),
+                         table, sweep_column, metric_column, key_columns, sweep_points,
+                         [header, [""] + ["AVG", "CI_LL", "CI_UL"]]))
+
+    return jobs
+
+
+def export_jobs():
+    """
+    :return: the arguments of export_database for each database
+    :rtype: list[tuple]
+    """
+    jobs = []
+
+    for sim in simulations_with_fixed_nodes:
+        scheduling_method = sim[0]
+        selected_scenario = sim[1]
+        atp_enabled = sim[2] if len(sim) == 3 else False
+
+        db_name = "{}{}{}".format(scheduling_method.name, ("_with_ATP" if atp_enabled else ""),
+                                  ("_{}".format(selected_scenario.name) if selected_scenario is not Scenario.ANY
+                                   else ""))
+
+        if scheduling_method not in {EBSchedulingMethod.ECV, EBSchedulingMethod.ECH}:
+            metric_columns = ("time",)
+            header_rows = [["Neighboring Advertisers", "Joining Time (s)"], [""] + ["AVG", "CI_LL", "CI_UL"]]
+        else:
+            metric_columns = ("time", "num_adv_slots_sensed", "eb_scheduling_delay")
+            header_rows = [["Neighboring Advertisers", "Joining Time (s)", "", "", "Sensed Slots", "", "",
+                            "EB Scheduling Delay"], [""] + ["AVG", "CI_LL", "CI_UL"] * 3]
+
+        jobs.append((os.path.join("statistics", "fixed_joining_node", "{}.db".format(db_name)),
+                     os.path.join("filtered_statistics", "fixed_joining_node", "{}.csv".format(db_name)),
+                     "joining_time_samples", "neighboring_advertisers", metric_columns, range(1, 11), header_rows))
+
+    for sim in simulations_with_mobile_node:
+        scheduling_method = sim[0]
+        atp_enabled = sim[1] if len(sim) == 2 else False
+        db_name = "{}{}".format(scheduling_method.name, ("_with_ATP" if atp_enabled else ""))
+
+        jobs.append((os.path.join("statistics", "mobile_joining_node", "{}.db".format(db_name)),
+                     os.path.join("filtered_statistics", "mobile_joining_node", "{}.csv".format(db_name)),
+                     "mobile_node_joining_time_samples", "advertisers", ("time",),
+                     range(10, 151, 10),  # excluding PAN coordinator
+                     [["Advertisers", "Joining Time (s)", "", ""], [""] + ["AVG", "CI_LL", "CI_UL"]]))
+
+    for sim in simulations_for_energy:
+        scheduling_method = sim[0]
+        atp_enabled = sim[1] if len(sim) == 2 else False
+        db_name = "{}{}".format(scheduling_method.name, ("_with_ATP" if atp_enabled else ""))
+
+        jobs.append((os.path.join("statistics", "energy_consumption", "{}.db".format(db_name)),
+                     os.path.join("filtered_statistics", "energy_consumption", "{}.csv".format(db_name)),
+                     "energy_consumption_samples", "num_nodes", ("energy_consumption",),
+                     range(10, 151, 10),  # excluding PAN coordinator
+                     [["Nodes", "Energy Consumption (J)", "", ""], [""] + ["AVG", "CI_LL", "CI_UL"]]))
+
+    return jobs
+
+
+if __name__ == '__main__':
+    PROCESSES_TO_USE = multiprocessing.cpu_count()
+
+    os.makedirs(os.path.join("filtered_statistics", "fixed_joining_node"), exist_ok=True)
+    os.makedirs(os.path.join("filtered_statistics", "mobile_joining_node"), exist_ok=True)
+    os.makedirs(os.path.join("filtered_statistics", "energy_consumption"), exist_ok=True)
+    for folder in ("fixed_joining_node", "mobile_joining_node", "energy_consumption"):
+        os.makedirs(os.path.join("filtered_statistics", folder, "paired"), exist_ok=True)
+
+    # The statistics of the sweep points whose samples have not changed since the last export are taken from the cache
+    cache_path = os.path.join("filtered_statistics", "export_cache.db")
+
+    # The databases are independent, so they are exported concurrently
+    with Pool(processes=PROCESSES_TO_USE) as pool:
+        pool.starmap(export_database, [job + (cache_path,) for job in export_jobs()])
+        pool.starmap(export_paired_differences, paired_export_jobs())
@@ -1,113 +1,449 @@
 import math
 import multiprocessing
 import os
-import random
 import sqlite3
-from multiprocessing.pool import Pool
+import time
+from functools import partial
+from multiprocessing.pool import Pool, ThreadPool
 
-from pandas import Timedelta
+import numpy
 
-from ieee802154.tsch.joining_phase_simulator import JoiningPhaseSimulator, EBSchedulingMethod
+from ieee802154.duration import Duration
+from ieee802154.tsch.joining_phase_simulator import (JoiningPhaseSimulator, EBSchedulingMethod,
+                                                     SimulationHorizonExceeded, SimulationNotCompleted,
+                                                     UnreachableNodes)
+from ieee802154.tsch.batch_simulator import BatchJoiningPhaseSimulator, SUPPORTED_SCHEDULING_METHODS
 from ieee802154.node import Node, NodeType
 from ieee802154.node_group import NodeGroup, NodeGroupProperties
 from ieee802154.pan_coordinator import PANCoordinator
 from ieee802154.tsch import timeslot_template
+from ieee802154 import topology
+from sweep_engine import (AdaptiveStopping, CensoredSamples, OutlierCapture, SimulatorStatsLog, SweepCheckpoint,
+                          SweepTelemetry, UnreachableSamples, add_missing_columns, unit_numpy_randgen, unit_randgen,
+                          unit_seed, work_unit_batches)
+from topology_cache import TopologyCache
 
+# The configuration of the network
+AREA_DIMENSIONS = (100, 100)  # in meters
+MULTISLOTFRAME_LENGTH = 5  # in slotframes. It is identical to the Enhanced Beacon Interval (EBI)
+SLOTFRAME_LENGTH = 101
+SCANNING_DURATION = (
+        2 * MULTISLOTFRAME_LENGTH * SLOTFRAME_LENGTH
+        * timeslot_template.defaultTimeslotTemplateFor2450MHzBand.mac_ts_timeslot_length
+)
 
-def main(scheduling_method, atp_enabled=False):
+NUM_CHANNELS = 16
+EB_LENGTH = 50  # in bytes
+CHANNEL_SWITCHING_TIME = Duration(200, unit="us")
+TX_POWER = 0  # dBm
+SENSITIVITY = -100  # dBm
+# According to the path loss model that is used (see the function __rx_power in the class JoiningPhaseSimulator),
+# with tx_power = 0 and sensitivity = -100 the guaranteed range is 17m and the max possible distance of a receiver
+# is 60m.
+
+# The generation of the topologies
+RADIO_RANGE = 17  # in meters; the guaranteed range (see above), within which each advertiser has another advertiser
+MAX_BOOT_TIME = 100  # in seconds; the boot times of the nodes (except the PAN coordinator) are uniform in [0, 100)
+
+
+def network_config():
+    """
+    :return: the configuration of the network, which is stored with the configuration of a sweep, so that a sweep is
+    not resumed after a change of the network (see sweep_engine.SweepCheckpoint)
+    :rtype: dict
+    """
+    return {"area_dimensions": AREA_DIMENSIONS, "slotframe_length": SLOTFRAME_LENGTH,
+            "multislotframe_length": MULTISLOTFRAME_LENGTH, "scanning_duration": SCANNING_DURATION.total_seconds(),
+            "num_channels": NUM_CHANNELS, "eb_length": EB_LENGTH,
+            "channel_switching_time": CHANNEL_SWITCHING_TIME.total_seconds(), "tx_power": TX_POWER,
+            "sensitivity": SENSITIVITY}
+
+
+def topology_parameters():
+    """
+    :return: the parameters of the generation of the topologies (see the function generate_topology), which are a
+    component of the keys of the topology cache, so that the topologies are regenerated after a change of them (see
+    topology_cache.TopologyCache)
+    :rtype: dict
+    """
+    return {"area_dimensions": AREA_DIMENSIONS, "radio_range": RADIO_RANGE, "max_boot_time": MAX_BOOT_TIME}
+
+
+def generate_topology(area_dimensions, num_advertisers, num_mobile_nodes, rng):
+    """
+    Generates the positions and the boot times of the nodes of a topology sample. The topology does not depend on the
+    scheduling method, so that in a paired experiment all the methods are simulated on the same topologies.
+    :param area_dimensions: the area dimensions, in meters
+    :type area_dimensions: (int | float, int | float)
+    :param num_advertisers: the number of advertisers, excluding the PAN coordinator
+    :type num_advertisers: int
+    :param num_mobile_nodes: the number of mobile nodes
+    :type num_mobile_nodes: int
+    :param rng: the random generator of the topology
+    :type rng: numpy.random.Generator
+    :return: the node table of the topology (see topology_cache.TopologyCache), with the nodes in the following order:
+    the PAN coordinator, the other advertisers and the mobile nodes
+    :rtype: numpy.ndarray
+    """
+    # the advertisers (the first one is the PAN coordinator) form a connected field: each one is in the guaranteed
+    # range of an already placed advertiser
+    positions = numpy.concatenate(
+        (topology.connected_random_field(area_dimensions, num_advertisers + 1, RADIO_RANGE, rng),
+         rng.random((num_mobile_nodes, 2)) * area_dimensions))  # the mobile nodes
+
+    boot_times = rng.random(len(positions)) * MAX_BOOT_TIME
+    boot_times[0] = 0  # the PAN coordinator
+
+    return numpy.column_stack((positions, boot_times))
+
+
+def node_ids(scheduling_method, atp_enabled, num_advertisers, num_mobile_nodes, seed):
+    """
+    :param num_advertisers: the number of advertisers, excluding the PAN coordinator
+    :type num_advertisers: int
+    :return: the ids of the nodes of a work unit, in the order of the node table (the PAN coordinator, the other
+    advertisers and the mobile nodes)
+    :rtype: list[int]
+    """
+    # Note that, the ids of advertisers affect only (E)CFAS
+    if scheduling_method in {EBSchedulingMethod.ECFASH, EBSchedulingMethod.ECFASV}:
+        # ids for advertisers except the PAN coordinator
+        num_available_ids = (math.ceil((num_advertisers - 1) / (
+                (NUM_CHANNELS - 1) * MULTISLOTFRAME_LENGTH * (2 if atp_enabled else 1)))
+                             * MULTISLOTFRAME_LENGTH * (NUM_CHANNELS - 1) * (2 if atp_enabled else 1))
+    else:
+        # ids for advertisers including the PAN coordinator
+        num_available_ids = (math.ceil(
+            num_advertisers / (NUM_CHANNELS * MULTISLOTFRAME_LENGTH * (2 if atp_enabled else 1)))
+                             * MULTISLOTFRAME_LENGTH * NUM_CHANNELS * (2 if atp_enabled else 1))
+
+    # in random order
+    available_ids = unit_randgen(seed, "ids").sample(range(num_available_ids), k=num_available_ids)
+
+    pc_id = (available_ids.pop() if scheduling_method not in {EBSchedulingMethod.ECFASH, EBSchedulingMethod.ECFASV}
+             else num_available_ids)
+    advertiser_ids = [available_ids.pop() for _ in range(num_advertisers)]
+
+    # The mobile nodes are not advertisers. We select ids that do not collide with the advertisers' ids
+    mobile_node_ids = [num_available_ids + i + 1 for i in range(num_mobile_nodes)]
+
+    return [pc_id] + advertiser_ids + mobile_node_ids
+
+
+def create_node_group(scheduling_method, atp_enabled, nodes, num_mobile_nodes, seed, node_group=None,
+                      area_dimensions=None):
+    """
+    Creates the node group of a work unit. A unit depends only on these arguments, so it can be re-created from its
+    recorded seed and topology (see replay.py). The node group of a previous topology sample of the same sweep point
+    can be reset instead (see NodeGroup.reset), which gives an identical group without the construction of its nodes.
+    :param scheduling_method: the EB scheduling method
+    :type scheduling_method: EBSchedulingMethod
+    :param atp_enabled: whether ATP is enabled
+    :type atp_enabled: bool
+    :param nodes: the node table of the topology (see the function generate_topology)
+    :type nodes: numpy.ndarray
+    :param num_mobile_nodes: the number of mobile nodes, which are the last nodes of the node table
+    :type num_mobile_nodes: int
+    :param seed: the seed of the unit
+    :type seed: int
+    :param node_group: a node group of the same scheduling method, ATP and number of nodes to be reset, or None
+    :type node_group: NodeGroup | None
+    :param area_dimensions: the area dimensions of a new node group, in meters. If it is None, AREA_DIMENSIONS is used
+    :type area_dimensions: (int | float, int | float) | None
+    :return: the node group
+    :rtype: NodeGroup
+    """
+    num_advertisers = len(nodes) - 1 - num_mobile_nodes
+    ids = node_ids(scheduling_method, atp_enabled, num_advertisers, num_mobile_nodes, seed)
+    boot_times = [Duration(float(boot_time), unit="s") for boot_time in nodes[:, 2]]
+
+    if node_group is not None:
+        node_group.reset([(float(x), float(y)) for x, y in nodes[:, :2]], boot_times, ids,
+                         unit_randgen(seed, "node_group").getrandbits(63))
+        return node_group
+
+    ng = NodeGroup(NodeGroupProperties(250000, AREA_DIMENSIONS if area_dimensions is None else area_dimensions),
+                   unit_randgen(seed, "node_group").getrandbits(63))
+
+    PANCoordinator(ids[0], (float(nodes[0, 0]), float(nodes[0, 1])), TX_POWER, SENSITIVITY, boot_times[0],
+                   CHANNEL_SWITCHING_TIME, ng)
+
+    num_fixed_nodes = len(nodes) - num_mobile_nodes
+    for node_id, (x, y), boot_time in zip(ids[1:num_fixed_nodes], nodes[1:num_fixed_nodes, :2],
+                                          boot_times[1:num_fixed_nodes]):
+        Node(node_id, (float(x), float(y)), False, NodeType.FFD, TX_POWER, SENSITIVITY, boot_time,
+             CHANNEL_SWITCHING_TIME, ng)
+
+    for node_id, (x, y), boot_time in zip(ids[num_fixed_nodes:], nodes[num_fixed_nodes:, :2],
+                                          boot_times[num_fixed_nodes:]):
+        Node(node_id, (float(x), float(y)), True, NodeType.RFD, TX_POWER, SENSITIVITY, boot_time,
+             CHANNEL_SWITCHING_TIME, ng)
+
+    return ng
+
+
+def simulator_arguments(scheduling_method, atp_enabled):
+    """
+    :return: the arguments of JoiningPhaseSimulator and BatchJoiningPhaseSimulator that follow the node group(s), up to
+    the seed
+    :rtype: tuple
+    """
+    return (scheduling_method, timeslot_template.defaultTimeslotTemplateFor2450MHzBand, SLOTFRAME_LENGTH, EB_LENGTH,
+            NUM_CHANNELS, SCANNING_DURATION, MULTISLOTFRAME_LENGTH, atp_enabled)
+
+
+def create_unit(scheduling_method, atp_enabled, nodes, num_mobile_nodes, seed, horizon=None, simulator=None,
+                area_dimensions=None, **simulator_options):
+    """
+    Creates the simulator of a work unit, which simulates the topology samples one by one (see create_node_group).
+    :param horizon: the horizon of the simulator
+    :type horizon: ieee802154.duration.Duration | None
+    :param simulator: the simulator of a previous topology sample of the same sweep point to be reset, or None. Its
+    horizon and options are kept
+    :type simulator: JoiningPhaseSimulator | None
+    :param area_dimensions: the area dimensions of a new simulator (see create_node_group)
+    :type area_dimensions: (int | float, int | float) | None
+    :param simulator_options: further keyword arguments of JoiningPhaseSimulator (e.g. collect_stats, trace_recorder)
+    :rtype: JoiningPhaseSimulator
+    """
+    if simulator is not None:
+        create_node_group(scheduling_method, atp_enabled, nodes, num_mobile_nodes, seed, simulator.node_group)
+        simulator.reset(unit_randgen(seed, "simulator").getrandbits(63))
+        return simulator
+
+    return JoiningPhaseSimulator(create_node_group(scheduling_method, atp_enabled, nodes, num_mobile_nodes, seed,
+                                                   area_dimensions=area_dimensions),
+                                 *simulator_arguments(scheduling_method, atp_enabled),
+                                 unit_randgen(seed, "simulator").getrandbits(63), horizon, **simulator_options)
+
+
+def create_batch(scheduling_method, atp_enabled, node_groups, seeds, horizon=None):
+    """
+    Creates the batch engine of several work units, which simulates their topology samples in lock-step. Each replica
+    is simulated with the seed of its unit, so a unit can also be re-created alone, as a batch of one replica (see
+    replay.py).
+    :param node_groups: the node groups of the units (see create_node_group)
+    :type node_groups: list[NodeGroup]
+    :param seeds: the seeds of the units
+    :type seeds: list[int]
+    :param horizon: the horizon of the simulator
+    :type horizon: ieee802154.duration.Duration | None
+    :rtype: BatchJoiningPhaseSimulator
+    """
+    return BatchJoiningPhaseSimulator(node_groups, *simulator_arguments(scheduling_method, atp_enabled),
+                                      [unit_randgen(seed, "simulator").getrandbits(63) for seed in seeds], horizon)
+
+
+def main(scheduling_method, atp_enabled=False, stopping_rule=None, paired=False, topology_cache_dir=None,
+         horizon=None, store_node_breakdown=False, batch_size=1, collect_stats=False, telemetry=None,
+         outlier_capture=None, fresh=False):
     db_name = "{}{}".format(scheduling_method.name, ("_with_ATP" if atp_enabled else ""))
-    db_conn = sqlite3.connect(os.path.join("statistics", "energy_consumption", "{}.db".format(db_name)))
+
+    # In a paired experiment, the seeds of the work units do not depend on the scheduling method, so all the methods
+    # are simulated on the same topologies
+    seed_stream = "energy_consumption" if paired else db_name
+
+    # The topologies are shared through the cache by all the methods that are simulated on them
+    topology_cache = TopologyCache(topology_cache_dir) if topology_cache_dir is not None else None
+
+    db_path = os.path.join("statistics", "energy_consumption", "{}.db".format(db_name))
+    if fresh and os.path.exists(db_path):
+        os.remove(db_path)  # the sweep starts over, e.g. after a change of its configuration
+    db_conn = sqlite3.connect(db_path)
     c = db_conn.cursor()
-    c.execute('''CREATE TABLE energy_consumption_samples (num_nodes INTEGER, energy_consumption REAL)''')
+    # The tables are kept if they exist, so that an interrupted sweep is resumed
+    c.execute('''CREATE TABLE IF NOT EXISTS energy_consumption_samples (num_nodes INTEGER, energy_consumption REAL,
+    sample_idx INTEGER)''')
+    # the table of an earlier version of the command has no indices of the samples
+    add_missing_columns(db_conn, "energy_consumption_samples", [("sample_idx", "INTEGER")])
+    c.execute('''CREATE INDEX IF NOT EXISTS num_nodes_index ON energy_consumption_samples (num_nodes)''')
+    if store_node_breakdown:
+        # The energy consumption of each node, broken down per radio activity (see
+        # JoiningPhaseSimulator.energy_breakdown)
+        c.execute('''CREATE TABLE IF NOT EXISTS node_energy_consumption_samples (num_nodes INTEGER, sample_idx INTEGER,
+        node_id INTEGER, is_mobile INTEGER, sync REAL, eb_tx REAL, idle REAL, sensing REAL)''')
+        c.execute('''CREATE INDEX IF NOT EXISTS node_num_nodes_index ON node_energy_consumption_samples (num_nodes)''')
 
     db_conn.commit()
 
+    # The batch engine does not collect stats, so the topology samples are simulated one by one when the stats are
+    # collected
+    batch_engine = batch_size > 1 and scheduling_method in SUPPORTED_SCHEDULING_METHODS and not collect_stats
+
+    # the configuration of the units, which is needed to replay them (see replay.py) and to resume the sweep only with
+    # the same configuration. The topology samples that are simulated by the batch engine are replayed by the batch
+    # engine, as batches of one replica
+    checkpoint = SweepCheckpoint(db_conn, {
+        "command": "sim_for_energy_consumption", "scheduling_method": scheduling_method.name,
+        "atp_enabled": atp_enabled, "seed_stream": seed_stream,
+        "horizon": None if horizon is None else horizon.total_seconds(), "batch_size": batch_size,
+        "batch_engine": batch_engine, "network": network_config(), "topology": topology_parameters()})
+    censored_samples = CensoredSamples(db_conn)
+    unreachable_samples = UnreachableSamples(db_conn)
+    simulator_stats = SimulatorStatsLog(db_conn) if collect_stats else None
+    slow_samples = outlier_capture.recorder(db_conn) if outlier_capture is not None else None
+
     node_groups_samples_per_test = 1000
-    multislotframe_length = 5  # in slotframes. It is identical to the Enhanced Beacon Interval (EBI)
-    slotframe_length = 101
-    scanning_duration = (
-            2 * multislotframe_length * slotframe_length
-            * timeslot_template.defaultTimeslotTemplateFor2450MHzBand.mac_ts_timeslot_length
-    )
-
-    num_channels = 16
-    eb_length = 50  # in bytes
-    randomIns = random.Random()
-    channel_switching_time = Timedelta(200, unit="us")
-    tx_power = 0  # dBm
-    sensitivity = -100  # dBm
-    # According to the path loss model that is used (see the function __rx_power in the class JoiningPhaseSimulator),
-    # with tx_power = 0 and sensitivity = -100 the guaranteed range is 17m and the max possible distance of a receiver
-    # is 60m.ls
-
-    for num_nodes in range(10, 151, 10):
-        node_group_samples = 0
+
+    sweep_points = range(10, 151, 10)  # the number of nodes
+
+    # the progress telemetry of the sweep (with a stopping rule, the max number of units is used for the ETA)
+    units_per_point = node_groups_samples_per_test if stopping_rule is None else stopping_rule.max_units
+    progress = (None if telemetry is None else telemetry.stream(
+        "energy_consumption.{}".format(db_name), len(sweep_points) * units_per_point,
+        sum(len(checkpoint.completed_units(sweep_point)) for sweep_point in sweep_points)))
+
+    for num_nodes in sweep_points:
+        # the samples of the sweep point are needed only for the adaptive number of topology samples
+        point_samples = [] if stopping_rule is None else [row[0] for row in c.execute(
+            '''SELECT energy_consumption FROM energy_consumption_samples WHERE num_nodes=?''', (num_nodes,))]
 
         num_mobile_nodes = int(0.1 * num_nodes)
         num_advertisers = num_nodes - num_mobile_nodes
 
-        while node_group_samples < node_groups_samples_per_test:
+        # the node groups or the simulators of the previous batch, which are reset for the next one
+        node_groups, simulators = [], []
+        # The topology samples are simulated in batches of replicas by the batch engine, when it supports the scheduling
+        # method. Otherwise, they are simulated one by one. The stopping rule is checked between the batches
+        for batch in work_unit_batches(checkpoint, num_nodes, node_groups_samples_per_test,
+                                       batch_size if batch_engine else 1, stopping_rule, point_samples):
+            if progress is not None:
+                progress.unit_started()
 
-            # Note that, the ids of advertisers affect only (E)CFAS
-            if scheduling_method in {EBSchedulingMethod.ECFASH, EBSchedulingMethod.ECFASV}:
-                # ids for advertisers except the PAN coordinator
-                num_available_ids = (math.ceil(
-                    (num_advertisers - 1) / ((num_channels - 1) * multislotframe_length * (2 if atp_enabled else 1)))
-                                     * multislotframe_length * (num_channels - 1) * (2 if atp_enabled else 1))
+            seeds = [unit_seed(seed_stream, num_nodes, sample_idx) for sample_idx in batch]
+            topologies = []
+            for sample_idx, seed in zip(batch, seeds):
+                generate = partial(generate_topology, AREA_DIMENSIONS, num_advertisers, num_mobile_nodes,
+                                   unit_numpy_randgen(seed, "topology"))
+                topologies.append(generate() if topology_cache is None else
+                                  topology_cache.get("energy_consumption", num_nodes, sample_idx, seed,
+                                                     topology_parameters(), generate))
+
+            if batch_engine:
+                # the node groups of the previous batch are reset (the last batch of a sweep point may be smaller)
+                node_groups = [create_node_group(scheduling_method, atp_enabled, nodes, num_mobile_nodes, seed,
+                                                 node_groups[replica] if replica < len(node_groups) else None)
+                               for replica, (nodes, seed) in enumerate(zip(topologies, seeds))]
+                simulator = create_batch(scheduling_method, atp_enabled, node_groups, seeds, horizon)
+                start_time = time.perf_counter()
+                results = simulator.execute()
+                # the replicas are simulated together, so each one is given an equal share of the wall time of the
+                # batch
+                wall_times = [(time.perf_counter() - start_time) / len(batch)] * len(batch)
+                breakdowns = simulator.energy_breakdowns() if store_node_breakdown else [None] * len(batch)
             else:
-                # ids for advertisers including the PAN coordinator
-                num_available_ids = (math.ceil(
-                    num_advertisers / (num_channels * multislotframe_length * (2 if atp_enabled else 1)))
-                                     * multislotframe_length * num_channels * (2 if atp_enabled else 1))
+                # the breakdowns refer to the nodes, so each topology sample of the batch has its own simulator
+                simulators = [create_unit(scheduling_method, atp_enabled, nodes, num_mobile_nodes, seed, horizon,
+                                          simulators[replica] if replica < len(simulators) else None,
+                                          collect_stats=collect_stats)
+                              for replica, (nodes, seed) in enumerate(zip(topologies, seeds))]
+                results, breakdowns, wall_times = [], [], []
+                for simulator in simulators:
+                    start_time = time.perf_counter()
+                    try:
+                        results.append(simulator.execute())
+                    except SimulationNotCompleted as e:
+                        results.append(e)
+                        breakdowns.append(None)
+                    else:
+                        breakdowns.append(simulator.energy_breakdown() if store_node_breakdown else None)
+                    wall_times.append(time.perf_counter() - start_time)
 
-            available_ids = randomIns.sample(range(num_available_ids), k=num_available_ids)  # in random order
+                    if simulator_stats is not None:
+                        simulator_stats.add(num_nodes, simulator.stats)
 
-            ng = NodeGroup(NodeGroupProperties(250000, (100, 100)))
-            pc_id = (available_ids.pop() if scheduling_method not in {EBSchedulingMethod.ECFASH,
-                                                                      EBSchedulingMethod.ECFASV} else num_available_ids)
+            for sample_idx, seed, nodes, result, breakdown, wall_time in zip(batch, seeds, topologies, results,
+                                                                             breakdowns, wall_times):
+                if slow_samples is not None and not isinstance(result, UnreachableNodes):
+                    slow_samples.check(num_nodes, sample_idx, None, seed, nodes, wall_time,
+                                       None if isinstance(result, SimulationHorizonExceeded) else result[0])
 
-            PANCoordinator(pc_id, (ng.properties.area_dimensions[0] * randomIns.random(),
-                                   ng.properties.area_dimensions[1] * randomIns.random()), tx_power, sensitivity,
-                           Timedelta(0), channel_switching_time, ng)
+                if isinstance(result, UnreachableNodes):
+                    # the topology is not connected, so the sample is undefined rather than censored
+                    unreachable_samples.add(num_nodes, sample_idx, None, result)
+                elif isinstance(result, SimulationHorizonExceeded):
+                    censored_samples.add(num_nodes, sample_idx, None, type(result).__name__)
+                else:
+                    energy_consumption = result[1]
+                    c.execute('''INSERT INTO energy_consumption_samples (num_nodes, energy_consumption, sample_idx)
+                    VALUES(?, ?, ?)''', (num_nodes, energy_consumption, sample_idx))
+                    point_samples.append(energy_consumption)
 
-            # create the fixed nodes/advertisers (except the PAN coordinator)
-            for _ in range(num_advertisers):
-                while True:
-                    # find a random position that is in the guaranteed range of an already created node
+                    if store_node_breakdown:
+                        c.executemany('''INSERT INTO node_energy_consumption_samples (num_nodes, sample_idx,
+                        node_id, is_mobile, sync, eb_tx, idle, sensing) VALUES (?, ?, ?, ?, ?, ?, ?, ?)''', (
+                            (num_nodes, sample_idx, node.id, node.is_mobile, sync, eb_tx, idle, sensing)
+                            for node, sync, eb_tx, idle, sensing in zip(
+                                breakdown.nodes, breakdown.sync.tolist(), breakdown.eb_tx.tolist(),
+                                breakdown.idle.tolist(), breakdown.sensing.tolist())
+                        ))
 
-                    position = (ng.properties.area_dimensions[0] * randomIns.random(),
-                                ng.properties.area_dimensions[1] * randomIns.random())
+                checkpoint.mark_completed(num_nodes, sample_idx, seed)
 
-                    # check if at least one (fixed) node has this position in its range
-                    if not all(node.distance_from_point(position) > 17 for node in ng):
-                        break
+            db_conn.commit()
+            if progress is not None:
+                progress.unit_completed(
+                    formations=len(batch), units=len(batch),
+                    samples=sum(not isinstance(result, SimulationNotCompleted) for result in results))
 
-                Node(available_ids.pop(), position, False, NodeType.FFD, tx_power, sensitivity,
-                     Timedelta(randomIns.random() * 100, unit="s"), channel_switching_time, ng)
+    if progress is not None:
+        progress.close()
+    db_conn.close()
 
-            # create the mobile nodes
-            for i in range(num_mobile_nodes):
-                initial_pos = (ng.properties.area_dimensions[0] * randomIns.random(),
-                               ng.properties.area_dimensions[1] * randomIns.random())
 
-                # The mobile node is not an advertiser. We select an id that does not collide with the advertisers' ids
-                mobile_node_id = num_available_ids + i + 1
-                Node(mobile_node_id, initial_pos, True, NodeType.RFD, tx_power, sensitivity,
-                     Timedelta(randomIns.random() * 100, unit="s"), channel_switching_time, ng)
+# Set ADAPTIVE_STOPPING to e.g. AdaptiveStopping(relative_half_width=0.02) to determine the number of topology
+# samples of each sweep point adaptively, based on the confidence interval of the mean energy consumption
+ADAPTIVE_STOPPING = None
 
-            simulator = JoiningPhaseSimulator(
-                ng, scheduling_method, timeslot_template.defaultTimeslotTemplateFor2450MHzBand,
-                slotframe_length, eb_length, num_channels, scanning_duration, multislotframe_length, atp_enabled)
+# In paired experiments, all the scheduling methods are simulated on the same topologies (common random numbers),
+# and results_export.py exports the confidence intervals of their paired differences
+PAIRED_EXPERIMENTS = False
 
-            energy_consumption = simulator.execute()[1]
-            c.execute('''INSERT INTO energy_consumption_samples (num_nodes, energy_consumption) VALUES(?, ?)''',
-                      (num_nodes, energy_consumption))
+# The generated topologies are stored on disk and are reused by all the methods (and runs) that share them
+TOPOLOGY_CACHE_DIR = os.path.join("statistics", "topology_cache")
 
-            node_group_samples += 1
+# A network formation or a rejoining attempt that is not completed within SIMULATION_HORIZON (simulated time) is
+# recorded as a censored sample (table censored_samples) instead of running indefinitely
+SIMULATION_HORIZON = Duration(2, unit="h")
 
-        db_conn.commit()
+# The energy consumption of each node is also stored (table node_energy_consumption_samples), so that its
+# distribution can be analyzed
+STORE_NODE_BREAKDOWN = True
 
-    db_conn.close()
+# The topology samples are simulated in batches of BATCH_REPLICAS replicas by
+# ieee802154.tsch.batch_simulator.BatchJoiningPhaseSimulator, which is much faster than simulating them one by one
+# (ECV and ECH are always simulated one by one). With ADAPTIVE_STOPPING, the convergence is checked between the
+# batches, at the first batch boundary after each check of the stopping rule (see sweep_engine.work_unit_batches)
+BATCH_REPLICAS = 32
+
+# The counters of the hot paths of the simulator and the time of its phases are aggregated per sweep point in the
+# table simulator_stats (see sweep_engine.SimulatorStatsLog), to find out why a sweep point is slow
+COLLECT_SIMULATOR_STATS = False
+
+# The progress of each stream of the sweep (completed units, formations/s, samples/s, busy ratio of the worker and
+# ETA) is reported to stderr every TELEMETRY.interval seconds, and it is also appended to a JSON-lines file that a
+# dashboard can tail (see sweep_engine.SweepTelemetry). Set TELEMETRY to None to disable the reports
+TELEMETRY = SweepTelemetry(interval=60, jsonl_path=os.path.join("statistics", "telemetry.jsonl"))
+
+# A network formation that takes longer than the thresholds of OUTLIER_CAPTURE (in wall time, or in simulated time,
+# e.g. OutlierCapture(formation_time=Duration(1, unit="h"))) is recorded with its seed and topology in the table
+# slow_samples, so that it can be re-run with tracing and profiling by replay.py. The wall time of a topology sample
+# that is simulated by the batch engine is its share of the wall time of the batch (the wall time of the batch divided
+# by its number of replicas). Set OUTLIER_CAPTURE to None to disable the capture
+OUTLIER_CAPTURE = OutlierCapture(wall_time=30)
+
+# A sweep whose database has completed units of a different configuration (e.g. another SIMULATION_HORIZON or
+# TX_POWER) is not resumed, since its samples would be mixed with the ones of the previous configuration. Set
+# FRESH_RUN to True to delete the databases of the previous runs and start the sweeps over
+FRESH_RUN = False
+
+# The keyword arguments of the function main with which the sweeps are run, both by the command itself and by the
+# jobs of sweep_server.py (whose options override them)
+SWEEP_OPTIONS = {"stopping_rule": ADAPTIVE_STOPPING, "paired": PAIRED_EXPERIMENTS,
+                 "topology_cache_dir": TOPOLOGY_CACHE_DIR, "horizon": SIMULATION_HORIZON,
+                 "store_node_breakdown": STORE_NODE_BREAKDOWN, "batch_size": BATCH_REPLICAS,
+                 "collect_stats": COLLECT_SIMULATOR_STATS, "telemetry": TELEMETRY, "outlier_capture": OUTLIER_CAPTURE,
+                 "fresh": FRESH_RUN}
 
 
 if __name__ == '__main__':
@@ -125,5 +461,9 @@ if __name__ == '__main__':
         (EBSchedulingMethod.EMAC_BASED_AS,)
     ]
 
-    with Pool(processes=PROCESSES_TO_USE) as pool:
-        pool.starmap(main, simulations)
+    # The simulations can also run on a pool of threads (e.g. under a free-threaded CPython build), since all the
+    # random values are drawn from per-simulator, per-node-group and per-unit generators
+    USE_THREADS = False
+
+    with (ThreadPool if USE_THREADS else Pool)(processes=PROCESSES_TO_USE) as pool:
+        pool.starmap(partial(main, **SWEEP_OPTIONS), simulations)
@@ -1,118 +1,373 @@
 import math
 import multiprocessing
 import os
-import random
 import sqlite3
-from multiprocessing.pool import Pool
+import time
+from functools import partial
+from multiprocessing.pool import Pool, ThreadPool
 
-from pandas import Timedelta
+import numpy
 
-from ieee802154.tsch.joining_phase_simulator import JoiningPhaseSimulator, EBSchedulingMethod
+from ieee802154.duration import Duration
+from ieee802154.tsch.joining_phase_simulator import (JoiningPhaseSimulator, EBSchedulingMethod,
+                                                     SimulationHorizonExceeded, UnreachableNodes)
 from ieee802154.node import Node, NodeType
 from ieee802154.node_group import NodeGroup, NodeGroupProperties
 from ieee802154.pan_coordinator import PANCoordinator
 from ieee802154.tsch import timeslot_template
+from ieee802154 import topology
+from sweep_engine import (AdaptiveStopping, CensoredSamples, OutlierCapture, SimulatorStatsLog, SweepCheckpoint,
+                          SweepTelemetry, UnreachableSamples, add_missing_columns, unit_numpy_randgen, unit_randgen,
+                          unit_seed, work_units)
+from topology_cache import FormedNetworkCache, TopologyCache
 
+# The configuration of the network
+AREA_DIMENSIONS = (100, 100)  # in meters
+MULTISLOTFRAME_LENGTH = 5  # in slotframes. It is identical to the Enhanced Beacon Interval (EBI)
+SLOTFRAME_LENGTH = 101
+SCANNING_DURATION = (
+        2 * MULTISLOTFRAME_LENGTH * SLOTFRAME_LENGTH
+        * timeslot_template.defaultTimeslotTemplateFor2450MHzBand.mac_ts_timeslot_length
+)
 
-def main(scheduling_method, atp_enabled=False):
+NUM_CHANNELS = 16
+EB_LENGTH = 50  # in bytes
+CHANNEL_SWITCHING_TIME = Duration(200, unit="us")
+TX_POWER = 0  # dBm
+SENSITIVITY = -100  # dBm
+# According to the path loss model that is used (see the function __rx_power in the class JoiningPhaseSimulator),
+# with tx_power = 0 and sensitivity = -100 the guaranteed range is 17m and the max possible distance of a receiver
+# is 60m.
+
+# The generation of the topologies
+RADIO_RANGE = 17  # in meters; the guaranteed range (see above), within which each advertiser has another advertiser
+MAX_BOOT_TIME = 100  # in seconds; the boot times of the nodes (except the PAN coordinator) are uniform in [0, 100)
+
+
+def network_config():
+    """
+    :return: the configuration of the network, which is stored with the configuration of a sweep, so that a sweep is
+    not resumed after a change of the network (see sweep_engine.SweepCheckpoint)
+    :rtype: dict
+    """
+    return {"area_dimensions": AREA_DIMENSIONS, "slotframe_length": SLOTFRAME_LENGTH,
+            "multislotframe_length": MULTISLOTFRAME_LENGTH, "scanning_duration": SCANNING_DURATION.total_seconds(),
+            "num_channels": NUM_CHANNELS, "eb_length": EB_LENGTH,
+            "channel_switching_time": CHANNEL_SWITCHING_TIME.total_seconds(), "tx_power": TX_POWER,
+            "sensitivity": SENSITIVITY}
+
+
+def topology_parameters():
+    """
+    :return: the parameters of the generation of the topologies (see the function generate_topology), which are a
+    component of the keys of the topology cache, so that the topologies are regenerated after a change of them (see
+    topology_cache.TopologyCache)
+    :rtype: dict
+    """
+    return {"area_dimensions": AREA_DIMENSIONS, "radio_range": RADIO_RANGE, "max_boot_time": MAX_BOOT_TIME}
+
+
+def generate_topology(area_dimensions, num_advertisers, rng):
+    """
+    Generates the positions and the boot times of the nodes of a topology sample. The topology does not depend on the
+    scheduling method, so that in a paired experiment all the methods are simulated on the same topologies.
+    :param area_dimensions: the area dimensions, in meters
+    :type area_dimensions: (int | float, int | float)
+    :param num_advertisers: the number of advertisers, including the PAN coordinator
+    :type num_advertisers: int
+    :param rng: the random generator of the topology
+    :type rng: numpy.random.Generator
+    :return: the node table of the topology (see topology_cache.TopologyCache), with the nodes in the following order:
+    the PAN coordinator, the other advertisers and the mobile node
+    :rtype: numpy.ndarray
+    """
+    # the advertisers (the first one is the PAN coordinator) form a connected field: each one is in the guaranteed
+    # range of an already placed advertiser
+    positions = numpy.concatenate((topology.connected_random_field(area_dimensions, num_advertisers, RADIO_RANGE, rng),
+                                   rng.random((1, 2)) * area_dimensions))  # the mobile node
+
+    boot_times = rng.random(len(positions)) * MAX_BOOT_TIME
+    boot_times[0] = 0  # the PAN coordinator
+
+    return numpy.column_stack((positions, boot_times))
+
+
+def node_ids(scheduling_method, atp_enabled, num_advertisers, seed):
+    """
+    :param num_advertisers: the number of advertisers, including the PAN coordinator
+    :type num_advertisers: int
+    :return: the ids of the nodes of a work unit, in the order of the node table (the PAN coordinator, the other
+    advertisers and the mobile node)
+    :rtype: list[int]
+    """
+    # Note that, the ids of advertisers affect only (E)CFAS
+    if scheduling_method in {EBSchedulingMethod.ECFASH, EBSchedulingMethod.ECFASV}:
+        # ids for advertisers except the PAN coordinator
+        num_available_ids = (math.ceil(
+            (num_advertisers - 1) / ((NUM_CHANNELS - 1) * MULTISLOTFRAME_LENGTH * (2 if atp_enabled else 1)))
+                             * MULTISLOTFRAME_LENGTH * (NUM_CHANNELS - 1) * (2 if atp_enabled else 1))
+    else:
+        # ids for advertisers including the PAN coordinator
+        num_available_ids = (math.ceil(
+            num_advertisers / (NUM_CHANNELS * MULTISLOTFRAME_LENGTH * (2 if atp_enabled else 1)))
+                             * MULTISLOTFRAME_LENGTH * NUM_CHANNELS * (2 if atp_enabled else 1))
+
+    # in random order
+    available_ids = unit_randgen(seed, "ids").sample(range(num_available_ids), k=num_available_ids)
+
+    pc_id = (available_ids.pop() if scheduling_method not in {EBSchedulingMethod.ECFASH,
+                                                              EBSchedulingMethod.ECFASV} else num_available_ids)
+    advertiser_ids = [available_ids.pop() for _ in range(num_advertisers - 1)]
+
+    # The mobile node is not an advertiser. We select an id that does not collide with the advertisers' ids
+    mobile_node_id = num_available_ids + 1
+
+    return [pc_id] + advertiser_ids + [mobile_node_id]
+
+
+def create_unit(scheduling_method, atp_enabled, nodes, seed, horizon=None, unit=None, **simulator_options):
+    """
+    Creates the node group and the simulator of a work unit. A unit depends only on these arguments, so it can be
+    re-created from its recorded seed and topology (see replay.py). The unit of a previous topology sample of the same
+    sweep point can be reset instead, which gives an identical unit without the construction of its nodes and its
+    simulator.
+    :param scheduling_method: the EB scheduling method
+    :type scheduling_method: EBSchedulingMethod
+    :param atp_enabled: whether ATP is enabled
+    :type atp_enabled: bool
+    :param nodes: the node table of the topology (see the function generate_topology)
+    :type nodes: numpy.ndarray
+    :param seed: the seed of the unit
+    :type seed: int
+    :param horizon: the horizon of the simulator
+    :type horizon: ieee802154.duration.Duration | None
+    :param unit: a unit of the same scheduling method, ATP and number of nodes to be reset, or None. Its horizon and
+    simulator options are kept
+    :type unit: (JoiningPhaseSimulator, Node) | None
+    :param simulator_options: further keyword arguments of JoiningPhaseSimulator (e.g. collect_stats, trace_recorder)
+    :return: the simulator and the mobile node
+    :rtype: (JoiningPhaseSimulator, Node)
+    """
+    ids = node_ids(scheduling_method, atp_enabled, len(nodes) - 1, seed)
+    boot_times = [Duration(float(boot_time), unit="s") for boot_time in nodes[:, 2]]
+
+    if unit is not None:
+        simulator, _ = unit
+        simulator.node_group.reset([(float(x), float(y)) for x, y in nodes[:, :2]], boot_times, ids,
+                                   unit_randgen(seed, "node_group").getrandbits(63))
+        simulator.reset(unit_randgen(seed, "simulator").getrandbits(63))
+        return unit
+
+    ng = NodeGroup(NodeGroupProperties(250000, AREA_DIMENSIONS), unit_randgen(seed, "node_group").getrandbits(63))
+
+    PANCoordinator(ids[0], (float(nodes[0, 0]), float(nodes[0, 1])), TX_POWER, SENSITIVITY, boot_times[0],
+                   CHANNEL_SWITCHING_TIME, ng)
+
+    for node_id, (x, y), boot_time in zip(ids[1:-1], nodes[1:-1, :2], boot_times[1:-1]):
+        Node(node_id, (float(x), float(y)), False, NodeType.FFD, TX_POWER, SENSITIVITY, boot_time,
+             CHANNEL_SWITCHING_TIME, ng)
+
+    mobile_node = Node(ids[-1], (float(nodes[-1, 0]), float(nodes[-1, 1])), True, NodeType.RFD, TX_POWER,
+                       SENSITIVITY, boot_times[-1], CHANNEL_SWITCHING_TIME, ng)
+
+    simulator = JoiningPhaseSimulator(
+        ng, scheduling_method, timeslot_template.defaultTimeslotTemplateFor2450MHzBand,
+        SLOTFRAME_LENGTH, EB_LENGTH, NUM_CHANNELS, SCANNING_DURATION, MULTISLOTFRAME_LENGTH, atp_enabled,
+        unit_randgen(seed, "simulator").getrandbits(63), horizon, **simulator_options)
+
+    return simulator, mobile_node
+
+
+def main(scheduling_method, atp_enabled=False, stopping_rule=None, paired=False, topology_cache_dir=None,
+         formed_network_cache_dir=None, horizon=None, collect_stats=False, telemetry=None, outlier_capture=None,
+         fresh=False):
     db_name = "{}{}".format(scheduling_method.name, ("_with_ATP" if atp_enabled else ""))
 
-    db_conn = sqlite3.connect(os.path.join("statistics", "mobile_joining_node", "{}.db".format(db_name)))
+    # In a paired experiment, the seeds of the work units do not depend on the scheduling method, so all the methods
+    # are simulated on the same topologies and with the same rejoin start offsets
+    seed_stream = "mobile_joining_node" if paired else db_name
+
+    # The topologies are shared through the cache by all the methods that are simulated on them
+    topology_cache = TopologyCache(topology_cache_dir) if topology_cache_dir is not None else None
+    formed_network_cache = (FormedNetworkCache(formed_network_cache_dir) if formed_network_cache_dir is not None
+                            else None)
+
+    db_path = os.path.join("statistics", "mobile_joining_node", "{}.db".format(db_name))
+    if fresh and os.path.exists(db_path):
+        os.remove(db_path)  # the sweep starts over, e.g. after a change of its configuration
+    db_conn = sqlite3.connect(db_path)
     c = db_conn.cursor()
 
-    c.execute('''CREATE TABLE mobile_node_joining_time_samples (advertisers INTEGER, time REAL)''')
+    # The tables are kept if they exist, so that an interrupted sweep is resumed
+    c.execute('''CREATE TABLE IF NOT EXISTS mobile_node_joining_time_samples (advertisers INTEGER, time REAL,
+    sample_idx INTEGER, attempt_idx INTEGER)''')
+    # the table of an earlier version of the command has no indices of the samples
+    add_missing_columns(db_conn, "mobile_node_joining_time_samples",
+                        [("sample_idx", "INTEGER"), ("attempt_idx", "INTEGER")])
+    c.execute('''CREATE INDEX IF NOT EXISTS advertisers_index ON mobile_node_joining_time_samples (advertisers)''')
 
     db_conn.commit()
 
     node_groups_samples_per_test = 1000
     rejoin_attemps = 100
-    multislotframe_length = 5  # in slotframes. It is identical to the Enhanced Beacon Interval (EBI)
-    slotframe_length = 101
-    scanning_duration = (
-            2 * multislotframe_length * slotframe_length
-            * timeslot_template.defaultTimeslotTemplateFor2450MHzBand.mac_ts_timeslot_length
-    )
-
-    num_channels = 16
-    eb_length = 50  # in bytes
-    randomIns = random.Random()
-    channel_switching_time = Timedelta(200, unit="us")
-    tx_power = 0  # dBm
-    sensitivity = -100  # dBm
-    # According to the path loss model that is used (see the function __rx_power in the class JoiningPhaseSimulator),
-    # with tx_power = 0 and sensitivity = -100 the guaranteed range is 17m and the max possible distance of a receiver
-    # is 60m.
-
-    for num_advertisers in range(10, 151, 10):
-        # Note that we assume that all the advertisers are fixed nodes
-        node_group_samples = 0
 
-        while node_group_samples < node_groups_samples_per_test:
+    # the configuration of the units, which is needed to replay them (see replay.py) and to resume the sweep only with
+    # the same configuration
+    checkpoint = SweepCheckpoint(db_conn, {
+        "command": "sim_for_mobile_joining_node", "scheduling_method": scheduling_method.name,
+        "atp_enabled": atp_enabled, "seed_stream": seed_stream,
+        "horizon": None if horizon is None else horizon.total_seconds(), "rejoin_attempts": rejoin_attemps,
+        "network": network_config(), "topology": topology_parameters()})
+    censored_samples = CensoredSamples(db_conn)
+    unreachable_samples = UnreachableSamples(db_conn)
+    simulator_stats = SimulatorStatsLog(db_conn) if collect_stats else None
+    slow_samples = outlier_capture.recorder(db_conn) if outlier_capture is not None else None
 
-            # Note that, the ids of advertisers affect only (E)CFAS
-            if scheduling_method in {EBSchedulingMethod.ECFASH, EBSchedulingMethod.ECFASV}:
-                # ids for advertisers except the PAN coordinator
-                num_available_ids = (math.ceil(
-                    (num_advertisers - 1) / ((num_channels - 1) * multislotframe_length * (2 if atp_enabled else 1)))
-                                     * multislotframe_length * (num_channels - 1) * (2 if atp_enabled else 1))
-            else:
-                # ids for advertisers including the PAN coordinator
-                num_available_ids = (math.ceil(
-                    num_advertisers / (num_channels * multislotframe_length * (2 if atp_enabled else 1)))
-                                     * multislotframe_length * num_channels * (2 if atp_enabled else 1))
+    sweep_points = range(10, 151, 10)  # the number of advertisers
 
-            available_ids = randomIns.sample(range(num_available_ids), k=num_available_ids)  # in random order
+    # the progress telemetry of the sweep (with a stopping rule, the max number of units is used for the ETA)
+    units_per_point = node_groups_samples_per_test if stopping_rule is None else stopping_rule.max_units
+    progress = (None if telemetry is None else telemetry.stream(
+        "mobile_joining_node.{}".format(db_name), len(sweep_points) * units_per_point,
+        sum(len(checkpoint.completed_units(sweep_point)) for sweep_point in sweep_points)))
 
-            ng = NodeGroup(NodeGroupProperties(250000, (100, 100)))
-            pc_id = (available_ids.pop() if scheduling_method not in {EBSchedulingMethod.ECFASH,
-                                                                      EBSchedulingMethod.ECFASV} else num_available_ids)
+    for num_advertisers in sweep_points:
+        # Note that we assume that all the advertisers are fixed nodes
+        unit = None  # the unit of the previous topology sample, which is reset for the next one
 
-            PANCoordinator(pc_id, (ng.properties.area_dimensions[0] * randomIns.random(),
-                                   ng.properties.area_dimensions[1] * randomIns.random()), tx_power, sensitivity,
-                           Timedelta(0), channel_switching_time, ng)
+        # the samples of the sweep point are needed only for the adaptive number of topology samples
+        point_samples = [] if stopping_rule is None else [row[0] for row in c.execute(
+            '''SELECT time FROM mobile_node_joining_time_samples WHERE advertisers=?''', (num_advertisers,))]
 
-            # create fixed-nodes/advertisers (except the PAN coordinator)
-            for i in range(1, num_advertisers):
-                while True:
-                    # find a random position that is in the guaranteed range of an already created (fixed) node
+        for sample_idx in work_units(checkpoint, num_advertisers, node_groups_samples_per_test, stopping_rule,
+                                     point_samples):
+            if progress is not None:
+                progress.unit_started()
+                num_point_samples = len(point_samples)
 
-                    position = (ng.properties.area_dimensions[0] * randomIns.random(),
-                                ng.properties.area_dimensions[1] * randomIns.random())
+            seed = unit_seed(seed_stream, num_advertisers, sample_idx)
+            generate = partial(generate_topology, AREA_DIMENSIONS, num_advertisers,
+                               unit_numpy_randgen(seed, "topology"))
+            nodes = (generate() if topology_cache is None else
+                     topology_cache.get("mobile_joining_node", num_advertisers, sample_idx, seed, topology_parameters(),
+                                        generate))
 
-                    # check if at least one (fixed) node has this position in its range
-                    if not all(node.distance_from_point(position) > 17 for node in ng):
-                        break
+            simulator, mobile_node = unit = create_unit(scheduling_method, atp_enabled, nodes, seed, horizon, unit,
+                                                        collect_stats=collect_stats)
 
-                Node(available_ids.pop(), position, False, NodeType.FFD, tx_power, sensitivity,
-                     Timedelta(randomIns.random() * 100, unit="s"), channel_switching_time, ng)
+            start_time = time.perf_counter()
+            try:
+                if formed_network_cache is None:
+                    formation_time = simulator.execute()[0]
+                else:
+                    formation_time = formed_network_cache.form(simulator, os.path.join("mobile_joining_node", db_name),
+                                                               num_advertisers, sample_idx, seed)[0]
+            except (SimulationHorizonExceeded, UnreachableNodes) as e:
+                if isinstance(e, UnreachableNodes):
+                    # the topology is not connected, so the sample is undefined rather than censored
+                    unreachable_samples.add(num_advertisers, sample_idx, None, e)
+                else:
+                    censored_samples.add(num_advertisers, sample_idx, None, type(e).__name__)
+                    if slow_samples is not None:
+                        slow_samples.check(num_advertisers, sample_idx, None, seed, nodes,
+                                           time.perf_counter() - start_time, None)
+                if simulator_stats is not None:
+                    simulator_stats.add(num_advertisers, simulator.stats)
+                checkpoint.mark_completed(num_advertisers, sample_idx, seed)
+                db_conn.commit()
+                if progress is not None:
+                    progress.unit_completed(formations=1)
+                continue
 
-            # create a mobile node
-            initial_pos = (ng.properties.area_dimensions[0] * randomIns.random(),
-                           ng.properties.area_dimensions[1] * randomIns.random())
+            if slow_samples is not None:
+                slow_samples.check(num_advertisers, sample_idx, None, seed, nodes, time.perf_counter() - start_time,
+                                   formation_time)
 
-            # The mobile node is not an advertiser. We select an id that does not collide with the advertisers' ids
-            mobile_node_id = num_available_ids + 1
-            mobile_node = Node(mobile_node_id, initial_pos, True, NodeType.RFD, tx_power, sensitivity,
-                               Timedelta(randomIns.random() * 100, unit="s"), channel_switching_time, ng)
+            # collect samples from the mobile node
+            rejoin_randgen = unit_randgen(seed, "rejoin")
+            for attempt_idx in range(rejoin_attemps):
+                start_time = time.perf_counter()
+                try:
+                    res = simulator.rejoining_attempt(mobile_node, Duration(rejoin_randgen.random() * 100, unit="s"))
+                except UnreachableNodes as e:
+                    # the joining node cannot be reached by the advertisers, so the attempt is undefined rather than
+                    # censored
+                    unreachable_samples.add(num_advertisers, sample_idx, attempt_idx, e)
+                    continue
+                except SimulationHorizonExceeded as e:
+                    censored_samples.add(num_advertisers, sample_idx, attempt_idx, type(e).__name__)
+                    if slow_samples is not None:
+                        slow_samples.check(num_advertisers, sample_idx, attempt_idx, seed, nodes,
+                                           time.perf_counter() - start_time, None)
+                    continue
 
-            simulator = JoiningPhaseSimulator(
-                ng, scheduling_method, timeslot_template.defaultTimeslotTemplateFor2450MHzBand,
-                slotframe_length, eb_length, num_channels, scanning_duration, multislotframe_length, atp_enabled)
+                if slow_samples is not None:
+                    slow_samples.check(num_advertisers, sample_idx, attempt_idx, seed, nodes,
+                                       time.perf_counter() - start_time, res)
 
-            simulator.execute()
-
-            # collect samples from the mobile node
-            for _ in range(rejoin_attemps):
-                res = simulator.rejoining_attempt(mobile_node, Timedelta(randomIns.random() * 100, unit="s"))
-                c.execute('''INSERT INTO mobile_node_joining_time_samples(advertisers, time) VALUES(?, ?)''',
-                          (num_advertisers, res.total_seconds()))
+                c.execute('''INSERT INTO mobile_node_joining_time_samples(advertisers, time, sample_idx, attempt_idx)
+                VALUES(?, ?, ?, ?)''', (num_advertisers, res.total_seconds(), sample_idx, attempt_idx))
+                point_samples.append(res.total_seconds())
 
+            if simulator_stats is not None:
+                simulator_stats.add(num_advertisers, simulator.stats)
+            checkpoint.mark_completed(num_advertisers, sample_idx, seed)
             db_conn.commit()
-            node_group_samples += 1
+            if progress is not None:
+                progress.unit_completed(formations=1, samples=len(point_samples) - num_point_samples)
 
+    if progress is not None:
+        progress.close()
     db_conn.close()
 
 
+# Set ADAPTIVE_STOPPING to e.g. AdaptiveStopping(relative_half_width=0.02) to determine the number of topology
+# samples of each sweep point adaptively, based on the confidence interval of the mean joining time
+ADAPTIVE_STOPPING = None
+
+# In paired experiments, all the scheduling methods are simulated on the same topologies (common random numbers),
+# and results_export.py exports the confidence intervals of their paired differences
+PAIRED_EXPERIMENTS = False
+
+# The generated topologies are stored on disk and are reused by all the methods (and runs) that share them
+TOPOLOGY_CACHE_DIR = os.path.join("statistics", "topology_cache")
+
+# The formed networks are stored on disk, so that a re-run with different rejoin parameters skips the network
+# formation. Set FORMED_NETWORK_CACHE_DIR to None to disable the cache
+FORMED_NETWORK_CACHE_DIR = os.path.join("statistics", "formed_network_cache")
+
+# A network formation or a rejoining attempt that is not completed within SIMULATION_HORIZON (simulated time) is
+# recorded as a censored sample (table censored_samples) instead of running indefinitely
+SIMULATION_HORIZON = Duration(2, unit="h")
+
+# The counters of the hot paths of the simulator and the time of its phases are aggregated per sweep point in the
+# table simulator_stats (see sweep_engine.SimulatorStatsLog), to find out why a sweep point is slow
+COLLECT_SIMULATOR_STATS = False
+
+# The progress of each stream of the sweep (completed units, formations/s, samples/s, busy ratio of the worker and
+# ETA) is reported to stderr every TELEMETRY.interval seconds, and it is also appended to a JSON-lines file that a
+# dashboard can tail (see sweep_engine.SweepTelemetry). Set TELEMETRY to None to disable the reports
+TELEMETRY = SweepTelemetry(interval=60, jsonl_path=os.path.join("statistics", "telemetry.jsonl"))
+
+# A network formation or a rejoining attempt that takes longer than the thresholds of OUTLIER_CAPTURE (in wall time,
+# or in simulated time, e.g. OutlierCapture(joining_time=Duration(1, unit="min"))) is recorded with its seed and
+# topology in the table slow_samples, so that it can be re-run with tracing and profiling by replay.py. Set
+# OUTLIER_CAPTURE to None to disable the capture
+OUTLIER_CAPTURE = OutlierCapture(wall_time=30)
+
+# A sweep whose database has completed units of a different configuration (e.g. another SIMULATION_HORIZON or
+# TX_POWER) is not resumed, since its samples would be mixed with the ones of the previous configuration. Set
+# FRESH_RUN to True to delete the databases of the previous runs and start the sweeps over
+FRESH_RUN = False
+
+# The keyword arguments of the function main with which the sweeps are run, both by the command itself and by the
+# jobs of sweep_server.py (whose options override them)
+SWEEP_OPTIONS = {"stopping_rule": ADAPTIVE_STOPPING, "paired": PAIRED_EXPERIMENTS,
+                 "topology_cache_dir": TOPOLOGY_CACHE_DIR, "formed_network_cache_dir": FORMED_NETWORK_CACHE_DIR,
+                 "horizon": SIMULATION_HORIZON, "collect_stats": COLLECT_SIMULATOR_STATS, "telemetry": TELEMETRY,
+                 "outlier_capture": OUTLIER_CAPTURE, "fresh": FRESH_RUN}
+
+
 if __name__ == '__main__':
     PROCESSES_TO_USE = multiprocessing.cpu_count()
     # create a folder for statistics
@@ -129,5 +384,9 @@ if __name__ == '__main__':
 
     ]
 
-    with Pool(processes=PROCESSES_TO_USE) as pool:
-        pool.starmap(main, simulations)
+    # The simulations can also run on a pool of threads (e.g. under a free-threaded CPython build), since all the
+    # random values are drawn from per-simulator, per-node-group and per-unit generators
+    USE_THREADS = False
+
+    with (ThreadPool if USE_THREADS else Pool)(processes=PROCESSES_TO_USE) as pool:
+        pool.starmap(partial(main, **SWEEP_OPTIONS), simulations)
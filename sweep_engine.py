@@ -0,0 +1,671 @@
+import hashlib
+import io
+import json
+import os
+import random
+import sys
+import threading
+import time
+
+import numpy
+
+import bootstrap_stats
+
+
+def unit_seed(stream, sweep_point, sample_idx, base_seed=0):
+    """
+    Returns the seed of a work unit of a sweep. A work unit is the simulation of one topology sample at a sweep point.
+    The seed depends only on its arguments, so a resumed sweep simulates exactly the same units as an uninterrupted one.
+    :param stream: the name of the sweep (e.g. the name of its database)
+    :type stream: str
+    :param sweep_point: the sweep point of the unit (e.g. the number of advertisers)
+    :type sweep_point: int
+    :param sample_idx: the index of the topology sample at the sweep point
+    :type sample_idx: int
+    :param base_seed: a seed that is common to all the units of a run
+    :type base_seed: int
+    :return: a 63-bit seed (it fits in an Sqlite integer)
+    :rtype: int
+    """
+    digest = hashlib.sha256("{}/{}/{}/{}".format(base_seed, stream, sweep_point, sample_idx).encode()).digest()
+    return int.from_bytes(digest[:8], "big") >> 1
+
+
+def unit_randgen(seed, purpose):
+    """
+    Returns a random generator for one purpose of a work unit (e.g. "topology", "ids", "rejoin"). The generators of the
+    different purposes are independent, so the random values of one purpose do not depend on how many values the others
+    consumed. This keeps e.g. the topologies and the rejoin start offsets of a paired experiment identical for all the
+    scheduling methods, although the methods draw their node ids from ranges of different sizes.
+    :param seed: the seed of the unit
+    :type seed: int
+    :param purpose: the purpose of the generator
+    :type purpose: str
+    :return: the random generator
+    :rtype: random.Random
+    """
+    return random.Random("{}/{}".format(seed, purpose))
+
+
+def unit_numpy_randgen(seed, purpose):
+    """
+    The NumPy counterpart of unit_randgen, for the vectorized generators (e.g. the ones of ieee802154.topology).
+    :param seed: the seed of the unit
+    :type seed: int
+    :param purpose: the purpose of the generator
+    :type purpose: str
+    :return: the random generator
+    :rtype: numpy.random.Generator
+    """
+    return numpy.random.default_rng(unit_randgen(seed, purpose).getrandbits(128))
+
+
+def add_missing_columns(db_conn, table, columns):
+    """
+    Adds the columns that are missing from a table of the samples, which was created by an earlier version of a
+    simulation command (e.g. without the columns sample_idx and attempt_idx), so that the sweep can be resumed on it.
+    The existing rows of the table get NULL values in the added columns.
+    :param db_conn: the connection to the database of the samples
+    :type db_conn: sqlite3.Connection
+    :param table: the name of the table
+    :type table: str
+    :param columns: the names and the types of the columns, e.g. [("sample_idx", "INTEGER")]
+    :type columns: list[(str, str)]
+    """
+    existing_columns = {row[1] for row in db_conn.execute("PRAGMA table_info({})".format(table))}
+    for name, column_type in columns:
+        if name not in existing_columns:
+            db_conn.execute("ALTER TABLE {} ADD COLUMN {} {}".format(table, name, column_type))
+
+
+class SweepConfigMismatch(Exception):
+    """
+    Raised when a sweep with completed work units is resumed with a different configuration. The completed units would
+    be skipped, so the samples of the two configurations would be mixed in the database.
+    """
+    pass
+
+
+class SweepCheckpoint:
+    """
+    Records the completed work units of a sweep in the database that stores its samples, so that a sweep that was
+    interrupted can be resumed by skipping the completed units.
+    A unit must be marked as completed in the same transaction as its samples; then a crash either keeps both or
+    neither of them.
+    The configuration of the sweep (table sweep_config) is stored next to the seeds of the units, so that any unit can
+    be re-created from the database alone (see replay.py), and so that the sweep is not resumed with another one.
+    """
+
+    def __init__(self, db_conn, config=None):
+        """
+        :param db_conn: the connection to the database of the samples
+        :type db_conn: sqlite3.Connection
+        :param config: the configuration of the sweep (e.g. the command, its arguments and the configuration of the
+        network), which must be serializable to JSON. If the sweep has completed units, it must be identical to the
+        stored configuration. Otherwise, it replaces the stored configuration
+        :type config: dict | None
+        :raise SweepConfigMismatch: if the sweep has completed units and the configuration differs from the stored one
+        """
+        self.__db_conn = db_conn
+        self.__db_conn.execute('''CREATE TABLE IF NOT EXISTS completed_units (sweep_point INTEGER, sample_idx INTEGER,
+        seed INTEGER, PRIMARY KEY (sweep_point, sample_idx))''')
+        self.__db_conn.execute('''CREATE TABLE IF NOT EXISTS sweep_config (name TEXT PRIMARY KEY, value TEXT)''')
+        if config is not None:
+            config = json.loads(json.dumps(config))  # as it is stored (e.g. the tuples become lists)
+            stored_config = self.config
+            if (stored_config != config
+                    and self.__db_conn.execute('''SELECT 1 FROM completed_units LIMIT 1''').fetchone() is not None):
+                raise SweepConfigMismatch(
+                    "The sweep has completed units of a different configuration ({}). Restore the configuration to "
+                    "resume the sweep, or start it over with a fresh database".format(", ".join(
+                        "{}: {} -> {}".format(name, json.dumps(stored_config.get(name)), json.dumps(config.get(name)))
+                        for name in sorted(stored_config.keys() | config.keys())
+                        if stored_config.get(name) != config.get(name))))
+
+            self.__db_conn.execute('''DELETE FROM sweep_config''')
+            self.__db_conn.executemany('''INSERT INTO sweep_config (name, value) VALUES (?, ?)''',
+                                       [(name, json.dumps(value)) for name, value in config.items()])
+        self.__db_conn.commit()
+
+    @property
+    def config(self):
+        """
+        :return: the stored configuration of the sweep
+        :rtype: dict
+        """
+        return {name: json.loads(value) for name, value in self.__db_conn.execute(
+            '''SELECT name, value FROM sweep_config''')}
+
+    def seed(self, sweep_point, sample_idx):
+        """
+        :param sweep_point: the sweep point of the unit
+        :type sweep_point: int
+        :param sample_idx: the index of the topology sample at the sweep point
+        :type sample_idx: int
+        :return: the seed of the unit, or None if it is not completed
+        :rtype: int | None
+        """
+        row = self.__db_conn.execute('''SELECT seed FROM completed_units WHERE sweep_point=? AND sample_idx=?''',
+                                     (sweep_point, sample_idx)).fetchone()
+        return None if row is None else row[0]
+
+    def completed_units(self, sweep_point):
+        """
+        :param sweep_point: the sweep point
+        :type sweep_point: int
+        :return: the indexes of the completed topology samples of the sweep point
+        :rtype: set[int]
+        """
+        return {row[0] for row in self.__db_conn.execute(
+            '''SELECT sample_idx FROM completed_units WHERE sweep_point=?''', (sweep_point,))}
+
+    def mark_completed(self, sweep_point, sample_idx, seed):
+        """
+        Marks a unit as completed. The caller is responsible for committing the transaction, after the samples of the
+        unit have been inserted.
+        :param sweep_point: the sweep point of the unit
+        :type sweep_point: int
+        :param sample_idx: the index of the topology sample at the sweep point
+        :type sample_idx: int
+        :param seed: the seed of the unit
+        :type seed: int
+        """
+        self.__db_conn.execute('''INSERT INTO completed_units (sweep_point, sample_idx, seed) VALUES (?, ?, ?)''',
+                               (sweep_point, sample_idx, seed))
+
+
+class CensoredSamples:
+    """
+    Records the censored samples of a sweep in the database that stores its samples, i.e. the network formations and
+    the rejoining attempts that did not complete within the horizon of the simulator. The censored samples are not
+    stored with the regular ones, so the exported statistics are calculated only on the completed samples, but their
+    number is kept for the analysis of the results. The samples whose nodes are unreachable are not censored (see
+    UnreachableSamples).
+    """
+
+    def __init__(self, db_conn):
+        """
+        :param db_conn: the connection to the database of the samples
+        :type db_conn: sqlite3.Connection
+        """
+        self.__db_conn = db_conn
+        self.__db_conn.execute('''CREATE TABLE IF NOT EXISTS censored_samples (sweep_point INTEGER, sample_idx INTEGER,
+        attempt_idx INTEGER, reason TEXT)''')
+        self.__db_conn.commit()
+
+    def add(self, sweep_point, sample_idx, attempt_idx, reason):
+        """
+        Records a censored sample. As in SweepCheckpoint.mark_completed, the caller is responsible for committing the
+        transaction.
+        :param sweep_point: the sweep point of the sample
+        :type sweep_point: int
+        :param sample_idx: the index of the topology sample at the sweep point
+        :type sample_idx: int
+        :param attempt_idx: the index of the rejoining attempt, or None if the network formation was censored
+        :type attempt_idx: int | None
+        :param reason: the reason of the censoring (e.g. the name of the exception that was raised by the simulator)
+        :type reason: str
+        """
+        self.__db_conn.execute('''INSERT INTO censored_samples (sweep_point, sample_idx, attempt_idx, reason)
+        VALUES (?, ?, ?, ?)''', (sweep_point, sample_idx, attempt_idx, reason))
+
+
+class UnreachableSamples:
+    """
+    Records the samples of a sweep whose topology is not connected, i.e. the network formations and the rejoining
+    attempts that raised UnreachableNodes, since some nodes cannot be reached by the advertisers. Unlike the censored
+    samples, their value is not greater than the horizon but undefined, so they are recorded separately (table
+    unreachable_samples) and they are excluded from the statistics and from the analysis of the censored samples.
+    """
+
+    def __init__(self, db_conn):
+        """
+        :param db_conn: the connection to the database of the samples
+        :type db_conn: sqlite3.Connection
+        """
+        self.__db_conn = db_conn
+        self.__db_conn.execute('''CREATE TABLE IF NOT EXISTS unreachable_samples (sweep_point INTEGER,
+        sample_idx INTEGER, attempt_idx INTEGER, unreachable_nodes INTEGER)''')
+        self.__db_conn.commit()
+
+    def add(self, sweep_point, sample_idx, attempt_idx, error):
+        """
+        Records a sample with unreachable nodes. As in SweepCheckpoint.mark_completed, the caller is responsible for
+        committing the transaction.
+        :param sweep_point: the sweep point of the sample
+        :type sweep_point: int
+        :param sample_idx: the index of the topology sample at the sweep point
+        :type sample_idx: int
+        :param attempt_idx: the index of the rejoining attempt, or None for the network formation
+        :type attempt_idx: int | None
+        :param error: the exception that was raised by the simulator
+        :type error: ieee802154.tsch.joining_phase_simulator.UnreachableNodes
+        """
+        self.__db_conn.execute('''INSERT INTO unreachable_samples (sweep_point, sample_idx, attempt_idx,
+        unreachable_nodes) VALUES (?, ?, ?, ?)''', (sweep_point, sample_idx, attempt_idx, len(error.nodes)))
+
+
+class SimulatorStatsLog:
+    """
+    Aggregates the stats of the simulators of a sweep (see JoiningPhaseSimulator.stats) per sweep point, in the
+    database that stores its samples, so that the cost of a slow sweep point can be broken down (e.g. into simulated
+    subslots, candidate EBs and sensing checks) after the sweep or while it runs.
+    """
+
+    def __init__(self, db_conn):
+        """
+        :param db_conn: the connection to the database of the samples
+        :type db_conn: sqlite3.Connection
+        """
+        self.__db_conn = db_conn
+        self.__db_conn.execute('''CREATE TABLE IF NOT EXISTS simulator_stats (sweep_point INTEGER, name TEXT,
+        value REAL, PRIMARY KEY (sweep_point, name))''')
+        self.__db_conn.commit()
+
+    def add(self, sweep_point, stats):
+        """
+        Adds the stats of a simulator to the totals of a sweep point, and increments the number of simulators of the
+        sweep point (the stat "simulators"). As in SweepCheckpoint.mark_completed, the caller is responsible for
+        committing the transaction, so that the stats of a unit are added only once.
+        :param sweep_point: the sweep point of the simulator
+        :type sweep_point: int
+        :param stats: the stats of the simulator
+        :type stats: ieee802154.tsch.joining_phase_simulator.SimulatorStats
+        """
+        self.__db_conn.executemany('''INSERT INTO simulator_stats (sweep_point, name, value) VALUES (?, ?, ?)
+        ON CONFLICT (sweep_point, name) DO UPDATE SET value = value + excluded.value''',
+                                   [(sweep_point, name, value) for name, value in stats.as_dict().items()]
+                                   + [(sweep_point, "simulators", 1)])
+
+    def totals(self, sweep_point):
+        """
+        :param sweep_point: the sweep point
+        :type sweep_point: int
+        :return: the totals of the stats of the sweep point, by name
+        :rtype: dict[str, float]
+        """
+        return dict(self.__db_conn.execute('''SELECT name, value FROM simulator_stats WHERE sweep_point=?''',
+                                           (sweep_point,)))
+
+
+class OutlierCapture:
+    """
+    The thresholds of the outlier capture of the sweeps. A network formation or a rejoining attempt whose wall time or
+    simulated time exceeds a threshold is recorded with its seed and topology (see SlowSamples), so that it can be
+    re-run with tracing and profiling (see replay.py). A censored sample exceeds any simulated time threshold.
+    """
+
+    def __init__(self, wall_time=None, formation_time=None, joining_time=None):
+        """
+        :param wall_time: the threshold of the wall time of a network formation or a rejoining attempt, in seconds
+        :type wall_time: float | None
+        :param formation_time: the threshold of the simulated network formation time
+        :type formation_time: ieee802154.duration.Duration | None
+        :param joining_time: the threshold of the simulated joining time of a rejoining attempt
+        :type joining_time: ieee802154.duration.Duration | None
+        """
+        self.wall_time = wall_time
+        self.formation_time = formation_time
+        self.joining_time = joining_time
+
+    def recorder(self, db_conn):
+        """
+        :param db_conn: the connection to the database of the samples
+        :type db_conn: sqlite3.Connection
+        :return: the recorder of the outliers of a sweep
+        :rtype: SlowSamples
+        """
+        return SlowSamples(db_conn, self)
+
+
+class SlowSamples:
+    """
+    Records the outliers of a sweep (see OutlierCapture) in the database that stores its samples: the network formations
+    and the rejoining attempts that took too long, in wall time or in simulated time. Each one is stored with the seed
+    and the node table of its unit, so it can be replayed even if the topology cache is deleted.
+    """
+
+    def __init__(self, db_conn, capture=None):
+        """
+        :param db_conn: the connection to the database of the samples
+        :type db_conn: sqlite3.Connection
+        :param capture: the thresholds of the outliers. Without them, the recorded outliers can only be read
+        :type capture: OutlierCapture | None
+        """
+        self.__db_conn = db_conn
+        self.__capture = capture
+        self.__db_conn.execute('''CREATE TABLE IF NOT EXISTS slow_samples (id INTEGER PRIMARY KEY, sweep_point INTEGER,
+        sample_idx INTEGER, attempt_idx INTEGER, seed INTEGER, wall_time REAL, simulated_time REAL, topology BLOB)''')
+        self.__db_conn.commit()
+
+    def check(self, sweep_point, sample_idx, attempt_idx, seed, nodes, wall_time, simulated_time):
+        """
+        Records a network formation or a rejoining attempt if it exceeds a threshold. As in
+        SweepCheckpoint.mark_completed, the caller is responsible for committing the transaction.
+        :param sweep_point: the sweep point of the sample
+        :type sweep_point: int
+        :param sample_idx: the index of the topology sample at the sweep point
+        :type sample_idx: int
+        :param attempt_idx: the index of the rejoining attempt, or None for the network formation
+        :type attempt_idx: int | None
+        :param seed: the seed of the unit
+        :type seed: int
+        :param nodes: the node table of the topology of the unit (see topology_cache.TopologyCache)
+        :type nodes: numpy.ndarray
+        :param wall_time: the wall time of the sample in seconds (the share of a replica of a batch), or None if it
+                          is unknown
+        :type wall_time: float | None
+        :param simulated_time: the simulated formation or joining time, or None if the sample was censored
+        :type simulated_time: ieee802154.duration.Duration | None
+        :return: whether the sample was recorded
+        :rtype: bool
+        """
+        wall_time_threshold = self.__capture.wall_time
+        simulated_time_threshold = (self.__capture.formation_time if attempt_idx is None
+                                    else self.__capture.joining_time)
+        if not ((wall_time is not None and wall_time_threshold is not None and wall_time > wall_time_threshold)
+                or (simulated_time_threshold is not None
+                    and (simulated_time is None or simulated_time > simulated_time_threshold))):
+            return False
+
+        topology = io.BytesIO()
+        numpy.save(topology, nodes)
+        self.__db_conn.execute('''INSERT INTO slow_samples (sweep_point, sample_idx, attempt_idx, seed, wall_time,
+        simulated_time, topology) VALUES (?, ?, ?, ?, ?, ?, ?)''',
+                               (sweep_point, sample_idx, attempt_idx, seed, wall_time,
+                                None if simulated_time is None else simulated_time.total_seconds(),
+                                topology.getvalue()))
+        return True
+
+    def samples(self):
+        """
+        :return: the recorded outliers, as tuples (id, sweep point, sample index, attempt index, seed, wall time in
+        seconds, simulated time in seconds), the slowest first
+        :rtype: list[tuple]
+        """
+        return self.__db_conn.execute('''SELECT id, sweep_point, sample_idx, attempt_idx, seed, wall_time,
+        simulated_time FROM slow_samples ORDER BY wall_time DESC''').fetchall()
+
+    def get(self, sample_id):
+        """
+        :param sample_id: the id of a recorded outlier (see the function samples)
+        :type sample_id: int
+        :return: the sweep point, the sample index, the attempt index, the seed, the simulated time in seconds (None if
+        the sample was censored) and the node table of the outlier
+        :rtype: (int, int, int | None, int, float | None, numpy.ndarray)
+        """
+        row = self.__db_conn.execute('''SELECT sweep_point, sample_idx, attempt_idx, seed, simulated_time, topology
+        FROM slow_samples WHERE id=?''', (sample_id,)).fetchone()
+        if row is None:
+            raise KeyError(sample_id)
+
+        return row[:5] + (numpy.load(io.BytesIO(row[5])),)
+
+
+class AdaptiveStopping:
+    """
+    A sequential stopping rule for the number of topology samples (work units) of a sweep point. The units are
+    simulated in batches, and after each batch the bootstrap confidence interval of the mean (and optionally of the
+    95th percentile) of the samples collected so far is calculated. The sweep point is completed when the half-width of
+    every interval falls below the relative or the absolute target, or when the max number of units is reached.
+    """
+
+    def __init__(self, relative_half_width=None, absolute_half_width=None, include_p95=False, min_units=20,
+                 max_units=10000, batch_size=10, num_iterations=1000):
+        """
+        :param relative_half_width: the target half-width of a confidence interval, as a fraction of the value of the
+        statistic (e.g. 0.02 for ±2%)
+        :type relative_half_width: float | None
+        :param absolute_half_width: the target half-width of a confidence interval, in the units of the samples
+        :type absolute_half_width: float | None
+        :param include_p95: determines if the confidence interval of the 95th percentile is also checked
+        :type include_p95: bool
+        :param min_units: the minimum number of units of a sweep point
+        :type min_units: int
+        :param max_units: the maximum number of units of a sweep point
+        :type max_units: int
+        :param batch_size: the number of units that are simulated between two checks
+        :type batch_size: int
+        :param num_iterations: the number of bootstrap resamples of a check
+        :type num_iterations: int
+        :raise ValueError: if no target is specified or the limits are not valid
+        """
+        if relative_half_width is None and absolute_half_width is None:
+            raise ValueError("At least one of relative_half_width and absolute_half_width must be specified")
+        if not 0 < min_units <= max_units or batch_size <= 0:
+            raise ValueError("The limits must satisfy 0 < min_units <= max_units and batch_size > 0")
+
+        self.relative_half_width = relative_half_width
+        self.absolute_half_width = absolute_half_width
+        self.include_p95 = include_p95
+        self.min_units = min_units
+        self.max_units = max_units
+        self.batch_size = batch_size
+        self.num_iterations = num_iterations
+
+    def converged(self, samples):
+        """
+        :param samples: the samples of the sweep point
+        :type samples: list[float]
+        :return: True if the half-widths of the confidence intervals are below the target
+        :rtype: bool
+        """
+        if len(samples) < 2:
+            return False
+
+        stat_funcs = {"mean": bootstrap_stats.mean}
+        if self.include_p95:
+            stat_funcs["p95"] = bootstrap_stats.percentile(95)
+
+        for res in bootstrap_stats.bootstrap(samples, stat_funcs, self.num_iterations)[0].values():
+            half_width = (res.upper_bound - res.lower_bound) / 2
+            if not ((self.absolute_half_width is not None and half_width <= self.absolute_half_width) or
+                    (self.relative_half_width is not None and half_width <= self.relative_half_width * abs(res.value))):
+                return False
+
+        return True
+
+
+def work_units(checkpoint, sweep_point, num_units, stopping_rule=None, samples=None):
+    """
+    Yields the indexes of the topology samples that have to be simulated at a sweep point. The units that have been
+    completed by a previous (interrupted) run are skipped.
+    :param checkpoint: the checkpoint of the sweep
+    :type checkpoint: SweepCheckpoint
+    :param sweep_point: the sweep point
+    :type sweep_point: int
+    :param num_units: the number of units of the sweep point, when a stopping rule is not used
+    :type num_units: int
+    :param stopping_rule: the rule that determines the number of units adaptively. If it is given, num_units is ignored
+    :type stopping_rule: AdaptiveStopping | None
+    :param samples: the samples of the sweep point, including the ones of the completed units. The caller appends the
+    samples of each unit before the next index is requested. Required only when a stopping rule is used
+    :type samples: list[float] | None
+    :return: an iterator over the indexes of the units to simulate
+    :rtype: collections.abc.Iterator[int]
+    """
+    for batch in work_unit_batches(checkpoint, sweep_point, num_units, 1, stopping_rule, samples):
+        yield batch[0]
+
+
+def work_unit_batches(checkpoint, sweep_point, num_units, batch_size, stopping_rule=None, samples=None):
+    """
+    Yields the indexes of the topology samples that have to be simulated at a sweep point in batches (e.g. the replicas
+    of the batch engine), like the function work_units. The stopping rule is checked only between the batches, once
+    min_units units and then at least stopping_rule.batch_size more units have been reached, so a batch is never cut
+    off by a convergence check. All the batches are full, except for the last one of the sweep point.
+    :param batch_size: the max number of units of a batch
+    :type batch_size: int
+    :return: an iterator over the batches of the indexes of the units to simulate
+    :rtype: collections.abc.Iterator[list[int]]
+    :raise ValueError: if batch_size is not positive
+    """
+    if batch_size <= 0:
+        raise ValueError("The batch size must be positive")
+
+    completed_units = checkpoint.completed_units(sweep_point)
+    max_units = num_units if stopping_rule is None else stopping_rule.max_units
+    next_check = None if stopping_rule is None else stopping_rule.min_units  # the units of the next check
+
+    batch = []
+    for sample_idx in range(max_units):
+        if len(batch) == 0 and next_check is not None and sample_idx >= next_check:
+            if stopping_rule.converged(samples):
+                return
+            next_check = sample_idx + stopping_rule.batch_size
+
+        if sample_idx not in completed_units:
+            batch.append(sample_idx)
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+
+    if len(batch) > 0:
+        yield batch
+
+
+class SweepTelemetry:
+    """
+    The settings of the progress telemetry of the sweeps. Each stream of a sweep (e.g. the simulations of a scheduling
+    method in a scenario, which run in one worker process) reports its progress periodically, through the object that
+    is returned by the function stream: the completed work units, the formation runs/sec and the samples/sec (e.g.
+    the rejoin samples), the busy ratio of the worker (the fraction of the time spent in the work units) and the
+    estimated time to the end of the stream. The reports are printed to stderr and they can also be appended to a
+    JSON-lines file and written to Prometheus textfiles (for the textfile collector of node_exporter), which can be
+    tailed by a dashboard while the sweep runs, or put to a queue (e.g. by the worker processes of sweep_server.py).
+    """
+
+    def __init__(self, interval=60, jsonl_path=None, prometheus_dir=None, queue=None):
+        """
+        :param interval: the min time between two reports of a stream, in seconds
+        :type interval: float
+        :param jsonl_path: the path of the JSON-lines file, to which all the streams append their reports
+        :type jsonl_path: str | None
+        :param prometheus_dir: the directory of the Prometheus textfiles (one file per stream)
+        :type prometheus_dir: str | None
+        :param queue: a queue to which all the streams put their reports, as the records of the JSON-lines file (e.g.
+        a queue of a multiprocessing manager, which can be shared by the worker processes)
+        :type queue: queue.Queue | None
+        """
+        self.interval = interval
+        self.jsonl_path = jsonl_path
+        self.prometheus_dir = prometheus_dir
+        self.queue = queue
+
+    def stream(self, name, total_units, completed_units=0):
+        """
+        :param name: the name of the stream (e.g. the name of its database)
+        :type name: str
+        :param total_units: the number of the work units of the stream. When a stopping rule is used, it is the max
+        number of units, so the estimated time to the end is an upper bound
+        :type total_units: int
+        :param completed_units: the units that were completed by a previous (interrupted) run of the stream
+        :type completed_units: int
+        :return: the progress of the stream
+        :rtype: StreamProgress
+        """
+        return StreamProgress(self, name, total_units, completed_units)
+
+
+class StreamProgress:
+    """
+    The progress of a stream of a sweep (see SweepTelemetry.stream). The sweep calls the function unit_started before
+    each work unit (or batch of units), and the function unit_completed after it.
+    """
+
+    def __init__(self, telemetry, name, total_units, completed_units=0):
+        self.__telemetry = telemetry
+        self.__name = name
+        self.__total_units = total_units
+        self.__previously_completed_units = completed_units
+        self.__completed_units = 0  # in this run
+        self.__formations = 0
+        self.__samples = 0
+        self.__busy_time = 0.0  # in seconds
+        self.__unit_start = None
+        # the process and the thread of the worker, since the streams of a pool of threads share the process
+        self.__worker = "{}/{}".format(os.getpid(), threading.get_ident())
+        self.__start = self.__last_report = time.monotonic()
+
+    def unit_started(self):
+        self.__unit_start = time.monotonic()
+
+    def unit_completed(self, formations=0, samples=0, units=1):
+        """
+        :param formations: the network formations that were simulated in the unit
+        :type formations: int
+        :param samples: the samples that were produced by the unit
+        :type samples: int
+        :param units: the number of the completed units (if a batch of units was simulated)
+        :type units: int
+        """
+        now = time.monotonic()
+        if self.__unit_start is not None:
+            self.__busy_time += now - self.__unit_start
+            self.__unit_start = None
+
+        self.__completed_units += units
+        self.__formations += formations
+        self.__samples += samples
+
+        if now - self.__last_report >= self.__telemetry.interval:
+            self.report()
+
+    def report(self):
+        """
+        Reports the progress of the stream
+        """
+        now = time.monotonic()
+        self.__last_report = now
+        elapsed = max(now - self.__start, 1e-9)
+        completed_units = self.__previously_completed_units + self.__completed_units
+        remaining_units = max(self.__total_units - completed_units, 0)
+        units_per_sec = self.__completed_units / elapsed
+        metrics = {
+            "completed_units": completed_units,
+            "total_units": self.__total_units,
+            "units_per_sec": units_per_sec,
+            "formations_per_sec": self.__formations / elapsed,
+            "samples_per_sec": self.__samples / elapsed,
+            "busy_ratio": min(self.__busy_time / elapsed, 1.0),
+            "eta_seconds": remaining_units / units_per_sec if units_per_sec > 0 else None,
+        }
+
+        if metrics["eta_seconds"] is None:
+            eta = "-"
+        elif metrics["eta_seconds"] < 86400:
+            eta = time.strftime("%H:%M:%S", time.gmtime(metrics["eta_seconds"]))
+        else:
+            eta = "{:.1f} days".format(metrics["eta_seconds"] / 86400)
+        print("[{}] {}/{} units, {:.2f} formations/s, {:.1f} samples/s, busy {:.0%}, ETA {}".format(
+            self.__name, completed_units, self.__total_units, metrics["formations_per_sec"],
+            metrics["samples_per_sec"], metrics["busy_ratio"], eta), file=sys.stderr)
+
+        record = dict(time=time.time(), stream=self.__name, worker=self.__worker, **metrics)
+        if self.__telemetry.jsonl_path is not None:
+            # a single write of a short line, so that the lines of concurrent workers are not interleaved
+            with open(self.__telemetry.jsonl_path, "a") as f:
+                f.write(json.dumps(record) + "\n")
+
+        if self.__telemetry.queue is not None:
+            self.__telemetry.queue.put(record)
+
+        if self.__telemetry.prometheus_dir is not None:
+            labels = 'stream="{}",worker="{}"'.format(self.__name, self.__worker)
+            lines = []
+            for metric, value in metrics.items():
+                if value is not None:
+                    lines.append("# TYPE sweep_{} gauge".format(metric))
+                    lines.append("sweep_{}{{{}}} {}".format(metric, labels, value))
+
+            # the file is replaced atomically, so that the collector never reads a partial file
+            path = os.path.join(self.__telemetry.prometheus_dir, "sweep_{}.prom".format(self.__name))
+            with open(path + ".tmp", "w") as f:
+                f.write("\n".join(lines) + "\n")
+            os.replace(path + ".tmp", path)
+
+    def close(self):
+        """
+        Reports the final progress of the stream
+        """
+        self.report()
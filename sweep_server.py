@@ -0,0 +1,359 @@
+import argparse
+import importlib
+import json
+import multiprocessing
+import os
+import queue as queue_module
+import signal
+import socket
+import socketserver
+import sys
+import tempfile
+import time
+import traceback
+from multiprocessing.pool import Pool
+
+from ieee802154.duration import Duration
+from ieee802154.tsch import timeslot_template
+from ieee802154.tsch.joining_phase_simulator import EBSchedulingMethod, schedule_layout
+from sweep_engine import AdaptiveStopping, OutlierCapture, SweepTelemetry
+
+# The simulation commands that are served, and the subfolders of their databases in the folder statistics
+COMMANDS = {
+    "sim_for_fixed_joining_node": "fixed_joining_node",
+    "sim_for_mobile_joining_node": "mobile_joining_node",
+    "sim_for_energy_consumption": "energy_consumption",
+}
+
+DEFAULT_SOCKET = os.path.join(tempfile.gettempdir(), "atjs_sweep_server.sock")
+
+# The default interval of the progress events of a job, in seconds (see the option telemetry of a job)
+DEFAULT_PROGRESS_INTERVAL = 5
+
+# The interval at which a job checks the state of its simulations while it receives no events, in seconds
+SIMULATION_CHECK_INTERVAL = 1
+
+# The data rate of the nodes of the simulation commands, in bps, for the schedule layouts that are computed by warm_up
+DATA_RATE = 250000
+
+
+def warm_up():
+    """
+    The initializer of the worker processes of the server. It imports the simulation commands (and, through them, the
+    simulators), so that the jobs do not pay for the imports, and it populates the process-wide cache of the schedule
+    layouts (see ieee802154.tsch.joining_phase_simulator.schedule_layout) with the layouts of the network of each
+    command, with and without ATP. The layouts of (E)CFAS and of the MAC based methods depend on the number of FFDs, so
+    only the layouts of ECV, ECH and Minimal6TiSCH, which are shared by all the sweep points, are computed in advance.
+    The workers ignore the interrupts of the terminal, since they are terminated by the server.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    for command in COMMANDS:
+        module = importlib.import_module(command)
+        for scheduling_method in (EBSchedulingMethod.ECV, EBSchedulingMethod.ECH, EBSchedulingMethod.Minimal6TiSCH):
+            for atp_enabled in (False, True):
+                schedule_layout(scheduling_method, timeslot_template.defaultTimeslotTemplateFor2450MHzBand,
+                                module.SLOTFRAME_LENGTH, module.EB_LENGTH, module.NUM_CHANNELS,
+                                module.MULTISLOTFRAME_LENGTH, atp_enabled, DATA_RATE, None)
+
+
+def simulation_arguments(command, simulation):
+    """
+    :param command: the simulation command of a job (see COMMANDS)
+    :type command: str
+    :param simulation: a simulation of the job, as the arguments of the function main of the command (e.g.
+    ["ECFASV", "TWO_HOPS", true] for sim_for_fixed_joining_node, or ["CFASV", true] for the other commands), where the
+    scheduling method and the scenario are given by their names
+    :type simulation: list
+    :return: the positional arguments of the function main of the command
+    :rtype: list
+    :raise KeyError: if the scheduling method or the scenario is not valid
+    """
+    args = list(simulation)
+    args[0] = EBSchedulingMethod[args[0]]
+    if command == "sim_for_fixed_joining_node":
+        args[1] = importlib.import_module(command).Scenario[args[1]]
+    return args
+
+
+def simulation_options(command, options, queue):
+    """
+    :param command: the simulation command of a job (see COMMANDS)
+    :type command: str
+    :param options: the options of a job, i.e. the keyword arguments of the function main of its command, with the
+    following encoding: the horizon in seconds, the stopping rule, the outlier capture and the telemetry as the
+    keyword arguments of AdaptiveStopping, OutlierCapture (with the simulated time thresholds in seconds) and
+    SweepTelemetry. An option that is not given takes the value of the settings of the command (SWEEP_OPTIONS), except
+    for the telemetry, whose reports are always put to the queue of the job
+    :type options: dict
+    :param queue: the queue of the events of the job, to which the progress reports of the sweep are put
+    :type queue: queue.Queue
+    :return: the keyword arguments of the function main of the command
+    :rtype: dict
+    """
+    options = dict(options)
+    if options.get("horizon") is not None:
+        options["horizon"] = Duration(options["horizon"], unit="s")
+    if options.get("stopping_rule") is not None:
+        options["stopping_rule"] = AdaptiveStopping(**options["stopping_rule"])
+    if options.get("outlier_capture") is not None:
+        capture = dict(options["outlier_capture"])
+        for threshold in ("formation_time", "joining_time"):
+            if capture.get(threshold) is not None:
+                capture[threshold] = Duration(capture[threshold], unit="s")
+        options["outlier_capture"] = OutlierCapture(**capture)
+    options["telemetry"] = SweepTelemetry(**dict({"interval": DEFAULT_PROGRESS_INTERVAL},
+                                                 **(options.get("telemetry") or {})), queue=queue)
+    return dict(importlib.import_module(command).SWEEP_OPTIONS, **options)
+
+
+def run_simulation(command, simulation, options, directory, queue):
+    """
+    Runs a simulation of a job in a worker process of the server (the function main of the command), in the directory
+    of the job. The events of the simulation (started, completed or failed, and the progress reports of the sweep) are
+    put to the queue of the job, with the pid of the worker process.
+    """
+    queue.put({"event": "started", "simulation": simulation, "worker": os.getpid()})
+    start_time = time.perf_counter()
+    previous_directory = os.getcwd()
+    try:
+        os.chdir(directory)
+        os.makedirs(os.path.join("statistics", COMMANDS[command]), exist_ok=True)
+        importlib.import_module(command).main(*simulation_arguments(command, simulation),
+                                              **simulation_options(command, options, queue))
+    except Exception as e:
+        queue.put({"event": "failed", "simulation": simulation, "worker": os.getpid(),
+                   "error": "{}: {}".format(type(e).__name__, e), "traceback": traceback.format_exc()})
+    else:
+        queue.put({"event": "completed", "simulation": simulation, "worker": os.getpid(),
+                   "wall_time": time.perf_counter() - start_time})
+    finally:
+        os.chdir(previous_directory)
+
+
+class SweepServer:
+    """
+    A local service that runs the simulation sweeps on a pool of warm worker processes, which are started once and
+    have the simulators imported. The sweep jobs are accepted over a Unix socket (or a TCP port of the loopback
+    interface) and the events of each job are streamed back as the simulations progress, so that a sweep with small
+    parameter changes does not pay for the start of the processes and the imports.
+
+    A job is a JSON object in one line, e.g.
+    {"command": "sim_for_energy_consumption", "simulations": [["ECV"], ["CFASV", true]],
+     "options": {"horizon": 7200, "batch_size": 32}, "directory": "/path/of/the/statistics"}
+    (see the functions simulation_arguments and simulation_options). The simulations of the job are run as by the
+    command itself, with its settings (SWEEP_OPTIONS) overridden by the options of the job, in the given directory (by
+    default, the working directory of the client), so the samples are stored in its databases. The server responds with
+    one JSON object per line, for each event of the job: "started", "progress" (the progress reports of SweepTelemetry),
+    "completed" and "failed" for each simulation (a simulation whose worker process exits is also reported as failed),
+    and finally "done" with the number of the completed and the failed simulations (or "error" if the job is not valid).
+    """
+
+    def __init__(self, processes=None):
+        """
+        :param processes: the number of worker processes. If it is None, the number of CPUs is used
+        :type processes: int | None
+        """
+        self.__manager = multiprocessing.Manager()
+        self.__pool = Pool(processes, initializer=warm_up)
+
+    def run(self, job):
+        """
+        Submits a job to the worker processes. The simulations of the jobs are run in the order of their submission.
+        :param job: the job (see the class documentation)
+        :type job: dict
+        :return: the events of the job, as they occur
+        :rtype: collections.abc.Iterator[dict]
+        :raise ValueError: if the job is not valid
+        """
+        if not isinstance(job, dict) or job.get("command") not in COMMANDS:
+            raise ValueError("The command of the job must be one of {}".format(", ".join(COMMANDS)))
+        simulations = job.get("simulations")
+        if not isinstance(simulations, list) or not all(isinstance(simulation, list) and len(simulation) > 0
+                                                        for simulation in simulations):
+            raise ValueError("The simulations of the job must be a list of argument lists")
+        options = job.get("options") or {}
+        if not isinstance(options, dict):
+            raise ValueError("The options of the job must be an object")
+        directory = job.get("directory", os.getcwd())
+        if not os.path.isdir(directory):
+            raise ValueError("The directory {} of the job does not exist".format(directory))
+
+        queue = self.__manager.Queue()
+        async_results = [self.__pool.apply_async(run_simulation,
+                                                 (job["command"], simulation, options, directory, queue))
+                         for simulation in simulations]
+        return self.__events(queue, simulations, async_results)
+
+    @staticmethod
+    def __events(queue, simulations, async_results):
+        """
+        :return: the events of the simulations of a job, as they are put to its queue. A simulation whose worker process
+        exited (e.g. it was killed), or whose task failed outside the command (e.g. its arguments could not be sent to
+        the worker), is reported as failed, since it puts no further events
+        :rtype: collections.abc.Iterator[dict]
+        """
+        results = {"completed": 0, "failed": 0}
+        pending = list(range(len(simulations)))  # the indexes of the simulations that have not completed or failed
+        workers = {}  # the pid of the worker process of each started simulation, by index
+        next_check = time.monotonic() + SIMULATION_CHECK_INTERVAL
+        while pending:
+            lost_simulation = None
+            if time.monotonic() >= next_check:
+                lost_simulation = SweepServer.__lost_simulation(async_results, pending, workers)
+                next_check = time.monotonic() + SIMULATION_CHECK_INTERVAL
+
+            if lost_simulation is not None:
+                idx, error = lost_simulation
+                event = {"event": "failed", "simulation": simulations[idx], "error": error}
+            else:
+                try:
+                    event = queue.get(timeout=max(next_check - time.monotonic(), 0))
+                except queue_module.Empty:
+                    continue
+                event.setdefault("event", "progress")
+                # the simulations of a job may have identical arguments, so a started simulation is matched to the
+                # first pending one that has not started, and the other events to the one of their worker
+                if event["event"] == "started":
+                    workers[next(idx for idx in pending if idx not in workers
+                                 and simulations[idx] == event["simulation"])] = event["worker"]
+                elif event["event"] in results:
+                    idx = next((idx for idx in pending if workers.get(idx) == event["worker"]), None)
+                    if idx is None:  # the worker exited after the event, and the simulation was reported as failed
+                        continue
+
+            if event["event"] in results:
+                pending.remove(idx)
+                results[event["event"]] += 1
+            yield event
+        yield dict(event="done", **results)
+
+    @staticmethod
+    def __lost_simulation(async_results, pending, workers):
+        """
+        :return: the index of a pending simulation that will put no further events to the queue of its job and the
+        reason, or None if there is no such simulation
+        :rtype: (int, str) | None
+        """
+        alive_workers = {process.pid for process in multiprocessing.active_children()}
+        for idx in pending:
+            if async_results[idx].ready() and not async_results[idx].successful():
+                try:
+                    async_results[idx].get()
+                except Exception as e:
+                    return idx, "{}: {}".format(type(e).__name__, e)
+            if idx in workers and workers[idx] not in alive_workers:
+                return idx, "The worker process {} exited".format(workers[idx])
+        return None
+
+    def serve(self, address=DEFAULT_SOCKET):
+        """
+        Accepts jobs until the process is interrupted. Each connection submits one job and receives its events.
+        :param address: the path of the Unix socket, or the (host, port) of a TCP socket. The Unix socket is accessible
+        only by the user of the server. Note that a TCP socket on the loopback interface accepts the jobs of all the
+        local users
+        :type address: str | (str, int)
+        """
+        if isinstance(address, tuple):
+            server = socketserver.ThreadingTCPServer(address, _JobHandler)
+        else:
+            if os.path.exists(address):
+                os.remove(address)  # the socket of a previous server
+            server = socketserver.ThreadingUnixStreamServer(address, _JobHandler)
+            os.chmod(address, 0o600)
+        server.daemon_threads = True
+        server.sweep_server = self
+
+        print("Serving sweep jobs on {}".format(address), file=sys.stderr)
+        try:
+            with server:
+                server.serve_forever()
+        finally:
+            if not isinstance(address, tuple) and os.path.exists(address):
+                os.remove(address)
+
+    def close(self):
+        """
+        Terminates the worker processes. The running simulations are interrupted, and they are resumed from their last
+        completed work unit by the next run of the same job.
+        """
+        self.__pool.terminate()
+        self.__pool.join()
+        self.__manager.shutdown()
+
+
+class _JobHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        try:
+            events = self.server.sweep_server.run(json.loads(self.rfile.readline()))
+        except ValueError as e:  # including the JSON decoding errors
+            events = [{"event": "error", "message": str(e)}]
+
+        try:
+            for event in events:
+                self.wfile.write((json.dumps(event) + "\n").encode())
+        except (BrokenPipeError, ConnectionResetError):
+            # the simulations of the job continue, and their samples are stored in the databases as usual
+            pass
+
+
+def submit(job, address=DEFAULT_SOCKET):
+    """
+    Submits a job to a SweepServer.
+    :param job: the job (see SweepServer). If it has no directory, the working directory is used
+    :type job: dict
+    :param address: the address of the server (see SweepServer.serve)
+    :type address: str | (str, int)
+    :return: the events of the job, as they are streamed by the server
+    :rtype: collections.abc.Iterator[dict]
+    """
+    job = dict(job)
+    job.setdefault("directory", os.getcwd())
+    with socket.socket(socket.AF_INET if isinstance(address, tuple) else socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(address)
+        sock.sendall((json.dumps(job) + "\n").encode())
+        with sock.makefile("r") as f:
+            for line in f:
+                yield json.loads(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="A local service that runs the simulation sweeps on warm worker "
+                                                 "processes, and streams the events of the jobs.")
+    subparsers = parser.add_subparsers(dest="action", required=True)
+    serve_parser = subparsers.add_parser("serve", help="start the server")
+    serve_parser.add_argument("--processes", type=int, help="the number of worker processes (by default, the number "
+                                                            "of CPUs)")
+    submit_parser = subparsers.add_parser("submit", help="submit a job and print its events (one JSON object per line)")
+    submit_parser.add_argument("job", help="the JSON file of the job, or - for the standard input")
+    for subparser in (serve_parser, submit_parser):
+        subparser.add_argument("--socket", default=DEFAULT_SOCKET, help="the path of the Unix socket of the server")
+        subparser.add_argument("--port", type=int, help="use a TCP port of the loopback interface instead of the Unix "
+                                                        "socket")
+    args = parser.parse_args()
+    address = args.socket if args.port is None else ("127.0.0.1", args.port)
+
+    if args.action == "serve":
+        sweep_server = SweepServer(args.processes)
+        try:
+            sweep_server.serve(address)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            sweep_server.close()
+        return
+
+    if args.job == "-":
+        job = json.load(sys.stdin)
+    else:
+        with open(args.job) as f:
+            job = json.load(f)
+    succeeded = False
+    for event in submit(job, address):
+        print(json.dumps(event), flush=True)
+        succeeded = event["event"] == "done" and event["failed"] == 0
+    if not succeeded:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+import hashlib
+import json
+import os
+import threading
+
+import numpy
+
+from ieee802154.tsch.joining_phase_simulator import STATE_FORMAT
+
+# The version of the format of the cached topologies (the columns of the node tables and the meaning of their order).
+# It is a component of the paths of the cache, so that the topologies of an earlier version are not loaded. It must
+# also be incremented when the generation algorithm of a sweep changes, since only its parameters are keyed
+TOPOLOGY_FORMAT = 1
+
+
+class TopologyCache:
+    """
+    A persistent cache of the topologies (node tables) generated by the simulation sweeps. A node table is a float array
+    with one row per node, consisting of the x and y coordinates (in meters) and the boot time (in seconds) of the node.
+    The order of the rows is defined by the sweep that generates the topology.
+    Each topology is stored in a separate .npy file, keyed by (format version, scenario, size, topology sample index,
+    seed, parameters), and it is memory-mapped when it is loaded. The parameters are the ones of the generator of the
+    sweep (e.g. the area dimensions, the guaranteed radio range and the range of the boot times), which are hashed into
+    the file name, so a topology that was generated with different parameters is generated again. The cache can be
+    shared by concurrent sweep workers: a topology is written to a temporary file that is atomically renamed, and since
+    the topologies are deterministic functions of their seeds, two workers that generate the same topology at the same
+    time write identical files.
+    """
+
+    def __init__(self, cache_dir):
+        """
+        :param cache_dir: the directory of the cache
+        :type cache_dir: str
+        """
+        self.__cache_dir = cache_dir
+
+    def path(self, scenario, size, sample_idx, seed, parameters):
+        """
+        :return: the path of the file of a topology
+        :rtype: str
+        """
+        digest = hashlib.sha256(json.dumps(parameters, sort_keys=True).encode()).hexdigest()
+        return os.path.join(self.__cache_dir, "v{}".format(TOPOLOGY_FORMAT), scenario, str(size),
+                            "{}_{:016x}_{}.npy".format(sample_idx, seed, digest[:16]))
+
+    def get(self, scenario, size, sample_idx, seed, parameters, generate):
+        """
+        Returns a topology from the cache. If it is not cached, it is generated and stored.
+        :param scenario: the name of the scenario (e.g. "mobile_joining_node")
+        :type scenario: str
+        :param size: the size parameter of the topology (e.g. the number of advertisers)
+        :type size: int
+        :param sample_idx: the index of the topology sample
+        :type sample_idx: int
+        :param seed: the seed of the topology
+        :type seed: int
+        :param parameters: the parameters of the generator of the topology, which must be serializable to JSON
+        :type parameters: dict
+        :param generate: a function that generates the node table of the topology
+        :type generate: () -> numpy.ndarray
+        :return: the node table of the topology
+        :rtype: numpy.ndarray
+        """
+        path = self.path(scenario, size, sample_idx, seed, parameters)
+
+        try:
+            return numpy.load(path, mmap_mode="r")
+        except FileNotFoundError:
+            pass
+
+        node_table = numpy.ascontiguousarray(generate(), dtype=numpy.float64)
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = "{}.{}.{}.tmp".format(path, os.getpid(), threading.get_ident())
+        with open(temp_path, "wb") as temp_file:
+            numpy.save(temp_file, node_table)
+        os.replace(temp_path, path)
+
+        return node_table
+
+
+class FormedNetworkCache:
+    """
+    A persistent cache of the networks that are formed by the simulation sweeps before the rejoining attempts. The
+    state of a formed network (see JoiningPhaseSimulator.save_state) is stored in a separate .npz file, keyed by (format
+    version of the state, sweep name, size, topology sample index, seed, configuration digest). The configuration digest
+    (see JoiningPhaseSimulator.config_digest) covers the configuration of the simulator (e.g. the scan duration and the
+    horizon) and the nodes (e.g. their positions, boot times, transmission power and sensitivity), so a network that was
+    formed with a different configuration is formed again instead of being loaded. A sweep that is re-run with different
+    rejoin parameters loads the formed networks instead of simulating the network formation again. Like TopologyCache,
+    it can be shared by concurrent sweep workers.
+    """
+
+    def __init__(self, cache_dir):
+        """
+        :param cache_dir: the directory of the cache
+        :type cache_dir: str
+        """
+        self.__cache_dir = cache_dir
+
+    def path(self, sweep_name, size, sample_idx, seed, config_digest):
+        """
+        :return: the path of the file of a formed network
+        :rtype: str
+        """
+        return os.path.join(self.__cache_dir, "v{}".format(STATE_FORMAT), sweep_name, str(size),
+                            "{}_{:016x}_{}.npz".format(sample_idx, seed, config_digest[:16]))
+
+    def form(self, simulator, sweep_name, size, sample_idx, seed):
+        """
+        Loads the formed network of a simulator from the cache. If it is not cached, the network formation is simulated
+        (JoiningPhaseSimulator.execute) and its state is stored.
+        :param simulator: the simulator of the network
+        :type simulator: ieee802154.tsch.joining_phase_simulator.JoiningPhaseSimulator
+        :param sweep_name: the name of the sweep, which must identify the scheduling method (e.g. the database name)
+        :type sweep_name: str
+        :param size: the size parameter of the topology (e.g. the number of advertisers)
+        :type size: int
+        :param sample_idx: the index of the topology sample
+        :type sample_idx: int
+        :param seed: the seed of the topology sample
+        :type seed: int
+        :return: the result of the network formation (see JoiningPhaseSimulator.execute)
+        :rtype: (ieee802154.duration.Duration, float)
+        """
+        path = self.path(sweep_name, size, sample_idx, seed, simulator.config_digest())
+
+        try:
+            return simulator.load_state(path)
+        except FileNotFoundError:
+            pass
+
+        res = simulator.execute()
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = "{}.{}.{}.tmp".format(path, os.getpid(), threading.get_ident())
+        with open(temp_path, "wb") as temp_file:
+            simulator.save_state(temp_file)
+        os.replace(temp_path, path)
+
+        return res